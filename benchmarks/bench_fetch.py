@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+URL fetch benchmark
+Fetches synthetic articles from local fixture servers (one per simulated
+host) sequentially, concurrently, from a warm cache and with revalidation
+
+Usage:
+  python benchmarks/bench_fetch.py [URLS] [LATENCY_MS] [HOSTS]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from article_store import ArticleStore
+from fixture_http import FixtureServer
+from url_fetcher import UrlCache, UrlFetcher
+
+
+def run(label, urls, cache, store, servers, **kwargs):
+    """Fetch urls once and print timing and server-side request counts"""
+    before = sum(server.requests for server in servers)
+    fetcher = UrlFetcher(cache=cache, store=store, **kwargs)
+
+    start = time.perf_counter()
+    results = asyncio.run(fetcher.fetch_all(urls))
+    elapsed = time.perf_counter() - start
+
+    requests = sum(server.requests for server in servers) - before
+    ok = sum(1 for result in results.values() if result)
+    print(f"{label:<22} {elapsed:8.3f}s  {len(urls) / elapsed:9,.0f} urls/sec  "
+          f"{requests:5d} requests  {ok:5d} ok")
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    hosts = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    servers = [FixtureServer(latency=latency).start() for _ in range(hosts)]
+    urls = [f"{servers[i % hosts].base_url}/article/{i}" for i in range(count)]
+
+    print(f"URL fetch benchmark: {count} urls on {hosts} hosts, {latency * 1000:.0f} ms per request")
+    print("-" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ArticleStore(Path(tmp) / 'articles.sqlite3')
+        sample = min(count, 20)
+        run("sequential (sample)", urls[:sample], UrlCache(Path(tmp) / 'seq.sqlite3'), store,
+            servers, max_concurrency=1, per_host=1)
+
+        cache = UrlCache(Path(tmp) / 'cache.sqlite3')
+        run("concurrent, cold", urls, cache, store, servers, per_host=4)
+        run("warm cache (in TTL)", urls, cache, store, servers, per_host=4)
+        run("revalidate (304)", urls, cache, store, servers, per_host=4, ttl=0)
+        cache.close()
+        store.close()
+
+    for server in servers:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
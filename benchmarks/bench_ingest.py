@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Neo4j ingest benchmark
+Compares the per-row save path with batched UNWIND ingestion against the
+in-process fake driver
+
+Usage:
+  python benchmarks/bench_ingest.py [TWEETS] [LATENCY_MS]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import article_store
+from fake_neo4j import FakeDriver
+from save_to_neo4j import Neo4jSaver
+
+SAMPLE_TEXTS = [
+    "VRChatの新機能がすごい！メタバースの未来を感じる",
+    "Claude and GPT-4 comparison for coding tasks",
+    "Unity 6 ships a new WebGL backend",
+    "今日も開発頑張ります！",
+]
+
+
+def make_tweets(count):
+    """Build synthetic tweets in the server.js shape"""
+    tweets = []
+    for i in range(count):
+        tweet = {
+            'author': f"user{i % 50}",
+            'text': SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)],
+            'timestamp': '2026-01-14T09:00:00.000Z',
+            'urls': [],
+            'index': i
+        }
+        if i % 3 == 0:
+            url = f"https://example.com/article/{i}"
+            tweet['urls'].append(url)
+            tweet['linkedContent'] = [{
+                'url': url,
+                'title': f"Article {i}",
+                'description': 'Synthetic article',
+                'content': 'lorem ipsum ' * 150
+            }]
+        tweets.append(tweet)
+    return tweets
+
+
+COLLECTION_INFO = {
+    'date': '20260114',
+    'collected_at': '2026-01-14T09:00:00.000Z',
+    'source': 'benchmark',
+    'username': 'benchmark'
+}
+
+
+def run_per_row(tweets, latency):
+    driver = FakeDriver(latency)
+    saver = Neo4jSaver(None, None, None, driver=driver)
+    start = time.perf_counter()
+    for tweet in tweets:
+        tweet_id = f"{COLLECTION_INFO['date']}_{tweet['index']}"
+        saver.save_tweet(tweet, COLLECTION_INFO)
+        for article in tweet.get('linkedContent', []):
+            saver.save_article(article, tweet_id)
+        saver.extract_and_save_topics(tweet['text'], tweet_id)
+    return time.perf_counter() - start, driver
+
+
+def run_batched(tweets, latency, batch_size):
+    driver = FakeDriver(latency)
+    saver = Neo4jSaver(None, None, None, driver=driver)
+    start = time.perf_counter()
+    saver.ingest(tweets, COLLECTION_INFO, batch_size)
+    return time.perf_counter() - start, driver
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0005
+
+    tweets = make_tweets(count)
+    # Keep synthetic articles out of data/articles.sqlite3
+    tmp = tempfile.TemporaryDirectory()
+    article_store._store = article_store.ArticleStore(Path(tmp.name) / 'articles.sqlite3')
+    print(f"Ingest benchmark: {count} tweets, {latency * 1000:.2f} ms per query")
+    print("-" * 60)
+
+    elapsed, driver = run_per_row(tweets, latency)
+    print(f"per-row      {elapsed:8.3f}s  {count / elapsed:10,.0f} tweets/sec  "
+          f"{len(driver.queries):7d} queries  {driver.sessions:6d} sessions")
+
+    for batch_size in (100, 500, 2000):
+        elapsed, driver = run_batched(tweets, latency, batch_size)
+        print(f"batch={batch_size:<6} {elapsed:8.3f}s  {count / elapsed:10,.0f} tweets/sec  "
+              f"{len(driver.queries):7d} queries  {driver.sessions:6d} sessions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Search index benchmark
+Builds the full-text index for a synthetic collection and times BM25
+queries (English words, Japanese n-gram phrases, rare and common terms)
+
+Usage:
+  python benchmarks/bench_search.py [SIZE] [RUNS]   (default: 100k, 20 runs per query)
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import article_store
+from generate_data import generate, parse_size, path_for
+from search_index import SearchIndex
+
+QUERIES = [
+    'claude',                    # common English word
+    'webgl backend',             # two words, AND
+    'transformer paper',
+    '生成AI',                    # Japanese bigram phrase
+    '大規模言語モデル',           # long Japanese phrase
+    'ラーメン',
+    'shader 推論',               # mixed
+    'ai*',                       # prefix
+    'nonexistentterm',
+]
+
+
+def main():
+    label = sys.argv[1] if len(sys.argv) > 1 else '100k'
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    path = path_for(label)
+    if not path.exists():
+        print(f"Generating {label} collection: {path}")
+        generate(path, parse_size(label))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep synthetic articles out of data/articles.sqlite3
+        article_store._store = article_store.ArticleStore(Path(tmp) / 'articles.sqlite3')
+        index = SearchIndex(Path(tmp) / 'search.sqlite3')
+
+        start = time.perf_counter()
+        count = index.index_file(path)
+        elapsed = time.perf_counter() - start
+        stats = index.stats()
+        print(f"Indexed {count:,} tweets in {elapsed:.1f}s ({count / elapsed:,.0f} tweets/s), "
+              f"{stats['bytes'] / 1024 / 1024:.0f} MB")
+        print()
+        print(f"{'query':<20} {'hits':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        print("-" * 46)
+
+        for query in QUERIES:
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                hits = index.search(query, 10)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{query:<20} {len(hits):>6} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+
+        index.close()
+        article_store._store.close()
+
+
+if __name__ == '__main__':
+    main()
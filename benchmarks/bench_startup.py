@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup benchmark
+Cold-start wall time and import time (python -X importtime) of the CLI
+entry points, and which heavy SDKs each path loads
+
+  help       --help of the scheduler, report generator and Neo4j saver
+  fallback   report for a small collection with no API key (fallback report)
+  full       report with an API key and Neo4j save, both against closed
+             local ports so the SDKs load but no network is used
+
+Usage:
+  python benchmarks/bench_startup.py [RUNS]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCRIPTS = PROJECT_ROOT / 'scripts'
+
+# Modules that should only load on the code path that needs them
+HEAVY_MODULES = ('anthropic', 'neo4j', 'schedule', 'ssl', 'http.server', 'urllib.request')
+
+# A date no real collection uses, so the fallback report can be removed afterwards
+SAMPLE_NAME = '20000101_startup.json'
+SAMPLE_REPORT = PROJECT_ROOT / 'reports' / 'ai_news_20000101.md'
+
+CLOSED_PORT = 'http://127.0.0.1:9'
+
+
+def write_sample(directory):
+    """Small collection without linkedContent (no article store writes)"""
+    path = Path(directory) / SAMPLE_NAME
+    tweets = [{'author': f"user{i}", 'text': "Claude and VRChat news #AI",
+               'timestamp': '2000-01-01T09:00:00.000Z', 'urls': [], 'index': i}
+              for i in range(20)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'username': 'startup', 'collectedAt': '2000-01-01T09:00:00.000Z',
+                   'tweetCount': len(tweets), 'tweets': tweets}, f, indent=2)
+    return path
+
+
+def scenarios(sample):
+    report = [str(SCRIPTS / 'generate_report.py'), str(sample), '--no-cache', '--no-dedup']
+    save = [str(SCRIPTS / 'save_to_neo4j.py'), str(sample), '--no-dedup']
+    full_env = {'ANTHROPIC_API_KEY': 'startup-benchmark', 'ANTHROPIC_BASE_URL': CLOSED_PORT,
+                'CLAUDE_MAX_RETRIES': '0', 'NEO4J_URI': 'bolt://127.0.0.1:9'}
+    return [
+        ('scheduler --help', [[str(SCRIPTS / 'news_scheduler.py'), '--help']], {}),
+        ('report --help', [[str(SCRIPTS / 'generate_report.py'), '--help']], {}),
+        ('neo4j --help', [[str(SCRIPTS / 'save_to_neo4j.py'), '--help']], {}),
+        ('report fallback', [report], {'ANTHROPIC_API_KEY': None}),
+        ('full (report + save)', [report, save], full_env),
+    ]
+
+
+def run_once(commands, env):
+    """Run commands in sequence; returns (wall seconds, import seconds, modules loaded)"""
+    wall = imports = 0.0
+    loaded = set()
+    for command in commands:
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + command, env=env,
+                                capture_output=True, text=True, encoding='utf-8', errors='replace')
+        wall += time.perf_counter() - start
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if not cumulative.strip().isdigit():
+                continue  # column header
+            loaded.add(name.strip())
+            # Top-level imports have a single leading space; their cumulative times add up
+            if not name.startswith('  '):
+                imports += int(cumulative) / 1e6
+    return wall, imports, loaded
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sample = write_sample(tmp)
+        base_env = {**os.environ, 'METRICS_RUN_LOG': '0', 'PYTHONDONTWRITEBYTECODE': '1'}
+
+        print(f"Startup benchmark: median of {runs} runs")
+        print("-" * 78)
+        print(f"{'scenario':<22} {'wall':>9} {'imports':>9}  heavy modules loaded")
+        for label, commands, overrides in scenarios(sample):
+            env = dict(base_env)
+            for key, value in overrides.items():
+                if value is None:
+                    env.pop(key, None)
+                else:
+                    env[key] = value
+
+            walls, imports = [], []
+            for _ in range(runs):
+                wall, imported, loaded = run_once(commands, env)
+                walls.append(wall)
+                imports.append(imported)
+            heavy = [name for name in HEAVY_MODULES if name in loaded]
+            print(f"{label:<22} {statistics.median(walls) * 1000:7.0f}ms "
+                  f"{statistics.median(imports) * 1000:7.0f}ms  {', '.join(heavy) or '-'}")
+
+    if SAMPLE_REPORT.exists():
+        SAMPLE_REPORT.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Topic classifier micro-benchmark
+Compares the compiled single-pass matcher with the previous per-keyword
+substring scan
+
+Usage:
+  python benchmarks/bench_topics.py [TWEETS]   (default: 1,000,000)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from topic_classifier import CLASSIFIER, TOPIC_TAXONOMY
+
+SAMPLE_TEXTS = [
+    "VRChatの新機能がすごい！メタバースの未来を感じる https://example.com/vrchat-news",
+    "Claude and GPT-4 comparison for coding tasks, LLMs are getting better every week",
+    "Unity 6 ships a new WebGL backend with three.js interop",
+    "今日も開発頑張ります！",
+    "He said we should start the party early on Saturday",
+    "機械学習とディープラーニングの違いを解説する記事を書きました",
+    "Just had lunch at a great ramen place downtown",
+    "OpenAI and Anthropic both released new transformer research papers today",
+]
+
+
+def legacy_classify(text):
+    """Previous implementation: rebuild keyword lists, substring scan per topic"""
+    text_lower = text.lower()
+    found = []
+    for topic, keywords in TOPIC_TAXONOMY.items():
+        if any(keyword in text_lower for keyword in keywords):
+            found.append(topic)
+    return found
+
+
+def bench(name, fn, texts):
+    start = time.perf_counter()
+    matches = 0
+    for text in texts:
+        if fn(text):
+            matches += 1
+    elapsed = time.perf_counter() - start
+    print(f"{name:<12} {elapsed:8.3f}s  {len(texts) / elapsed:12,.0f} tweets/sec  "
+          f"{matches:9,d} matched")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] + f" #{i}" for i in range(count)]
+
+    print(f"Topic classification: {count:,} tweets")
+    print("-" * 60)
+    bench('legacy', legacy_classify, texts)
+    bench('compiled', CLASSIFIER.classify, texts)
+    bench('mask only', CLASSIFIER.classify_mask, texts)
+
+
+if __name__ == '__main__':
+    main()
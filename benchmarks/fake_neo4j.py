@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-process fake Neo4j driver
+Records queries instead of talking to a database, so the ingest path can be
+exercised and timed without a running Neo4j instance
+"""
+
+import time
+
+
+class FakeCounters:
+    """Stand-in for neo4j.SummaryCounters; nothing is ever created"""
+
+    nodes_created = 0
+    relationships_created = 0
+    properties_set = 0
+
+
+class FakeSummary:
+    """Stand-in for neo4j.ResultSummary"""
+
+    def __init__(self):
+        self.counters = FakeCounters()
+
+
+class FakeRecord:
+    """Stand-in for neo4j.Record; every field (by index or key) is None"""
+
+    def __getitem__(self, key):
+        return None
+
+
+class FakeResult:
+    """Stand-in for neo4j.Result"""
+
+    def __init__(self, records=None):
+        self._records = list(records or [])
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def consume(self):
+        return FakeSummary()
+
+    def __iter__(self):
+        return iter(self._records)
+
+
+class FakeTransaction:
+    """Stand-in for neo4j.ManagedTransaction"""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        return self.driver._record(query, parameters or kwargs)
+
+
+class FakeSession:
+    """Stand-in for neo4j.Session"""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        return self.driver._record(query, parameters or kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        self.driver.transactions += 1
+        return fn(FakeTransaction(self.driver), *args, **kwargs)
+
+    execute_read = execute_write
+
+
+class FakeDriver:
+    """Drop-in replacement for neo4j.Driver that records every query
+
+    latency simulates the network round trip paid by each query.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.queries = []
+        self.sessions = 0
+        self.transactions = 0
+        self.rows = 0
+
+    def _record(self, query, params):
+        if self.latency:
+            time.sleep(self.latency)
+        self.queries.append(query)
+        self.rows += len(params.get('rows', ())) or 1
+        # Queries with a RETURN clause yield one empty record
+        return FakeResult([FakeRecord()] if 'RETURN' in query else [])
+
+    def session(self, **kwargs):
+        self.sessions += 1
+        return FakeSession(self)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
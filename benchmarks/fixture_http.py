@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local HTTP fixture server
+Serves synthetic article pages with ETag and Last-Modified validators so
+the URL fetcher can be exercised without network access
+
+  /article/<n>   HTML article (304 when If-None-Match or If-Modified-Since match)
+  /r/<n>         301 to /article/<n>?utm_source=fixture (a t.co-style short link)
+  /missing/<n>   404
+  /slow/<n>      article served after 5 seconds (for timeouts)
+
+Usage:
+  python benchmarks/fixture_http.py [PORT] [LATENCY_MS]
+"""
+
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LAST_MODIFIED = formatdate(1767225600, usegmt=True)
+
+ARTICLE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Article {n} | Fixture News</title>
+<meta name="description" content="Synthetic article {n} about Claude &amp; VRChat">
+<meta property="og:title" content="Article {n}">
+<style>body {{ font-family: sans-serif; }}</style>
+<script>window.analytics = {{}};</script>
+</head>
+<body>
+<nav><a href="/">Home</a> <a href="/about">About</a></nav>
+<article>
+<h1>Article {n}</h1>
+<p>生成AIとメタバースの最新ニュース。Claude and GPT models keep improving.</p>
+{paragraphs}
+</article>
+<footer>Copyright Fixture News</footer>
+</body>
+</html>
+"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Request handler; counters live on the server object"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        kind, _, n = self.path.split('?')[0].strip('/').partition('/')
+        if kind == 'r':
+            self.send_response(301)
+            self.send_header('Location', f"/article/{n}?utm_source=fixture")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if kind == 'missing' or kind not in ('article', 'slow'):
+            self.send_body(404, b'not found', 'text/plain')
+            return
+        if kind == 'slow':
+            time.sleep(5)
+
+        etag = f'"article-{n}"'
+        if (self.headers.get('If-None-Match') == etag
+                or self.headers.get('If-Modified-Since') == LAST_MODIFIED):
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        paragraphs = '\n'.join(f"<p>Paragraph {i} of article {n}.</p>" for i in range(20))
+        body = ARTICLE_TEMPLATE.format(n=n, paragraphs=paragraphs).encode('utf-8')
+        self.send_body(200, body, 'text/html; charset=utf-8', etag)
+
+    def send_body(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Threaded fixture server that counts requests"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0):
+        super().__init__(('127.0.0.1', port), FixtureHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        """Serve from a background thread; returns self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8766
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    server = FixtureServer(port, latency)
+    print(f"Serving fixtures on {server.base_url}/article/<n>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic collection generator
+Writes tweet collection files in the backend/server.js JSON shape with
+mixed Japanese/English text and linkedContent sized like real fetches
+
+About a third of tweets link to an article; popular articles are shared
+by many tweets, as on a real timeline. Output is deterministic for a
+given size and seed.
+
+Usage:
+  python benchmarks/generate_data.py 100k            -> data/bench/20260101_bench100k.json
+  python benchmarks/generate_data.py 1k 100k 1m --seed 7
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+DEFAULT_OUTPUT_DIR = Path(__file__).parent.parent / 'data' / 'bench'
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+JA_FRAGMENTS = [
+    "生成AIの新しいモデルが公開されました", "VRChatでワールドを作ってみた", "メタバースの未来について考える",
+    "機械学習の勉強会に参加しました", "今日も開発頑張ります！", "Unityでシェーダーを書いている",
+    "ChatGPTに質問してみたら面白い答えが返ってきた", "ディープラーニングの論文を読んだ",
+    "ランチはラーメンでした", "新しいVRヘッドセットが届いた", "週末はゆっくり休みます",
+    "Claudeでコードレビューを自動化", "WebGLで3Dビューアを作成中", "大規模言語モデルの推論コストが下がってきた",
+]
+EN_FRAGMENTS = [
+    "Claude and GPT-4 comparison for coding tasks", "Unity 6 ships a new WebGL backend",
+    "Just had lunch at a great ramen place downtown", "OpenAI released a new transformer paper",
+    "LLM agents are getting better every week", "Trying out the new Quest headset tonight",
+    "three.js scene graph tips and tricks", "Weekend plans: nothing at all",
+    "Fine-tuning a small model on my own notes", "The metaverse hype cycle, revisited",
+]
+WORDS = ("model inference latency dataset training benchmark agent prompt token context "
+         "rendering shader avatar world headset engine runtime release update research").split()
+
+# Share of tweets with links, and how many distinct articles exist per linking tweet
+LINK_RATE = 0.35
+SECOND_LINK_RATE = 0.05
+POPULAR_ARTICLES = 200
+POPULAR_SHARE = 0.4
+
+
+def make_text(rng):
+    """One tweet: 1-3 fragments, mostly Japanese, some English or mixed"""
+    parts = []
+    for _ in range(rng.randint(1, 3)):
+        pool = JA_FRAGMENTS if rng.random() < 0.6 else EN_FRAGMENTS
+        parts.append(rng.choice(pool))
+    if rng.random() < 0.3:
+        parts.append('#' + rng.choice(['AI', 'VRChat', 'Unity', 'LLM', 'メタバース']))
+    return ' '.join(parts)
+
+
+def make_article(rng, article_id):
+    """linkedContent entry with realistic field sizes (content capped like server.js)"""
+    title = f"{rng.choice(EN_FRAGMENTS)} ({article_id})"
+    description = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(12, 30)))
+    content_words = rng.randint(80, 330)
+    content = ' '.join(rng.choice(WORDS) if rng.random() < 0.7 else rng.choice(JA_FRAGMENTS)
+                       for _ in range(content_words))[:2000]
+    return {
+        'url': f"https://news{article_id % 37}.example.com/articles/{article_id}?utm_source=twitter",
+        'title': title,
+        'description': description,
+        'content': content
+    }
+
+
+def generate(path, count, seed=0):
+    """Write a collection of count tweets to path; returns the path"""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, 9, 0, 0)
+    articles = {}
+    next_article = POPULAR_ARTICLES
+
+    def article_for():
+        nonlocal next_article
+        if rng.random() < POPULAR_SHARE:
+            article_id = rng.randrange(POPULAR_ARTICLES)
+        else:
+            article_id = next_article
+            next_article += 1
+        if article_id not in articles:
+            article = make_article(rng, article_id)
+            if article_id >= POPULAR_ARTICLES:
+                return article
+            articles[article_id] = article
+        return articles[article_id]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as out:
+        header = {
+            'username': 'bench',
+            'collectedAt': start.isoformat() + 'Z',
+            'source': 'benchmark',
+            'tweetCount': count
+        }
+        # Same layout as JSON.stringify(data, null, 2), written incrementally
+        out.write(json.dumps(header, ensure_ascii=False, indent=2)[:-2] + ',\n  "tweets": [\n')
+        for i in range(count):
+            tweet = {
+                'author': f"user{rng.randrange(max(10, count // 20))}",
+                'text': make_text(rng),
+                'timestamp': (start + timedelta(seconds=i * 7)).isoformat() + '.000Z',
+                'urls': [],
+                'index': i
+            }
+            if rng.random() < LINK_RATE:
+                linked = [article_for()]
+                if rng.random() < SECOND_LINK_RATE / LINK_RATE:
+                    linked.append(article_for())
+                tweet['urls'] = [article['url'] for article in linked]
+                tweet['linkedContent'] = linked
+            if i:
+                out.write(',\n')
+            out.write('    ' + json.dumps(tweet, ensure_ascii=False))
+        out.write('\n  ]\n}\n')
+    return path
+
+
+def path_for(size, output_dir=DEFAULT_OUTPUT_DIR):
+    """Standard file name for a size label (the date prefix keeps tweet IDs stable)"""
+    return Path(output_dir) / f"20260101_bench{size}.json"
+
+
+def parse_size(label):
+    label = label.lower()
+    if label in SIZES:
+        return SIZES[label]
+    return int(label)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic tweet collections")
+    parser.add_argument('sizes', nargs='+', help="Sizes: 1k, 10k, 100k, 1m or a number of tweets")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', default=str(DEFAULT_OUTPUT_DIR))
+    args = parser.parse_args()
+
+    for label in args.sizes:
+        path = generate(path_for(label.lower(), args.output_dir), parse_size(label), args.seed)
+        print(f"Wrote {parse_size(label):,} tweets to {path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite
+Times each pipeline stage on synthetic collections of several sizes and
+compares throughput with a saved baseline
+
+  load      stream the collection file and parse every tweet
+  extract   extract_ai_topics over the parsed tweets
+  prompt    prepare_analysis_prompt (ranking, packing, formatting)
+  fallback  generate_fallback_report
+  ingest    Neo4jSaver.ingest against the in-process fake driver
+  cache     build the columnar tweet cache (tweet_cache.py)
+  cached    extract_ai_topics reading the cache (no JSON parse, stored masks)
+
+Collections are generated with generate_data.py on first use. Peak RSS is
+the process high-water mark after the stage, so it only grows within a run.
+
+Usage:
+  python benchmarks/run_benchmarks.py                     1k and 100k
+  python benchmarks/run_benchmarks.py --sizes 1k,100k,1m
+  python benchmarks/run_benchmarks.py --save-baseline     Store results as the baseline
+  python benchmarks/run_benchmarks.py --check             Exit 1 on a regression
+"""
+
+import argparse
+import io
+import json
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import article_store
+import topic_rollups
+from fake_neo4j import FakeDriver
+from generate_data import generate, parse_size, path_for
+from generate_report import (extract_ai_topics, generate_fallback_report, load_tweet_data,
+                             prepare_analysis_prompt)
+from save_to_neo4j import Neo4jSaver, build_collection_info
+from tweet_cache import build_cache, load_tweets
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+DEFAULT_SIZES = '1k,100k'
+DEFAULT_THRESHOLD = 20.0
+INGEST_BATCH_SIZE = 500
+
+
+def peak_rss_mb():
+    """Process peak resident set size in MB, or None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+def timed(stage, func, items_of):
+    """Run func with its output silenced; returns (result, measurement)"""
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        result = func()
+    elapsed = time.perf_counter() - start
+    items = items_of(result)
+    return result, {
+        'stage': stage,
+        'items': items,
+        'seconds': round(elapsed, 4),
+        'ops_per_sec': round(items / elapsed, 1) if elapsed else 0.0,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_size(label, path, cache_dir):
+    """Time every stage on one collection file"""
+    results = []
+
+    def load():
+        data = load_tweet_data(path)
+        data['tweets'] = list(data['tweets'])
+        return data
+
+    data, row = timed('load', load, lambda data: len(data['tweets']))
+    results.append(row)
+    tweets = data['tweets']
+
+    topics, row = timed('extract', lambda: extract_ai_topics(data), lambda _: len(tweets))
+    results.append(row)
+
+    _, row = timed('prompt', lambda: prepare_analysis_prompt(topics, '2026-01-01'),
+                   lambda _: len(topics))
+    results.append(row)
+
+    _, row = timed('fallback', lambda: generate_fallback_report(topics, '2026-01-01'),
+                   lambda _: len(topics))
+    results.append(row)
+
+    collection_info = build_collection_info(path, data)
+    saver = Neo4jSaver(None, None, None, driver=FakeDriver())
+    _, row = timed('ingest', lambda: saver.ingest(tweets, collection_info, INGEST_BATCH_SIZE),
+                   lambda counts: counts['tweets'])
+    results.append(row)
+
+    _, row = timed('cache', lambda: build_cache(path, cache_dir), lambda _: len(tweets))
+    results.append(row)
+
+    _, row = timed('cached', lambda: extract_ai_topics(load_tweets(path, cache_dir)),
+                   lambda _: len(tweets))
+    results.append(row)
+
+    for row in results:
+        row['size'] = label
+    return results
+
+
+def print_results(results, baseline, threshold):
+    """Print a results table; returns the rows slower than the baseline by threshold %"""
+    regressions = []
+    print(f"{'size':<6} {'stage':<9} {'items':>9} {'seconds':>9} {'ops/sec':>12} "
+          f"{'peak MB':>8} {'vs base':>8}")
+    print("-" * 68)
+    for row in results:
+        key = f"{row['size']}/{row['stage']}"
+        change = ''
+        base = baseline.get(key)
+        if base and base.get('ops_per_sec'):
+            ratio = row['ops_per_sec'] / base['ops_per_sec'] - 1
+            change = f"{ratio:+.0%}"
+            if ratio * 100 < -threshold:
+                change += ' !'
+                regressions.append((key, ratio))
+        rss = f"{row['peak_rss_mb']:.0f}" if row['peak_rss_mb'] is not None else '-'
+        print(f"{row['size']:<6} {row['stage']:<9} {row['items']:>9,} {row['seconds']:>9.3f} "
+              f"{row['ops_per_sec']:>12,.0f} {rss:>8} {change:>8}")
+    return regressions
+
+
+def load_baseline(path):
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(path, results):
+    baseline = {
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'results': {f"{row['size']}/{row['stage']}": row for row in results}
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+    print(f"\nBaseline saved to {path}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the pipeline benchmark suite")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated sizes: 1k, 10k, 100k, 1m (default: {DEFAULT_SIZES})")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed ops/sec drop in percent (default: {DEFAULT_THRESHOLD:.0f})")
+    parser.add_argument('--check', action='store_true', help="Exit with status 1 on a regression")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for generated collections")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline_path = Path(args.baseline)
+    baseline = load_baseline(baseline_path)
+
+    # Keep synthetic articles out of data/articles.sqlite3
+    tmp = tempfile.TemporaryDirectory()
+    article_store._store = article_store.ArticleStore(Path(tmp.name) / 'articles.sqlite3')
+    # An empty rollup store, so prompt timings do not depend on data/rollups.sqlite3
+    topic_rollups.DEFAULT_ROLLUP_PATH = Path(tmp.name) / 'rollups.sqlite3'
+    topic_rollups.TopicRollups(topic_rollups.DEFAULT_ROLLUP_PATH).close()
+
+    results = []
+    for label in args.sizes.split(','):
+        label = label.strip().lower()
+        path = path_for(label)
+        if not path.exists():
+            print(f"Generating {label} collection: {path}")
+            generate(path, parse_size(label), args.seed)
+        print(f"Running {label}...")
+        results.extend(run_size(label, path, Path(tmp.name) / 'tweet_cache'))
+
+    print()
+    regressions = print_results(results, baseline, args.threshold)
+    if not baseline:
+        print(f"\nNo baseline at {baseline_path} (create one with --save-baseline)")
+
+    if args.save_baseline:
+        save_baseline(baseline_path, results)
+
+    article_store._store.close()
+    tmp.cleanup()
+
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) slower than the baseline by more than {args.threshold:.0f}%:")
+        for key, ratio in regressions:
+            print(f"  {key}: {ratio:+.0%}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
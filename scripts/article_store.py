@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Article Store
+Canonical article URLs and a compressed, content-addressed store of
+article bodies shared by every tweet that links to the same page
+
+  canonical_url   lowercases scheme/host, drops fragments, default ports,
+                  tracking parameters (utm_*, fbclid, ...) and trailing
+                  slashes, and sorts the query
+  aliases         short links (t.co, bit.ly) resolved while fetching map
+                  to the canonical URL of the page they redirect to
+  articles        title, description and zlib-compressed body keyed by a
+                  hash of that content
+
+Collection files, the URL cache, Neo4j and report prompts refer to an
+article body by its content_hash instead of carrying a copy of it.
+
+Usage:
+  python scripts/article_store.py                   Show store size
+  python scripts/article_store.py --clear           Delete all articles, aliases and tweet caches
+  python scripts/article_store.py --clear --force   ...even if collection files refer to articles
+"""
+
+import atexit
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_STORE_PATH = PROJECT_ROOT / 'data' / 'articles.sqlite3'
+# Holders of content_hash references into the store
+DEFAULT_DATA_DIR = PROJECT_ROOT / 'data' / 'tweets'
+DEFAULT_TWEET_CACHE_DIR = PROJECT_ROOT / 'data' / 'tweet_cache'
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Query parameters that only identify the click, never the page
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref_src', 'ref_url', '_hsenc', '_hsmi', 'spm', 'cmpid', 'ocid'
+}
+TRACKING_PREFIXES = ('utm_',)
+
+COMMIT_EVERY = 1000
+
+# Decompressed bodies kept in memory (the same article is read once per tweet)
+BODY_CACHE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    url TEXT PRIMARY KEY,
+    canonical TEXT NOT NULL
+);
+"""
+
+
+@lru_cache(maxsize=4096)
+def canonical_url(url):
+    """Return the canonical form of url used as the article identity
+
+    Empty and unparsable URLs (e.g. a non-numeric port) are returned as given.
+    """
+    url = url.strip()
+    if not url:
+        return url
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key.lower() not in TRACKING_PARAMS
+                   and not key.lower().startswith(TRACKING_PREFIXES))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def content_hash(title, description, content):
+    """Hash of the stored article fields; unchanged hash means nothing to rewrite"""
+    payload = json.dumps([title or '', description or '', content or ''], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ArticleStore:
+    """SQLite store of compressed article bodies and URL aliases"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by report workers and the ingest thread
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._bodies = OrderedDict()
+        self._known = set()
+        self._missing = set()
+        self._resolved = {}
+        # Raw URL -> resolved URL; skips canonical_url for URLs seen before
+        self._resolved_raw = {}
+        self._pending_writes = 0
+
+    def put(self, url, title, description, content):
+        """Store an article (no-op if identical content is stored); returns its hash"""
+        digest = content_hash(title, description, content)
+        if digest in self._known:
+            return digest
+
+        with self._lock:
+            if not self.conn.execute("SELECT 1 FROM articles WHERE hash = ?", (digest,)).fetchone():
+                raw = (content or '').encode('utf-8')
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, canonical_url(url), title or '', description or '',
+                     zlib.compress(raw, 6), len(raw)))
+                # Inserts are committed in groups; one transaction per article is slow
+                self._pending_writes += 1
+                if self._pending_writes >= COMMIT_EVERY:
+                    self._commit()
+            self._known.add(digest)
+        return digest
+
+    def _commit(self):
+        self.conn.commit()
+        self._pending_writes = 0
+
+    def commit(self):
+        """Make pending inserts visible to other processes"""
+        with self._lock:
+            self._commit()
+
+    def get(self, digest):
+        """Return {'url', 'title', 'description', 'content'} for a hash, or None"""
+        with self._lock:
+            if digest in self._bodies:
+                self._bodies.move_to_end(digest)
+                return self._bodies[digest]
+
+            row = self.conn.execute(
+                "SELECT url, title, description, body FROM articles WHERE hash = ?",
+                (digest,)).fetchone()
+            if row is None:
+                return None
+
+            article = {
+                'url': row[0],
+                'title': row[1],
+                'description': row[2],
+                'content': zlib.decompress(row[3]).decode('utf-8')
+            }
+            self._bodies[digest] = article
+            if len(self._bodies) > BODY_CACHE_SIZE:
+                self._bodies.popitem(last=False)
+            return article
+
+    def add_alias(self, url, target):
+        """Record that url (e.g. a t.co link) resolves to target"""
+        alias, canonical = canonical_url(url), canonical_url(target)
+        if alias == canonical:
+            return
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?)", (alias, canonical))
+            self._resolved[alias] = canonical
+            self._resolved_raw.clear()
+
+    def resolve(self, url):
+        """Canonical URL for url, following a recorded alias"""
+        resolved = self._resolved_raw.get(url)
+        if resolved is not None:
+            return resolved
+        canonical = canonical_url(url)
+        with self._lock:
+            if canonical not in self._resolved:
+                row = self.conn.execute(
+                    "SELECT canonical FROM aliases WHERE url = ?", (canonical,)).fetchone()
+                self._resolved[canonical] = row[0] if row else canonical
+            self._resolved_raw[url] = self._resolved[canonical]
+            return self._resolved[canonical]
+
+    def article(self, linked):
+        """Resolve one linkedContent entry to a full article dict with 'hash'
+
+        Entries written by the Chrome extension carry the body inline and are
+        added to the store; entries written by url_fetcher carry content_hash.
+        Returns None if that hash is no longer in the store: an empty body
+        would overwrite the real one in Neo4j.
+        """
+        url = self.resolve(linked.get('url', ''))
+        if 'content' not in linked and linked.get('content_hash'):
+            stored = self.get(linked['content_hash'])
+            if stored is not None:
+                return {**stored, 'url': url, 'hash': linked['content_hash']}
+            if linked['content_hash'] not in self._missing:
+                self._missing.add(linked['content_hash'])
+                print(f"Article {linked['content_hash'][:12]} is not in the article store, "
+                      f"skipping: {url}")
+            return None
+
+        title = linked.get('title', '')
+        description = linked.get('description', '')
+        content = linked.get('content', '')
+        digest = self.put(url, title, description, content)
+        return {'url': url, 'title': title, 'description': description,
+                'content': content, 'hash': digest}
+
+    def summary(self):
+        count, raw, stored = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) "
+            "FROM articles").fetchone()
+        aliases = self.conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0]
+        return {'articles': count, 'bytes': raw, 'compressed_bytes': stored, 'aliases': aliases}
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM articles")
+            self.conn.execute("DELETE FROM aliases")
+            self._bodies.clear()
+            self._known.clear()
+            self._resolved.clear()
+            self._resolved_raw.clear()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_article_store():
+    """Return the process-wide article store, opening it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+            atexit.register(_store.commit)
+        return _store
+
+
+def _contains(path, needle, chunk_size=1024 * 1024):
+    """True if the file at path contains the bytes needle"""
+    tail = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return False
+            data = tail + chunk
+            if needle in data:
+                return True
+            tail = data[-(len(needle) - 1):]
+
+
+def referencing_files(data_dir=DEFAULT_DATA_DIR):
+    """Collection files whose linkedContent refers to stored articles by content_hash"""
+    if not Path(data_dir).exists():
+        return []
+    return sorted(path for path in Path(data_dir).iterdir()
+                  if path.suffix in ('.json', '.jsonl') and _contains(path, b'"content_hash"'))
+
+
+def clear_all(store, cache_dir=DEFAULT_TWEET_CACHE_DIR):
+    """Clear the store and everything that points into it
+
+    Tweet caches are deleted (they are rebuilt from the collection files,
+    which puts inline article bodies back in the store) and the URL cache is
+    emptied, so pages are fetched again instead of resolving to nothing.
+    """
+    from url_fetcher import UrlCache
+
+    store.clear()
+    caches = sorted(Path(cache_dir).glob('*.twc')) if Path(cache_dir).exists() else []
+    for cache_path in caches:
+        cache_path.unlink()
+    url_cache = UrlCache()
+    try:
+        url_cache.clear()
+    finally:
+        url_cache.close()
+    return len(caches)
+
+
+def main():
+    """Main function"""
+    store = ArticleStore()
+
+    if '--clear' in sys.argv:
+        referencing = referencing_files()
+        if referencing and '--force' not in sys.argv:
+            print(f"Not clearing: {len(referencing)} collection files refer to stored articles "
+                  f"by content_hash (written by url_fetcher.py):")
+            for path in referencing:
+                print(f"  {path.name}")
+            print("Their linked articles would be skipped from then on. Use --force to clear anyway.")
+            store.close()
+            sys.exit(1)
+        caches = clear_all(store)
+        print(f"Cleared {store.path}, the URL cache and {caches} tweet caches")
+    else:
+        summary = store.summary()
+        ratio = summary['compressed_bytes'] / summary['bytes'] if summary['bytes'] else 0.0
+        print(f"{store.path}: {summary['articles']} articles, {summary['aliases']} aliases")
+        print(f"  {summary['bytes'] / 1024:.1f} KB of text stored in "
+              f"{summary['compressed_bytes'] / 1024:.1f} KB ({ratio:.0%})")
+
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Async Claude Client
+One shared AsyncAnthropic client with bounded concurrency, jittered
+exponential backoff that honors retry-after on 429/529, and token and
+latency counters
+
+Point ANTHROPIC_BASE_URL at a local mock server to test without the API.
+The anthropic SDK is imported on the first request, so runs that never call
+the API (no key, fallback report, --help) do not pay for it.
+"""
+
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from metrics import METRICS
+
+# HTTP statuses worth retrying (529 = overloaded)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('CLAUDE_MAX_CONCURRENCY', '4'))
+DEFAULT_MAX_RETRIES = int(os.getenv('CLAUDE_MAX_RETRIES', '5'))
+
+
+def parse_retry_after(headers):
+    """Return the server-requested delay in seconds, or None"""
+    if headers is None:
+        return None
+
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ClaudeStats:
+    """Request, retry, token and latency counters"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies = []
+        self.ttfts = []
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'latency_p50': self.percentile(50),
+            'latency_p95': self.percentile(95)
+        }
+
+
+class StreamStats:
+    """Timing of one streamed completion"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ttft = None
+        self.seconds = 0.0
+        self.generation_seconds = 0.0
+        self.output_tokens = 0
+        self.resumes = 0
+        self.resumed_chars = 0
+        self.stop_reason = None
+
+    @property
+    def tokens_per_sec(self):
+        """Output tokens per second after the first token"""
+        if not self.generation_seconds:
+            return 0.0
+        return self.output_tokens / self.generation_seconds
+
+    def summary_line(self):
+        ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "-"
+        line = (f"TTFT {ttft}, {self.output_tokens} tokens in {self.seconds:.1f}s "
+                f"({self.tokens_per_sec:.1f} tokens/s)")
+        if self.resumes:
+            line += f", resumed {self.resumes}x (tokens and rate of the final attempt)"
+        return line
+
+
+class ClaudeClient:
+    """Shared async Claude client
+
+    The underlying AsyncAnthropic client and semaphore are bound to the
+    running event loop and recreated only if a new loop is started. Call
+    close() before the loop ends (generate_report.run_async does) so each
+    asyncio.run() does not leave an HTTP connection pool behind.
+    """
+
+    def __init__(self, api_key=None, base_url=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=1.0, max_delay=60.0):
+        self.api_key = api_key
+        self.base_url = base_url or os.getenv('ANTHROPIC_BASE_URL')
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = ClaudeStats()
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    async def _bind(self):
+        """Create the client and semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            import anthropic
+            if self._client is not None:
+                await self._close_client()
+            # Retries are handled here, not by the SDK
+            self._client = anthropic.AsyncAnthropic(
+                api_key=self.api_key, base_url=self.base_url, max_retries=0)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def _close_client(self):
+        client, self._client, self._loop = self._client, None, None
+        try:
+            await client.close()
+        except RuntimeError:
+            # A client left open on a loop that has since closed cannot be
+            # shut down cleanly from this one; its pool is dropped instead
+            pass
+
+    async def close(self):
+        """Close the HTTP connection pool (call from the loop that used the client)"""
+        if self._client is not None:
+            await self._close_client()
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def retry_delay(self, error, attempt):
+        """Seconds to wait before retrying after error, or None if it should be raised"""
+        import anthropic
+        if isinstance(error, anthropic.APIStatusError):
+            if error.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                return None
+            delay = parse_retry_after(error.response.headers)
+            if delay is None:
+                delay = self.backoff(attempt)
+            print(f"Claude API returned {error.status_code}, retrying in {delay:.1f}s "
+                  f"({attempt + 1}/{self.max_retries})")
+            return delay
+        if isinstance(error, (anthropic.APIConnectionError, anthropic.APITimeoutError)):
+            if attempt == self.max_retries:
+                return None
+            delay = self.backoff(attempt)
+            print(f"Claude API connection error ({error}), retrying in {delay:.1f}s "
+                  f"({attempt + 1}/{self.max_retries})")
+            return delay
+        return None
+
+    def record_usage(self, message, latency):
+        """Add a finished message's latency and token usage to the counters"""
+        self.stats.latencies.append(latency)
+        METRICS.observe('claude_request_seconds', latency)
+        if message.usage:
+            input_tokens = message.usage.input_tokens or 0
+            output_tokens = message.usage.output_tokens or 0
+            self.stats.input_tokens += input_tokens
+            self.stats.output_tokens += output_tokens
+            METRICS.inc('claude_tokens_total', input_tokens, direction='input')
+            METRICS.inc('claude_tokens_total', output_tokens, direction='output')
+
+    async def create_message(self, **kwargs):
+        """Call messages.create with bounded concurrency and retries"""
+        client = await self._bind()
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                start = time.perf_counter()
+                self.stats.requests += 1
+                METRICS.inc('claude_requests_total')
+                try:
+                    message = await client.messages.create(**kwargs)
+                except Exception as e:
+                    delay = self.retry_delay(e, attempt)
+                    if delay is None:
+                        self.stats.failures += 1
+                        METRICS.inc('claude_failures_total')
+                        raise
+                else:
+                    self.record_usage(message, time.perf_counter() - start)
+                    return message
+
+                self.stats.retries += 1
+                METRICS.inc('claude_retries_total')
+                await asyncio.sleep(delay)
+
+    async def stream(self, prompt, system, model, max_tokens, temperature, on_text, prefill=''):
+        """Stream a single-turn completion, calling on_text(chunk) as text arrives
+
+        prefill is text already received (e.g. a partial report from an earlier
+        run); it is sent as the start of the assistant turn so Claude continues
+        from there. A stream that breaks mid-way is retried the same way, so
+        text already passed to on_text is never requested again.
+        Trailing whitespace is held back until more text arrives, because an
+        assistant prefill may not end with whitespace; after a retry it is
+        passed on unless the continuation starts with whitespace of its own.
+        Returns a StreamStats.
+        """
+        client = await self._bind()
+        stats = StreamStats()
+        received = prefill.rstrip()
+        stats.resumed_chars = len(received)
+        held = ''
+
+        def emit(chunk):
+            nonlocal received, held
+            body = chunk.rstrip()
+            if not body:
+                held += chunk
+                return
+            on_text(held + body)
+            received += held + body
+            held = chunk[len(body):]
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                messages = [{"role": "user", "content": prompt}]
+                if received:
+                    messages.append({"role": "assistant", "content": received})
+                start = time.perf_counter()
+                first_token = None
+                self.stats.requests += 1
+                METRICS.inc('claude_requests_total')
+                try:
+                    async with client.messages.stream(model=model, max_tokens=max_tokens,
+                                                      temperature=temperature, system=system,
+                                                      messages=messages) as response:
+                        async for chunk in response.text_stream:
+                            if first_token is None:
+                                if chunk[:1].isspace():
+                                    held = ''
+                                first_token = time.perf_counter()
+                                if stats.ttft is None:
+                                    stats.ttft = first_token - stats.started
+                                    self.stats.ttfts.append(stats.ttft)
+                                    METRICS.observe('claude_ttft_seconds', stats.ttft)
+                            emit(chunk)
+                        message = await response.get_final_message()
+                except Exception as e:
+                    delay = self.retry_delay(e, attempt)
+                    if delay is None:
+                        self.stats.failures += 1
+                        METRICS.inc('claude_failures_total')
+                        raise
+                else:
+                    if held:
+                        on_text(held)
+                    end = time.perf_counter()
+                    self.record_usage(message, end - start)
+                    # A broken stream reports no usage, so the token count and the
+                    # rate both cover the final attempt only
+                    stats.output_tokens = message.usage.output_tokens if message.usage else 0
+                    stats.generation_seconds = end - (first_token or end)
+                    stats.seconds = end - stats.started
+                    stats.stop_reason = message.stop_reason
+                    if stats.tokens_per_sec:
+                        METRICS.observe('claude_stream_tokens_per_second', stats.tokens_per_sec)
+                    return stats
+
+                if first_token is not None:
+                    stats.resumes += 1
+                    print(f"Stream interrupted after {len(received):,} characters; "
+                          f"continuing from there")
+                self.stats.retries += 1
+                METRICS.inc('claude_retries_total')
+                await asyncio.sleep(delay)
+
+    async def generate(self, prompt, system, model, max_tokens, temperature):
+        """Return the text of a single-turn completion"""
+        message = await self.create_message(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return message.content[0].text
+
+    def print_stats(self):
+        """Print request counters"""
+        stats = self.stats.summary()
+        if not stats['requests']:
+            return
+        print(f"\nClaude API: {stats['requests']} requests, {stats['retries']} retries, "
+              f"{stats['failures']} failures")
+        print(f"  Tokens: {stats['input_tokens']} in / {stats['output_tokens']} out")
+        print(f"  Latency: p50 {stats['latency_p50']:.2f}s, p95 {stats['latency_p95']:.2f}s")
+        if self.stats.ttfts:
+            ttfts = sorted(self.stats.ttfts)
+            print(f"  Time to first token: p50 {ttfts[len(ttfts) // 2]:.2f}s")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tweet Deduplication Index
+Local SQLite index that recognises the same tweet across collection files
+
+Two checks run per tweet:
+  exact  fingerprint of normalised (author, text, timestamp)
+  near   64-bit SimHash over character 3-grams, for retweets and quote
+         variants; banded lookup finds candidates within a Hamming distance
+
+Each tweet is recorded with its origin (file + index), so re-processing the
+same file never marks its own tweets as duplicates. A copy is credited to the
+earliest collection file (file names start with the date) whatever order the
+files are processed in, so regenerating an older report never loses tweets
+to a newer file.
+
+Usage:
+  python scripts/dedup_index.py           Show index size
+  python scripts/dedup_index.py --reset   Clear the index
+"""
+
+import hashlib
+import re
+import sqlite3
+import sys
+import unicodedata
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+DEFAULT_INDEX_PATH = Path(__file__).parent.parent / 'data' / 'dedup_index.sqlite3'
+
+# SimHash bands: 4 x 16 bits, so any pair within distance 3 shares a band
+SIMHASH_BANDS = 4
+SIMHASH_BAND_BITS = 16
+NEAR_DUP_DISTANCE = 3
+# Short texts ("lol", "+1") collide too easily for near-duplicate matching
+NEAR_DUP_MIN_CHARS = 20
+COMMIT_EVERY = 1000
+
+_URL = re.compile(r'https?://\S+')
+_RETWEET_PREFIX = re.compile(r'^rt @\w+:\s*')
+_WHITESPACE = re.compile(r'\s+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    simhash INTEGER,
+    origin TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS simhash_bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    tweet_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS simhash_bands_lookup ON simhash_bands (band, value);
+"""
+
+
+def normalise_text(text):
+    """Case-fold, NFKC-normalise, drop URLs and RT prefixes, squash whitespace"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    text = _URL.sub(' ', text)
+    text = _RETWEET_PREFIX.sub('', text.strip())
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def fingerprint(author, normalised_text, timestamp):
+    """Exact-duplicate key"""
+    key = f"{(author or '').lower()}\x1f{normalised_text}\x1f{timestamp or ''}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def simhash(normalised_text):
+    """64-bit SimHash over character 3-grams (works for Japanese and English)"""
+    grams = {normalised_text[i:i + 3] for i in range(max(1, len(normalised_text) - 2))}
+    bits = [format(int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(),
+                                  'big'), '064b')
+            for gram in grams]
+
+    # Column-wise majority vote; zip/count keep the per-bit loop in C
+    half = len(bits) / 2
+    return int(''.join('1' if column.count('1') > half else '0' for column in zip(*bits)), 2)
+
+
+def _to_signed(value):
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _file_of(origin):
+    return origin.rsplit(':', 1)[0]
+
+
+def _bands(value):
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return [(band, value >> (band * SIMHASH_BAND_BITS) & mask) for band in range(SIMHASH_BANDS)]
+
+
+class DedupIndex:
+    """SQLite-backed exact and near-duplicate tweet index"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.executescript(SCHEMA)
+        self._pending_writes = 0
+
+    def check(self, tweet, origin):
+        """Return the origin of an earlier copy of tweet, or None
+
+        Only copies from the same or an earlier file count. Tweets that are
+        not duplicates are added to the index.
+        """
+        text = normalise_text(tweet.get('text', ''))
+        fp = fingerprint(tweet.get('author'), text, tweet.get('timestamp'))
+
+        row = self.conn.execute(
+            "SELECT origin, simhash FROM tweets WHERE fingerprint = ?", (fp,)).fetchone()
+        if row:
+            stored, value = row
+            if stored != origin:
+                if _file_of(stored) <= _file_of(origin):
+                    return stored
+                # Indexed from a later file first: the copy belongs to this one
+                self.conn.execute("UPDATE tweets SET origin = ? WHERE fingerprint = ?",
+                                  (origin, fp))
+                self._count_write()
+            # A near copy may have been indexed from an earlier file since
+            return None if value is None else self._find_near(value & 0xFFFFFFFFFFFFFFFF, origin)
+
+        value = None
+        if len(text) >= NEAR_DUP_MIN_CHARS:
+            value = simhash(text)
+            match = self._find_near(value, origin)
+            if match:
+                return match
+
+        cursor = self.conn.execute(
+            "INSERT INTO tweets (fingerprint, simhash, origin) VALUES (?, ?, ?)",
+            (fp, None if value is None else _to_signed(value), origin))
+        if value is not None:
+            self.conn.executemany(
+                "INSERT INTO simhash_bands (band, value, tweet_id) VALUES (?, ?, ?)",
+                [(band, band_value, cursor.lastrowid) for band, band_value in _bands(value)])
+        self._count_write()
+        return None
+
+    def _count_write(self):
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_EVERY:
+            self.commit()
+
+    def _find_near(self, value, origin):
+        """Return the origin of a tweet within NEAR_DUP_DISTANCE from the same or an earlier file"""
+        file_key = _file_of(origin)
+        seen = set()
+        for band, band_value in _bands(value):
+            for tweet_id, other, other_origin in self.conn.execute(
+                    "SELECT t.id, t.simhash, t.origin FROM simhash_bands b "
+                    "JOIN tweets t ON t.id = b.tweet_id WHERE b.band = ? AND b.value = ?",
+                    (band, band_value)):
+                if tweet_id in seen or other_origin == origin or _file_of(other_origin) > file_key:
+                    continue
+                seen.add(tweet_id)
+                if bin((other & 0xFFFFFFFFFFFFFFFF) ^ value).count('1') <= NEAR_DUP_DISTANCE:
+                    return other_origin
+        return None
+
+    def commit(self):
+        self.conn.commit()
+        self._pending_writes = 0
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+
+    def reset(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM simhash_bands")
+            self.conn.execute("DELETE FROM tweets")
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class DedupFilter:
+    """Iterator that drops tweets already seen in other collection files
+
+    consumed counts raw tweets read from the source, so ingest watermarks
+    stay aligned with file positions. With index=None nothing is dropped.
+    """
+
+    def __init__(self, tweets, index, file_key):
+        self._tweets = iter(tweets)
+        self.index = index
+        self.file_key = file_key
+        self.consumed = 0
+        self.skipped = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            tweet = next(self._tweets)
+            position = self.consumed
+            self.consumed += 1
+            if self.index is None:
+                return tweet
+
+            origin = f"{self.file_key}:{tweet.get('index', position)}"
+            if self.index.check(tweet, origin) is None:
+                return tweet
+            self.skipped += 1
+
+
+def main():
+    """Main function"""
+    index = DedupIndex()
+
+    if '--reset' in sys.argv:
+        index.reset()
+        print(f"Reset {index.path}")
+    else:
+        print(f"{index.path}: {index.count()} unique tweets")
+
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
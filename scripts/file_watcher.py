@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Collection File Watcher
+Reports new or rewritten files in data/tweets/ once they have finished
+being written
+
+Uses inotify on Linux (through ctypes, no extra packages) and falls back to
+a portable polling watcher elsewhere. backend/server.js writes files with
+fs.writeFile, which is not atomic, so a file is only reported after it has
+been quiet for settle_seconds and looks complete.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+COLLECTION_SUFFIXES = ('.json', '.jsonl')
+DEFAULT_SETTLE_SECONDS = 2.0
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def looks_complete(path):
+    """Cheap check that a JSON document has been fully written"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return False
+            if path.suffix == '.jsonl':
+                return True
+            f.seek(max(0, size - 64))
+            tail = f.read().rstrip()
+    except OSError:
+        return False
+    return tail.endswith((b'}', b']'))
+
+
+class _BaseWatcher:
+    """Debounce logic shared by the inotify and polling watchers"""
+
+    def __init__(self, directory, settle_seconds=DEFAULT_SETTLE_SECONDS):
+        self.directory = Path(directory)
+        self.settle_seconds = settle_seconds
+        self._pending = {}
+
+    def _wait_for_changes(self, timeout):
+        """Return names of entries that changed, waiting up to timeout"""
+        raise NotImplementedError
+
+    def poll(self, timeout=1.0):
+        """Return files that changed and have since settled"""
+        # Wake up in time to release files whose quiet period ends
+        if self._pending:
+            timeout = min(timeout, self.settle_seconds)
+
+        for name in self._wait_for_changes(timeout):
+            if name.endswith(COLLECTION_SUFFIXES):
+                self._pending[name] = time.monotonic()
+
+        now = time.monotonic()
+        ready = []
+        for name, changed_at in list(self._pending.items()):
+            if now - changed_at < self.settle_seconds:
+                continue
+            path = self.directory / name
+            if not path.exists():
+                del self._pending[name]
+            elif looks_complete(path):
+                del self._pending[name]
+                ready.append(path)
+        return sorted(ready)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher(_BaseWatcher):
+    """Linux inotify watcher"""
+
+    def __init__(self, directory, settle_seconds=DEFAULT_SETTLE_SECONDS):
+        super().__init__(directory, settle_seconds)
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        if libc.inotify_add_watch(self._fd, os.fsencode(str(self.directory)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {self.directory}")
+
+    def _wait_for_changes(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher(_BaseWatcher):
+    """Portable watcher that compares (size, mtime) between directory scans
+
+    Only entries whose signature changed are reported; on Windows the stat
+    data comes with the directory listing, so unchanged files cost nothing.
+    """
+
+    def __init__(self, directory, settle_seconds=DEFAULT_SETTLE_SECONDS, interval=1.0):
+        super().__init__(directory, settle_seconds)
+        self.interval = interval
+        self._signatures = self._scan()
+
+    def _scan(self):
+        signatures = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(COLLECTION_SUFFIXES):
+                    stat = entry.stat()
+                    signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def _wait_for_changes(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        signatures = self._scan()
+        changed = [name for name, signature in signatures.items()
+                   if self._signatures.get(name) != signature]
+        self._signatures = signatures
+        return changed
+
+
+def create_watcher(directory, settle_seconds=DEFAULT_SETTLE_SECONDS):
+    """Return an inotify watcher on Linux, otherwise a polling watcher"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory, settle_seconds)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory, settle_seconds)
@@ -5,9 +5,12 @@ AI News Report Generator
 Analyzes collected tweets and generates a report in Naru-sensei's style
 """
 
-import json
+import argparse
+import asyncio
+import glob
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -19,7 +22,19 @@ if sys.platform.startswith('win'):
     if sys.stderr.encoding != 'utf-8':
         sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
-import anthropic
+from article_store import get_article_store
+from claude_client import ClaudeClient
+from dedup_index import DedupFilter, DedupIndex
+from llm_cache import LLMCache, cache_key
+from metrics import METRICS
+from profiling import DEFAULT_TOP, profile_stages
+from prompt_builder import (DEFAULT_TOKEN_BUDGET, chunk_topics, format_topic, pack_topics,
+                            remember_articles)
+from report_stream import PartialReport
+from topic_classifier import CLASSIFIER, REPORT_MASK
+from topic_rollups import trend_text
+from tweet_cache import load_tweets
+from tweet_stream import find_collection_files
 
 # Configuration
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
@@ -27,6 +42,19 @@ if not ANTHROPIC_API_KEY:
     print("Warning: ANTHROPIC_API_KEY not set. Please set it to use Claude API.")
     print("   Set it with: export ANTHROPIC_API_KEY='your-api-key'")
 
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+CLAUDE_MAX_TOKENS = 8000
+CLAUDE_TEMPERATURE = 1.0
+
+# Token budget for topic text; larger inputs go through map-reduce
+TOKEN_BUDGET = DEFAULT_TOKEN_BUDGET
+SUMMARY_MAX_TOKENS = 2000
+
+# Shared across every report generated by this process
+_claude_client = None
+_llm_cache = None
+USE_CACHE = True
+
 NARU_SENSEI_PROMPT = """【ロール設定】
 あなたは「ナル先生」というキャラクターとして振る舞ってください。
 ナル先生の正体は、最新のAIトレンドに超詳しい「Harajuku-Girl（原宿系ギャル）」です。
@@ -48,90 +76,89 @@ NARU_SENSEI_PROMPT = """【ロール設定】
 - 本文はMarkdown形式で出力してください。
 - 数式や科学的な式が必要な場合は、必ず LaTeX（$記号で囲む形式）を使用してください。"""
 
+SUMMARY_SYSTEM_PROMPT = """あなたはAI・XR・開発分野のニュースアナリストです。
+与えられたツイートと記事を、後で1本のレポートにまとめるための中間要約として整理してください。
+キャラクターの口調は不要です。事実・固有名詞・URLを正確に残し、簡潔なMarkdownで出力してください。"""
+
 
 def load_tweet_data(filepath):
-    """Load tweet data from JSON file"""
+    """Open tweet data for streaming; 'tweets' is a generator"""
     print(f"Loading tweet data from: {filepath}")
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_tweets(filepath)
 
-    print(f"Loaded {data.get('tweetCount', 0)} tweets")
+    source = 'columnar cache' if 'classify_mask' in data else 'JSON'
+    print(f"Streaming {data.get('tweetCount', 'unknown number of')} tweets ({source})")
     return data
 
 
-def extract_ai_topics(tweets_data):
-    """Extract AI-related topics from tweets and articles"""
+def extract_ai_topics(tweets_data, classify_mask=None):
+    """Extract AI-related topics from tweets and articles
+
+    classify_mask(tweet) may supply precomputed topic bitmasks; data read
+    from the tweet cache supplies its stored masks.
+    """
     print("\nAnalyzing tweets for AI-related content...")
 
+    classify_mask = classify_mask or tweets_data.get('classify_mask')
+    store = get_article_store()
     topics = []
+    scanned = articles = 0
 
     for tweet in tweets_data.get('tweets', []):
+        scanned += 1
         # Check if tweet mentions AI-related keywords
-        text = tweet.get('text', '').lower()
-        ai_keywords = ['ai', 'gpt', 'llm', 'machine learning', 'deep learning',
-                      'neural', 'transformer', 'anthropic', 'openai', 'claude',
-                      'gemini', 'chatgpt', 'vrchat', 'unity', 'vr', 'ar', 'xr',
-                      'metaverse', 'webgl', '機械学習', '深層学習', 'ディープラーニング',
-                      'メタバース', 'quest']
-
-        is_ai_related = any(keyword in text for keyword in ai_keywords)
+        text = tweet.get('text', '')
+        mask = classify_mask(tweet) if classify_mask else CLASSIFIER.classify_mask(text)
 
-        if is_ai_related or tweet.get('linkedContent'):
+        if mask & REPORT_MASK or tweet.get('linkedContent'):
             topic = {
                 'author': tweet.get('author', 'unknown'),
                 'text': tweet.get('text', ''),
                 'timestamp': tweet.get('timestamp', ''),
                 'urls': tweet.get('urls', []),
+                'topics': CLASSIFIER.topics_for_mask(mask),
                 'linked_content': []
             }
 
-            # Add linked content information
-            for content in tweet.get('linkedContent', []):
+            # Add linked content information (bodies come from the article store)
+            for linked in tweet.get('linkedContent', []):
+                article = store.article(linked)
+                if article is None:
+                    continue
                 topic['linked_content'].append({
-                    'url': content.get('url', ''),
-                    'title': content.get('title', ''),
-                    'description': content.get('description', ''),
-                    'content': content.get('content', '')[:500]  # First 500 chars
+                    'url': article['url'],
+                    'title': article['title'],
+                    'description': article['description'],
+                    'content': article['content'][:500],  # First 500 chars
+                    'hash': article['hash']
                 })
+            articles += len(topic['linked_content'])
 
             topics.append(topic)
 
+    store.commit()
+    METRICS.inc('tweets_total', scanned)
+    METRICS.inc('topics_total', len(topics))
+    METRICS.inc('articles_total', articles)
     print(f"Found {len(topics)} AI-related topics")
     return topics
 
 
-def prepare_analysis_prompt(topics, date_str):
-    """Prepare the prompt for Claude analysis"""
-
-    # Prepare topics summary
-    topics_text = ""
-    for i, topic in enumerate(topics, 1):
-        topics_text += f"\n## トピック {i}\n"
-        topics_text += f"**投稿者**: @{topic['author']}\n"
-        topics_text += f"**ツイート**: {topic['text']}\n"
-        topics_text += f"**日時**: {topic['timestamp']}\n"
-
-        if topic['linked_content']:
-            topics_text += f"\n**リンク先記事**:\n"
-            for content in topic['linked_content']:
-                topics_text += f"- **URL**: {content['url']}\n"
-                topics_text += f"  **タイトル**: {content['title']}\n"
-                if content['description']:
-                    topics_text += f"  **説明**: {content['description']}\n"
-                if content['content']:
-                    topics_text += f"  **内容抜粋**: {content['content'][:300]}...\n"
-
-        topics_text += "\n---\n"
+def build_report_prompt(topics_text, date_str, topic_count, trends_text=''):
+    """Wrap topic text (or chunk summaries) in the report instructions
 
-    prompt = f"""以下のTwitterから収集したAI関連のツイートと記事を分析して、「ナル先生のAIニュースレポート」を作成してください。
+    trends_text (from topic_rollups.trend_text) adds week-over-week context.
+    """
+    trends = f"{trends_text}\n\n" if trends_text else ''
+    return f"""以下のTwitterから収集したAI関連のツイートと記事を分析して、「ナル先生のAIニュースレポート」を作成してください。
 
 収集日: {date_str}
-収集したトピック数: {len(topics)}
+収集したトピック数: {topic_count}
 
 {topics_text}
 
-【レポート作成の指示】
+{trends}【レポート作成の指示】
 1. 上記のトピックを分析して、重要度の高い順にランキング
 2. 各トピックについて、ナル先生のスタイルで解説
 3. 背景情報や周辺情報も含めて、「なぜヤバいのか」を説明
@@ -141,43 +168,214 @@ def prepare_analysis_prompt(topics, date_str):
 
 それでは、ナル先生になりきって、超ハイテンションでエモいレポートを作成してください！✨"""
 
-    return prompt
 
+def prepare_analysis_prompt(topics, date_str, token_budget=None):
+    """Prepare the prompt for Claude analysis
+
+    Topics are ranked and packed into the token budget; lower-value topics
+    that do not fit are dropped.
+    """
+    pack = pack_topics(topics, token_budget or TOKEN_BUDGET)
+    pack.log()
+    return build_report_prompt(pack.text, date_str, len(topics), trend_text(date_str))
+
+
+def prepare_chunk_prompt(chunk, date_str, chunk_number, chunk_count):
+    """Prepare a map-phase prompt that summarises one chunk of topics"""
+    articles = {}
+    blocks = []
+    for number, topic in enumerate(chunk, 1):
+        blocks.append(format_topic(topic, number, articles))
+        remember_articles(topic, number, articles)
+    topics_text = ''.join(blocks)
+    return f"""収集日 {date_str} のAI関連ツイートと記事（パート {chunk_number}/{chunk_count}、{len(chunk)}件）です。
+
+{topics_text}
+
+【要約の指示】
+1. 重要なトピックを重要度の高い順に並べる
+2. 各トピックについて、投稿者・要点・関連URL・背景を2〜4行でまとめる
+3. 似たトピックは1つにまとめる"""
+
+
+async def generate_report_for_topics(topics, date_str, report_file=None):
+    """Generate a report, switching to map-reduce when topics overflow the budget
+
+    With report_file (a PartialReport), the final report is streamed into it.
+    """
+    pack = pack_topics(topics, TOKEN_BUDGET)
+    pack.log()
+    trends = trend_text(date_str)
+
+    if not pack.overflow or not ANTHROPIC_API_KEY:
+        prompt = build_report_prompt(pack.text, date_str, len(topics), trends)
+        return await generate_report_async(prompt, report_file=report_file)
+
+    # Map: summarise budget-sized chunks in parallel
+    chunks = chunk_topics(topics, TOKEN_BUDGET)
+    print(f"\nInput exceeds token budget; summarising {len(chunks)} chunks (map-reduce)")
+
+    summaries = await asyncio.gather(*(
+        generate_report_async(
+            prepare_chunk_prompt(chunk, date_str, i, len(chunks)),
+            system=SUMMARY_SYSTEM_PROMPT,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            label=f"summary {i}/{len(chunks)}"
+        )
+        for i, chunk in enumerate(chunks, 1)
+    ))
+    summaries = [summary for summary in summaries if summary]
+    if not summaries:
+        return None
+
+    # Reduce: merge chunk summaries into the final Naru-sensei report
+    summaries_text = '\n\n'.join(
+        f"## パート {i} の要約\n{summary}" for i, summary in enumerate(summaries, 1))
+    prompt = build_report_prompt(summaries_text, date_str, len(topics), trends)
+    return await generate_report_async(prompt, report_file=report_file)
+
+
+def load_unique_topics(input_file, use_dedup=True, fetch_urls=False):
+    """Load a collection file and extract topics, skipping cross-file duplicates
+
+    With fetch_urls, tweets whose links were never fetched get linkedContent
+    from url_fetcher first.
+    """
+    tweets_data = load_tweet_data(input_file)
+
+    index = DedupIndex() if use_dedup else None
+    tweets = DedupFilter(tweets_data['tweets'], index, Path(input_file).stem)
+    tweets_data['tweets'] = tweets
+
+    try:
+        if fetch_urls:
+            # Imported only here: the HTTP client stack (ssl, urllib) is slow to load
+            from url_fetcher import enrich_tweets
+            # All URLs are needed up front to fetch them concurrently
+            tweets_data['tweets'] = list(tweets)
+            enrich_tweets(tweets_data['tweets'])
+        topics = extract_ai_topics(tweets_data)
+    finally:
+        if index:
+            index.close()
+
+    if tweets.skipped:
+        print(f"Skipped {tweets.skipped} tweets already seen in other collection files")
+    return topics
+
+
+def get_claude_client(max_concurrency=None):
+    """Return the process-wide Claude client"""
+    global _claude_client
+    if _claude_client is None:
+        kwargs = {'max_concurrency': max_concurrency} if max_concurrency else {}
+        _claude_client = ClaudeClient(api_key=ANTHROPIC_API_KEY, **kwargs)
+    return _claude_client
+
+
+def run_async(coro):
+    """asyncio.run(coro), closing the Claude client's connections before the loop ends
+
+    The client is bound to one event loop, and a long-lived process (the
+    scheduler's pipeline) starts a new loop per file.
+    """
+    async def run():
+        try:
+            return await coro
+        finally:
+            if _claude_client is not None:
+                await _claude_client.close()
+
+    return asyncio.run(run())
 
-def generate_report_with_claude(prompt):
-    """Generate report using Claude API"""
+
+def get_llm_cache():
+    """Return the process-wide response cache, or None with --no-cache"""
+    global _llm_cache
+    if _llm_cache is None and USE_CACHE:
+        _llm_cache = LLMCache()
+    return _llm_cache
+
+
+async def generate_report_async(prompt, system=NARU_SENSEI_PROMPT,
+                                max_tokens=CLAUDE_MAX_TOKENS, label="report", report_file=None):
+    """Generate report using Claude API (async)
+
+    With report_file, the response is streamed into it instead of returned
+    in one piece; see stream_report.
+    """
+
+    cache = get_llm_cache()
+    key = cache_key(CLAUDE_MODEL, system, CLAUDE_TEMPERATURE, prompt)
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"\nUsing cached {label} (same model, prompt and settings)")
+            return cached
 
     if not ANTHROPIC_API_KEY:
         print("\nSkipping Claude API call (no API key)")
         return None
 
-    print("\nGenerating report with Claude API...")
+    print(f"\nGenerating {label} with Claude API...")
 
     try:
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=8000,
-            temperature=1.0,
-            system=NARU_SENSEI_PROMPT,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
-
-        report = message.content[0].text
-        print("Report generated successfully!")
+        if report_file is not None:
+            report = await stream_report(prompt, system, max_tokens, key, report_file)
+        else:
+            report = await get_claude_client().generate(
+                prompt,
+                system=system,
+                model=CLAUDE_MODEL,
+                max_tokens=max_tokens,
+                temperature=CLAUDE_TEMPERATURE
+            )
+        print(f"Generated {label} successfully!")
+        if cache:
+            cache.put(key, CLAUDE_MODEL, report)
         return report
 
     except Exception as e:
-        print(f"Error generating report: {e}")
+        print(f"Error generating {label}: {e}")
         return None
 
 
+async def stream_report(prompt, system, max_tokens, key, report_file):
+    """Stream a completion into report_file and rename it into place; returns the text
+
+    A partial file left by an earlier failed run of the same request is
+    resumed, and a stream that fails now leaves its partial file behind.
+    """
+    resumed = report_file.begin(key)
+    if resumed:
+        print(f"Resuming partial report ({len(resumed):,} characters)")
+
+    try:
+        stats = await get_claude_client().stream(
+            prompt,
+            system=system,
+            model=CLAUDE_MODEL,
+            max_tokens=max_tokens,
+            temperature=CLAUDE_TEMPERATURE,
+            on_text=report_file.write,
+            prefill=resumed
+        )
+    except BaseException:
+        report_file.keep()
+        raise
+
+    report_file.commit()
+    print(f"Streamed: {stats.summary_line()}")
+    if stats.stop_reason == 'max_tokens':
+        print(f"Warning: report stopped at the {max_tokens} token limit")
+    return report_file.path.read_text(encoding='utf-8')
+
+
+def generate_report_with_claude(prompt):
+    """Generate report using Claude API"""
+    return run_async(generate_report_async(prompt))
+
+
 def generate_fallback_report(topics, date_str):
     """Generate a simple fallback report without Claude API"""
 
@@ -227,10 +425,15 @@ AIの進化は止まらないし、みんなもこの波に乗って、一緒に
     return report
 
 
+def report_path(date_str, output_dir):
+    """reports/ai_news_YYYYMMDD.md for a date"""
+    return Path(output_dir) / f"ai_news_{date_str}.md"
+
+
 def save_report(report, date_str, output_dir):
     """Save report to markdown file"""
 
-    output_path = output_dir / f"ai_news_{date_str}.md"
+    output_path = report_path(date_str, output_dir)
 
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(report)
@@ -239,8 +442,208 @@ def save_report(report, date_str, output_dir):
     return output_path
 
 
+def parse_date_from_filename(input_file):
+    """Return ("20260114", "2026-01-14") for data/tweets/20260114_goromian.json"""
+    date_part = Path(input_file).stem.split('_')[0]
+    date_str = f"{date_part[:4]}-{date_part[4:6]}-{date_part[6:8]}"
+    return date_part, date_str
+
+
+def find_batch_files(pattern, date_from=None, date_to=None):
+    """Resolve a directory or glob to collection files within a date range"""
+    path = Path(pattern)
+    if path.is_dir():
+        files = find_collection_files(path)
+    else:
+        files = [Path(p) for p in glob.glob(pattern)]
+
+    selected = []
+    for input_file in sorted(files):
+        date_part, _ = parse_date_from_filename(input_file)
+        if date_from and date_part < date_from:
+            continue
+        if date_to and date_part > date_to:
+            continue
+        selected.append(input_file)
+
+    return selected
+
+
+def index_collections(files):
+    """Record the tweets of files in the dedup index serially, oldest first
+
+    Batch workers parse in parallel; with the index filled in date order
+    beforehand, which tweets count as duplicates does not depend on the order
+    the workers happen to run in.
+    """
+    index = DedupIndex()
+    try:
+        for input_file in sorted(files, key=lambda f: Path(f).stem):
+            for _ in DedupFilter(load_tweets(input_file)['tweets'], index, Path(input_file).stem):
+                pass
+    finally:
+        index.close()
+
+
+def analyze_file(input_file, use_dedup=True, fetch_urls=False):
+    """Parse a collection file and extract its topics (process pool worker)"""
+    start = time.perf_counter()
+    date_part, date_str = parse_date_from_filename(input_file)
+
+    topics = load_unique_topics(input_file, use_dedup, fetch_urls)
+
+    return {
+        'file': Path(input_file),
+        'date_part': date_part,
+        'date_str': date_str,
+        'topics': topics,
+        'parse_time': time.perf_counter() - start
+    }
+
+
+async def generate_batch_reports(analyses, reports_dir):
+    """Run report generation for analyzed files concurrently
+
+    In-flight Claude requests are bounded by the shared client's semaphore.
+    """
+
+    async def generate_one(analysis):
+        # Reports overlap, so each is recorded as a span once it finishes
+        start = time.perf_counter()
+        try:
+            report = await generate_report_for_topics(analysis['topics'], analysis['date_str'])
+            if not report:
+                report = generate_fallback_report(analysis['topics'], analysis['date_str'])
+                analysis['status'] = 'fallback'
+            else:
+                analysis['status'] = 'ok'
+            analysis['output'] = save_report(report, analysis['date_part'], reports_dir)
+        except Exception as e:
+            analysis['status'] = f"error: {e}"
+        analysis['report_time'] = time.perf_counter() - start
+        METRICS.record_span('report', analysis['report_time'], file=analysis['file'].name,
+                            status=analysis['status'])
+
+    await asyncio.gather(*(generate_one(a) for a in analyses))
+
+
+def print_timing_table(results):
+    """Print per-file timings for a batch run"""
+    print("\n" + "=" * 78)
+    print(f"{'File':<32} {'Topics':>6} {'Parse':>8} {'Report':>8}  Status")
+    print("-" * 78)
+    for result in results:
+        print(f"{result['file'].name[:32]:<32} {len(result.get('topics') or []):>6} "
+              f"{result.get('parse_time', 0):>7.2f}s {result.get('report_time', 0):>7.2f}s  "
+              f"{result['status']}")
+    print("=" * 78)
+
+
+def run_batch(args, reports_dir):
+    """Generate reports for every file matched by --batch"""
+    files = find_batch_files(args.batch, args.date_from, args.date_to)
+    if not files:
+        print(f"No tweet data files matched: {args.batch}")
+        sys.exit(1)
+
+    print(f"\nBatch mode: {len(files)} files, {args.workers} parse workers, "
+          f"{args.concurrency} concurrent reports")
+
+    if not args.no_dedup:
+        print("Indexing tweets for duplicate removal (oldest file first)...")
+        index_collections(files)
+
+    # Parse and extract topics in a process pool
+    from concurrent.futures import ProcessPoolExecutor
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [(input_file, pool.submit(analyze_file, input_file, not args.no_dedup,
+                                            args.fetch_urls))
+                   for input_file in files]
+        for input_file, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({'file': input_file, 'status': f"error: {e}"})
+                continue
+            # Worker processes keep their own counters; record their results here
+            METRICS.record_span('topics', results[-1]['parse_time'], file=Path(input_file).name)
+            METRICS.inc('topics_total', len(results[-1]['topics']))
+
+    pending = []
+    for result in results:
+        if 'status' in result:
+            continue
+        if not result['topics']:
+            result['status'] = 'no topics'
+        else:
+            pending.append(result)
+
+    # Claude calls run concurrently, bounded by --concurrency
+    get_claude_client(max_concurrency=args.concurrency)
+    run_async(generate_batch_reports(pending, reports_dir))
+
+    print_timing_table(results)
+    print_run_stats()
+    failed = sum(1 for r in results if r['status'].startswith('error'))
+    print(f"\nProcessed {len(results)} files ({failed} failed)")
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="AI News Report Generator - Naru Sensei Edition")
+    parser.add_argument('input_file', nargs='?',
+                        help="Tweet JSON file (default: newest in data/tweets/)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always call Claude; do not read or write the response cache")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Keep tweets already seen in other collection files")
+    parser.add_argument('--fetch-urls', action='store_true',
+                        help="Fetch linked articles for tweets collected without them")
+    parser.add_argument('--token-budget', type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help=f"Prompt token budget for topics (default: {DEFAULT_TOKEN_BUDGET})")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream the report into the file as it is generated; resume a "
+                             "partial report left by a failed run (single-file mode)")
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help="Generate reports for every matching collection file")
+    parser.add_argument('--from', dest='date_from', metavar='YYYYMMDD',
+                        help="Batch mode: skip files dated before this day")
+    parser.add_argument('--to', dest='date_to', metavar='YYYYMMDD',
+                        help="Batch mode: skip files dated after this day")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Batch mode: processes for parsing and topic extraction")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Batch mode: maximum concurrent report generations (default: 4)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile each stage with cProfile and print the hottest functions")
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP,
+                        help=f"Profile: functions shown per stage (default: {DEFAULT_TOP})")
+    parser.add_argument('--profile-dir',
+                        help="Profile: directory for .pstats files (default: logs/profiles/<run>)")
+    return parser.parse_args(argv)
+
+
+def print_run_stats():
+    """Print API and cache counters for this run"""
+    get_claude_client().print_stats()
+    if _llm_cache:
+        _llm_cache.print_stats()
+
+
 def main():
     """Main function"""
+    global USE_CACHE, TOKEN_BUDGET
+    args = parse_args()
+    USE_CACHE = not args.no_cache
+    TOKEN_BUDGET = args.token_budget
+
+    with profile_stages(args.profile, args.profile_dir, 'generate_report', args.profile_top):
+        run_reports(args)
+
+
+def run_reports(args):
+    """Generate the report for one file, or for every file in batch mode"""
     print("=" * 60)
     print("AI News Report Generator - Naru Sensei Edition")
     print("=" * 60)
@@ -251,12 +654,17 @@ def main():
     reports_dir = project_root / 'reports'
     reports_dir.mkdir(exist_ok=True)
 
+    if args.batch:
+        with METRICS.run('generate_report_batch', pattern=args.batch):
+            run_batch(args, reports_dir)
+        return
+
     # Find the most recent tweet file
-    if len(sys.argv) > 1:
-        input_file = Path(sys.argv[1])
+    if args.input_file:
+        input_file = Path(args.input_file)
     else:
         # Find most recent file
-        json_files = sorted(data_dir.glob('*.json'), reverse=True)
+        json_files = find_collection_files(data_dir)
         if not json_files:
             print("No tweet data files found in data/tweets/")
             sys.exit(1)
@@ -264,32 +672,38 @@ def main():
 
     print(f"\nInput file: {input_file}")
 
-    # Extract date from filename
-    filename = input_file.stem  # e.g., "20260114_goromian"
-    date_part = filename.split('_')[0]  # "20260114"
-    date_str = f"{date_part[:4]}-{date_part[4:6]}-{date_part[6:8]}"  # "2026-01-14"
-
-    # Load and analyze data
-    tweets_data = load_tweet_data(input_file)
-    topics = extract_ai_topics(tweets_data)
-
-    if not topics:
-        print("\nNo AI-related topics found!")
-        sys.exit(0)
-
-    # Generate report
-    prompt = prepare_analysis_prompt(topics, date_str)
-
-    # Try to generate with Claude API
-    report = generate_report_with_claude(prompt)
-
-    # Fallback to simple report if API fails
-    if not report:
-        print("\nGenerating fallback report...")
-        report = generate_fallback_report(topics, date_str)
-
-    # Save report
-    output_path = save_report(report, date_part, reports_dir)
+    with METRICS.run('generate_report', file=input_file.name):
+        # Extract date from filename, e.g. "20260114_goromian" -> "2026-01-14"
+        date_part, date_str = parse_date_from_filename(input_file)
+
+        # Load and analyze data
+        with METRICS.span('topics') as span:
+            topics = load_unique_topics(input_file, not args.no_dedup, args.fetch_urls)
+            span['topics'] = len(topics)
+
+        if not topics:
+            print("\nNo AI-related topics found!")
+            sys.exit(0)
+
+        # Try to generate with Claude API (map-reduce if over the token budget)
+        report_file = PartialReport(report_path(date_part, reports_dir)) if args.stream else None
+        with METRICS.span('report'):
+            report = run_async(generate_report_for_topics(topics, date_str, report_file))
+
+        # Fallback to simple report if API fails
+        if not report:
+            print("\nGenerating fallback report...")
+            with METRICS.span('fallback'):
+                report = generate_fallback_report(topics, date_str)
+
+        # Save report (a streamed report is already in place)
+        if report_file and report_file.complete:
+            output_path = report_file.path
+            print(f"\nReport saved to: {output_path}")
+        else:
+            with METRICS.span('save'):
+                output_path = save_report(report, date_part, reports_dir)
+        print_run_stats()
 
     print("\n" + "=" * 60)
     print("Report generation complete!")
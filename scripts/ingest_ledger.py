@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingest Ledger
+Persistent per-file watermarks for incremental Neo4j ingestion
+
+For every collection file in data/tweets/ the ledger records its content
+hash, size, mtime and how many tweets have been ingested. The ledger is
+rewritten atomically after every committed batch, so an interrupted run
+resumes where it stopped. Writers hold a lock file and re-read the ledger
+before changing it, so a CLI run and the scheduler keep each other's
+watermarks.
+
+Usage:
+  python scripts/ingest_ledger.py           Show pending files
+  python scripts/ingest_ledger.py --reset   Forget all watermarks
+"""
+
+import hashlib
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_DATA_DIR = PROJECT_ROOT / 'data' / 'tweets'
+DEFAULT_LEDGER_PATH = PROJECT_ROOT / 'data' / 'ingest_ledger.json'
+
+COLLECTION_SUFFIXES = ('.json', '.jsonl')
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path, prefix_size=None):
+    """Return (full sha256, sha256 of the first prefix_size bytes) in one read"""
+    full = hashlib.sha256()
+    prefix_digest = None
+    read = 0
+
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            if prefix_size is not None and prefix_digest is None and read + len(chunk) >= prefix_size:
+                head = full.copy()
+                head.update(chunk[:prefix_size - read])
+                prefix_digest = head.hexdigest()
+            full.update(chunk)
+            read += len(chunk)
+
+    return full.hexdigest(), prefix_digest
+
+
+class PendingFile:
+    """A collection file with tweets not yet ingested"""
+
+    def __init__(self, path, start, sha256, size, mtime):
+        self.path = path
+        self.start = start
+        self.sha256 = sha256
+        self.size = size
+        self.mtime = mtime
+
+    def __repr__(self):
+        return f"PendingFile({self.path.name}, start={self.start})"
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on path (created if missing) for the block"""
+    with open(path, 'a+b') as f:
+        if sys.platform.startswith('win'):
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    # Retries for about 10 seconds before raising
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class IngestLedger:
+    """JSON ledger of per-file ingest watermarks"""
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        self.path = Path(path)
+        self.entries = self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+
+    def save(self):
+        """Write the ledger atomically (temp file + rename)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.entries}, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def update(self):
+        """Change entries under the lock, starting from the ledger as it is on disk
+
+        Other processes may have recorded files since this ledger was read;
+        their entries are kept.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path.with_name(self.path.name + '.lock')):
+            self.entries = self.load()
+            yield self.entries
+            self.save()
+
+    def check(self, path, stat=None):
+        """Return a PendingFile for path, or None if it is fully ingested
+
+        Unchanged size and mtime skip hashing entirely. If the content changed
+        but the old content is still a prefix (an appended JSON Lines file),
+        ingestion resumes from the watermark; otherwise it restarts at 0.
+        """
+        path = Path(path)
+        stat = stat or path.stat()
+        entry = self.entries.get(path.name)
+
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            if entry['complete']:
+                return None
+            return PendingFile(path, entry['position'], entry['sha256'], stat.st_size, stat.st_mtime)
+
+        prefix_size = entry['size'] if entry and entry['size'] <= stat.st_size else None
+        sha256, prefix_sha256 = hash_file(path, prefix_size)
+
+        start = 0
+        if entry and sha256 == entry['sha256']:
+            # Touched but not modified
+            if entry['complete']:
+                with self.update() as entries:
+                    current = entries.get(path.name)
+                    if current and current['sha256'] == sha256:
+                        current['mtime'] = stat.st_mtime
+                return None
+            start = entry['position']
+        elif entry and prefix_sha256 == entry['sha256']:
+            start = entry['position']
+
+        return PendingFile(path, start, sha256, stat.st_size, stat.st_mtime)
+
+    def fingerprint(self, path):
+        """Return a PendingFile that re-ingests path from the start"""
+        path = Path(path)
+        stat = path.stat()
+        sha256, _ = hash_file(path)
+        return PendingFile(path, 0, sha256, stat.st_size, stat.st_mtime)
+
+    def is_current(self, path, stat=None):
+        """True if path is fully ingested with the recorded size and mtime (no hashing)"""
+        stat = stat or Path(path).stat()
+        entry = self.entries.get(Path(path).name)
+        return bool(entry and entry['complete'] and entry['size'] == stat.st_size
+                    and entry['mtime'] == stat.st_mtime)
+
+    def scan(self, data_dir=DEFAULT_DATA_DIR, quick=False):
+        """Return pending collection files in one pass over data_dir, oldest first
+
+        quick=True only compares size and mtime: nothing is hashed, and the
+        returned files carry no hash or resume position (for reporting only).
+        """
+        pending = []
+        with os.scandir(data_dir) as it:
+            for entry in it:
+                if not entry.is_file() or not entry.name.endswith(COLLECTION_SUFFIXES):
+                    continue
+                stat = entry.stat()
+                if quick:
+                    if not self.is_current(entry.path, stat):
+                        pending.append(PendingFile(Path(entry.path), 0, None, stat.st_size,
+                                                   stat.st_mtime))
+                    continue
+                pending_file = self.check(entry.path, stat)
+                if pending_file:
+                    pending.append(pending_file)
+        return sorted(pending, key=lambda p: p.path.name)
+
+    def record(self, pending_file, position, last_index=None, complete=False):
+        """Advance the watermark for a file and persist it"""
+        with self.update() as entries:
+            entries[pending_file.path.name] = {
+                'sha256': pending_file.sha256,
+                'size': pending_file.size,
+                'mtime': pending_file.mtime,
+                'position': position,
+                'last_index': last_index,
+                'complete': complete,
+                'updated_at': datetime.now().isoformat()
+            }
+
+    def reset(self):
+        with self.update() as entries:
+            entries.clear()
+
+
+def main():
+    """Main function"""
+    ledger = IngestLedger()
+
+    if '--reset' in sys.argv:
+        ledger.reset()
+        print(f"Reset {ledger.path}")
+        return
+
+    pending = ledger.scan()
+    print(f"Ledger: {ledger.path} ({len(ledger.entries)} files recorded)")
+    if not pending:
+        print("All collection files are ingested")
+    for pending_file in pending:
+        print(f"  {pending_file.path.name}: resume at tweet {pending_file.start}")
+
+
+if __name__ == '__main__':
+    main()
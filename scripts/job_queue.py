@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Job Queue
+Persistent queue of enrich, report and ingest jobs per collection file,
+processed by any number of worker processes
+
+Jobs live in data/job_queue.sqlite3. A worker claims a job by taking a
+time-limited lease and renews it while the job runs; if the worker dies,
+the lease expires and another worker picks the job up. Failed jobs are
+retried with exponential backoff, and the number of jobs of each type
+running at once is capped across all workers. Workers on several hosts can
+share the queue on a common data volume (it must support file locking, and
+the hosts' clocks must agree to within a few seconds).
+
+Usage:
+  python scripts/job_queue.py enqueue data/tweets/20260114_goromian.json
+  python scripts/job_queue.py enqueue FILE --types report,ingest --fetch-urls
+  python scripts/job_queue.py worker                  Run jobs until stopped
+  python scripts/job_queue.py worker --once           Exit when the queue is empty
+  python scripts/job_queue.py status                  Queue depth and job latency
+"""
+
+import argparse
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from metrics import METRICS
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+SCRIPTS_DIR = Path(__file__).parent
+DEFAULT_QUEUE_PATH = Path(os.getenv('JOB_QUEUE_PATH') or SCRIPTS_DIR.parent / 'data' / 'job_queue.sqlite3')
+
+# Job types in the order they run for one file
+JOB_TYPES = ('enrich', 'report', 'ingest')
+
+# Jobs of each type running at once, across all workers. Ingest is serialised
+# because every ingest rewrites the shared ingest ledger.
+DEFAULT_LIMITS = {
+    'enrich': int(os.getenv('JOB_LIMIT_ENRICH', '2')),
+    'report': int(os.getenv('JOB_LIMIT_REPORT', '2')),
+    'ingest': int(os.getenv('JOB_LIMIT_INGEST', '1')),
+}
+# Seconds a job may run before its process is killed
+DEFAULT_TIMEOUTS = {
+    'enrich': float(os.getenv('JOB_TIMEOUT_ENRICH', '600')),
+    'report': float(os.getenv('JOB_TIMEOUT_REPORT', '1800')),
+    'ingest': float(os.getenv('JOB_TIMEOUT_INGEST', '1800')),
+}
+LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+RETRY_BASE_SECONDS = float(os.getenv('JOB_RETRY_BASE_SECONDS', '30'))
+RETRY_MAX_SECONDS = float(os.getenv('JOB_RETRY_MAX_SECONDS', '3600'))
+# Finished jobs older than this are deleted
+KEEP_FINISHED_DAYS = float(os.getenv('JOB_KEEP_DAYS', '30'))
+POLL_SECONDS = 5.0
+# Seconds a job process gets to exit after SIGTERM before it is killed
+TERMINATE_GRACE_SECONDS = 10.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    file TEXT NOT NULL,
+    depends_on INTEGER,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_type_file ON jobs (type, file);
+"""
+
+# A job can be claimed when it is queued and due, or running under an expired lease,
+# and the job it depends on has finished (a failed enrich does not block the report)
+CLAIMABLE = """
+    ((j.status = 'queued' AND j.available_at <= :now)
+     OR (j.status = 'running' AND j.lease_expires < :now))
+    AND (j.depends_on IS NULL OR EXISTS (
+        SELECT 1 FROM jobs d WHERE d.id = j.depends_on AND d.status IN ('done', 'failed')))
+"""
+
+COLUMNS = ('id', 'type', 'file', 'depends_on', 'status', 'attempts', 'max_attempts',
+           'available_at', 'lease_owner', 'lease_expires', 'created_at', 'started_at',
+           'finished_at', 'last_error')
+
+
+class Job:
+    """One row of the jobs table"""
+
+    def __init__(self, row):
+        for name, value in zip(COLUMNS, row):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.type}, {Path(self.file).name}, {self.status})"
+
+
+def worker_id():
+    """host:pid, unique across the workers sharing a queue"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def format_seconds(seconds):
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+class JobQueue:
+    """SQLite-backed job queue with leases"""
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, limits=None, lease_seconds=LEASE_SECONDS,
+                 max_attempts=MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Rollback journal rather than WAL: WAL needs shared memory, which
+        # processes on different hosts do not have
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+
+    def transaction(self):
+        """BEGIN IMMEDIATE: take the write lock up front so claims never race"""
+        return _Transaction(self.conn)
+
+    def _job(self, job_id):
+        row = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(row) if row else None
+
+    def enqueue(self, job_type, file, depends_on=None):
+        """Add a job; returns the id of the new job, or of the same job already waiting"""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+        file = str(Path(file).resolve())
+        now = time.time()
+        with self.transaction():
+            # Overlap protection: one active job per type and file
+            row = self.conn.execute(
+                "SELECT id FROM jobs WHERE type = ? AND file = ? AND status IN ('queued', 'running')",
+                (job_type, file)).fetchone()
+            if row:
+                return row[0]
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (type, file, depends_on, status, max_attempts, "
+                "available_at, created_at) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_type, file, depends_on, self.max_attempts, now, now))
+        METRICS.inc('jobs_enqueued_total', type=job_type)
+        return cursor.lastrowid
+
+    def enqueue_file(self, file, types=JOB_TYPES):
+        """Queue jobs for one collection file; report and ingest wait for enrich"""
+        ids = {}
+        if 'enrich' in types:
+            ids['enrich'] = self.enqueue('enrich', file)
+        for job_type in ('report', 'ingest'):
+            if job_type in types:
+                ids[job_type] = self.enqueue(job_type, file, ids.get('enrich'))
+        return ids
+
+    def claim(self, owner, types=JOB_TYPES):
+        """Lease the oldest claimable job whose type is under its limit, or return None"""
+        now = time.time()
+        with self.transaction():
+            running = dict(self.conn.execute(
+                "SELECT type, COUNT(*) FROM jobs WHERE status = 'running' AND lease_expires >= ? "
+                "GROUP BY type", (now,)).fetchall())
+            open_types = [t for t in types if running.get(t, 0) < self.limits.get(t, 1)]
+            if not open_types:
+                return None
+
+            # A job whose worker keeps dying (crash, OOM kill) must not be leased forever
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL, last_error = 'lease expired' "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now))
+
+            params = {'now': now}
+            params.update((f"type{i}", t) for i, t in enumerate(open_types))
+            type_names = ', '.join(f":type{i}" for i in range(len(open_types)))
+            row = self.conn.execute(
+                f"SELECT j.id FROM jobs j WHERE {CLAIMABLE} AND j.type IN ({type_names}) "
+                "ORDER BY j.available_at, j.id LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (owner, now + self.lease_seconds, now, row[0]))
+            return self._job(row[0])
+
+    def heartbeat(self, job, owner):
+        """Extend the lease; returns False if another worker has taken the job over"""
+        with self.transaction():
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, job.id, owner))
+        return cursor.rowcount == 1
+
+    def complete(self, job, owner):
+        with self.transaction():
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL, last_error = NULL "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time(), job.id, owner))
+        return cursor.rowcount == 1
+
+    def retry_delay(self, attempts):
+        """Full-jitter exponential backoff before the next attempt"""
+        return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** (attempts - 1))))
+
+    def fail(self, job, owner, error):
+        """Schedule a retry, or mark the job failed once it is out of attempts
+
+        Returns the retry delay in seconds, or None if the job failed for good.
+        """
+        now = time.time()
+        delay = None if job.attempts >= job.max_attempts else self.retry_delay(job.attempts)
+        with self.transaction():
+            if delay is None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, lease_owner = NULL, "
+                    "lease_expires = NULL, last_error = ? "
+                    "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                    (now, error, job.id, owner))
+            else:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ?, lease_owner = NULL, "
+                    "lease_expires = NULL, last_error = ? "
+                    "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                    (now + delay, error, job.id, owner))
+        return delay
+
+    def release(self, job, owner):
+        """Give a job back without counting the attempt (worker shutting down)"""
+        with self.transaction():
+            self.conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = attempts - 1, available_at = ?, "
+                "lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time(), job.id, owner))
+
+    def prune(self, days=KEEP_FINISHED_DAYS):
+        """Delete jobs that finished more than days ago"""
+        with self.transaction():
+            cursor = self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - days * 86400,))
+        return cursor.rowcount
+
+    def status(self):
+        """Queue depth, running jobs and latencies per job type"""
+        now = time.time()
+        summary = {}
+        for job_type in JOB_TYPES:
+            counts = dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE type = ? GROUP BY status",
+                (job_type,)).fetchall())
+            oldest = self.conn.execute(
+                "SELECT MIN(created_at) FROM jobs WHERE type = ? AND status = 'queued'",
+                (job_type,)).fetchone()[0]
+            finished = self.conn.execute(
+                "SELECT created_at, started_at, finished_at FROM jobs "
+                "WHERE type = ? AND status = 'done' AND finished_at >= ?",
+                (job_type, now - 7 * 86400)).fetchall()
+            waits = [started - created for created, started, _ in finished]
+            totals = [done - created for created, _, done in finished]
+            summary[job_type] = {
+                'queued': counts.get('queued', 0),
+                'running': counts.get('running', 0),
+                'done': counts.get('done', 0),
+                'failed': counts.get('failed', 0),
+                'limit': self.limits.get(job_type, 1),
+                'oldest_queued': now - oldest if oldest else None,
+                'wait_p50': percentile(waits, 50),
+                'total_p50': percentile(totals, 50),
+                'total_p95': percentile(totals, 95),
+                'finished_7d': len(finished),
+            }
+        return summary
+
+    def jobs(self, statuses):
+        placeholders = ', '.join('?' for _ in statuses)
+        rows = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE status IN ({placeholders}) "
+            "ORDER BY available_at, id", tuple(statuses)).fetchall()
+        return [Job(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
+
+
+def error_summary(error):
+    """The most telling line of a job's output: the last one mentioning an error"""
+    lines = [line.strip() for line in error.splitlines() if line.strip()]
+    for line in reversed(lines):
+        if 'error' in line.lower() or 'exception' in line.lower():
+            return line
+    return lines[-1] if lines else ''
+
+
+def default_types(fetch_urls=False):
+    """Jobs to queue for a new collection file"""
+    types = ['enrich'] if fetch_urls else []
+    types.append('report')
+    # Without a configured server an ingest job could only fail
+    if os.getenv('NEO4J_URI'):
+        types.append('ingest')
+    return types
+
+
+def job_command(job):
+    """Command line that runs a job"""
+    file = job.file
+    if job.type == 'enrich':
+        command = [SCRIPTS_DIR / 'url_fetcher.py', file]
+    elif job.type == 'report':
+        # --stream: a retried report continues from the partial file of the failed attempt
+        command = [SCRIPTS_DIR / 'generate_report.py', file, '--stream']
+    else:
+        command = [SCRIPTS_DIR / 'save_to_neo4j.py', file, '--incremental']
+    return [sys.executable] + [str(part) for part in command]
+
+
+def stop_process(proc):
+    """Terminate a job process, killing it if it does not exit in time"""
+    proc.terminate()
+    try:
+        proc.wait(TERMINATE_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+class Worker:
+    """Claims jobs and runs them as subprocesses, renewing the lease meanwhile"""
+
+    def __init__(self, queue_path=DEFAULT_QUEUE_PATH, types=JOB_TYPES, timeouts=None):
+        self.queue_path = queue_path
+        self.queue = JobQueue(queue_path)
+        self.types = types
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.owner = worker_id()
+
+    def log(self, message):
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+    def keep_lease(self, job, proc, stop, lost):
+        """Renew the lease every third of its length until stop is set
+
+        If the lease is lost, or cannot be renewed before it expires, the job
+        process is stopped, so the job never runs twice at once; lost is set.
+        """
+        # SQLite connections are per thread
+        queue = JobQueue(self.queue_path, lease_seconds=self.queue.lease_seconds)
+        expires = job.lease_expires
+        try:
+            while not stop.wait(queue.lease_seconds / 3):
+                started = time.time()
+                try:
+                    renewed = queue.heartbeat(job, self.owner)
+                except sqlite3.Error as e:
+                    # Locked or unreachable queue: try again on the next tick
+                    if time.time() < expires:
+                        self.log(f"Could not renew the lease on job {job.id}: {e}")
+                        continue
+                    renewed = False
+                if not renewed:
+                    lost.set()
+                    self.log(f"Lost the lease on job {job.id}; stopping it")
+                    stop_process(proc)
+                    return
+                expires = started + queue.lease_seconds
+        finally:
+            queue.close()
+
+    def run_job(self, job):
+        """Run one claimed job and record the outcome"""
+        name = Path(job.file).name
+        self.log(f"Job {job.id}: {job.type} {name} (attempt {job.attempts}/{job.max_attempts})")
+
+        stop = threading.Event()
+        lost = threading.Event()
+        error = None
+        interrupted = False
+        with METRICS.run(f"job_{job.type}", file=name, job=job.id, attempt=job.attempts):
+            proc = subprocess.Popen(job_command(job), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    text=True, encoding='utf-8', errors='replace')
+            renewer = threading.Thread(target=self.keep_lease, args=(job, proc, stop, lost),
+                                       daemon=True)
+            renewer.start()
+            try:
+                stdout, stderr = proc.communicate(timeout=self.timeouts.get(job.type))
+                if proc.returncode != 0:
+                    # The scripts print their errors to stdout; tracebacks go to stderr
+                    output = '\n'.join(part.strip() for part in (stdout, stderr) if part.strip())
+                    error = output[-2000:] or f"exit status {proc.returncode}"
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                error = f"timed out after {self.timeouts.get(job.type):.0f}s"
+            except BaseException:
+                interrupted = True
+                raise
+            finally:
+                stop.set()
+                renewer.join()
+                if proc.poll() is None:
+                    stop_process(proc)
+                if interrupted:
+                    self.queue.release(job, self.owner)
+
+        if lost.is_set():
+            # The job is no longer ours to complete or fail
+            METRICS.inc('jobs_total', type=job.type, outcome='lease_lost')
+            self.log(f"Job {job.id}: stopped after losing the lease")
+            return False
+
+        if error is None:
+            self.queue.complete(job, self.owner)
+            METRICS.inc('jobs_total', type=job.type, outcome='done')
+            self.log(f"Job {job.id}: done")
+            return True
+
+        delay = self.queue.fail(job, self.owner, error)
+        last_line = error_summary(error)
+        if delay is None:
+            METRICS.inc('jobs_total', type=job.type, outcome='failed')
+            self.log(f"Job {job.id}: failed after {job.attempts} attempts: {last_line}")
+        else:
+            METRICS.inc('jobs_total', type=job.type, outcome='retry')
+            self.log(f"Job {job.id}: error ({last_line}), retrying in {format_seconds(delay)}")
+        return False
+
+    def run(self, once=False):
+        """Process jobs until interrupted (or, with once, until none is claimable)"""
+        self.log(f"Worker {self.owner} started (types: {', '.join(self.types)})")
+        try:
+            while True:
+                job = self.queue.claim(self.owner, self.types)
+                if job is not None:
+                    self.run_job(job)
+                    continue
+                if once:
+                    break
+                time.sleep(POLL_SECONDS)
+        except KeyboardInterrupt:
+            self.log("Worker stopped by user")
+        finally:
+            self.queue.close()
+
+
+def print_status(queue):
+    """Print queue depth, running jobs and latencies"""
+    summary = queue.status()
+    print(f"Queue: {queue.path}")
+    print(f"{'type':<8} {'queued':>7} {'running':>8} {'done':>6} {'failed':>7} "
+          f"{'oldest':>7} {'wait p50':>9} {'total p50':>10} {'p95':>6}")
+    for job_type, row in summary.items():
+        oldest = format_seconds(row['oldest_queued']) if row['oldest_queued'] else '-'
+        latency = [format_seconds(row[key]) if row['finished_7d'] else '-'
+                   for key in ('wait_p50', 'total_p50', 'total_p95')]
+        running = f"{row['running']}/{row['limit']}"
+        print(f"{job_type:<8} {row['queued']:>7} {running:>8} {row['done']:>6} {row['failed']:>7} "
+              f"{oldest:>7} {latency[0]:>9} {latency[1]:>10} {latency[2]:>6}")
+    print("(latency: jobs finished in the last 7 days; total = enqueue to finish)")
+
+    now = time.time()
+    for job in queue.jobs(('running', 'queued', 'failed')):
+        name = Path(job.file).name
+        if job.status == 'running':
+            left = job.lease_expires - now
+            state = f"running on {job.lease_owner}, lease {'expired' if left < 0 else format_seconds(left)}"
+        elif job.status == 'queued':
+            state = f"queued, attempt {job.attempts + 1}/{job.max_attempts}"
+            if job.available_at > now:
+                state += f" in {format_seconds(job.available_at - now)}"
+        else:
+            state = f"failed after {job.attempts} attempts"
+        print(f"  #{job.id} {job.type} {name}: {state}")
+        if job.last_error and job.status != 'running':
+            print(f"      {error_summary(job.last_error)[:120]}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Persistent job queue for report, ingest and enrich jobs")
+    parser.add_argument('command', choices=('enqueue', 'worker', 'status', 'prune'))
+    parser.add_argument('files', nargs='*', help="enqueue: collection files")
+    parser.add_argument('--types',
+                        help="enqueue: job types to add (default: report, plus ingest when "
+                             "NEO4J_URI is set); worker: job types to run (default: all)")
+    parser.add_argument('--fetch-urls', action='store_true',
+                        help="enqueue: also add an enrich job that runs first")
+    parser.add_argument('--once', action='store_true',
+                        help="worker: exit when no job is claimable")
+    parser.add_argument('--queue', default=str(DEFAULT_QUEUE_PATH), help="Queue database")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main function"""
+    args = parse_args(argv)
+    types = [t.strip() for t in (args.types or '').split(',') if t.strip()]
+    unknown = [t for t in types if t not in JOB_TYPES]
+    if unknown:
+        print(f"Unknown job types: {', '.join(unknown)} (choose from {', '.join(JOB_TYPES)})")
+        sys.exit(1)
+
+    if args.command == 'worker':
+        Worker(args.queue, types or JOB_TYPES).run(once=args.once)
+        return
+
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == 'enqueue':
+            if not args.files:
+                print("Usage: python scripts/job_queue.py enqueue FILE [FILE ...]")
+                sys.exit(1)
+            types = types or default_types(args.fetch_urls)
+            if args.fetch_urls and 'enrich' not in types:
+                types.insert(0, 'enrich')
+            for file in args.files:
+                ids = queue.enqueue_file(file, types)
+                print(f"{Path(file).name}: " + ', '.join(f"{t} #{i}" for t, i in ids.items()))
+            queue.prune()
+        elif args.command == 'prune':
+            print(f"Deleted {queue.prune()} finished jobs")
+        else:
+            print_status(queue)
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()
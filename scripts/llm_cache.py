@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM Response Cache
+Content-addressed on-disk cache for Claude responses, keyed by a hash of
+model, system prompt, temperature and prompt text
+
+Stored in SQLite with age-based expiry and size-based LRU eviction.
+
+Usage:
+  python scripts/llm_cache.py stats
+  python scripts/llm_cache.py clear
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / 'data' / 'cache' / 'llm_cache.sqlite3'
+DEFAULT_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_MB', '200')) * 1024 * 1024
+DEFAULT_MAX_AGE = float(os.getenv('LLM_CACHE_MAX_AGE_DAYS', '30')) * 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def cache_key(model, system, temperature, prompt):
+    """Return the content address for a request"""
+    payload = json.dumps([model, system, temperature, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response cache"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age=DEFAULT_MAX_AGE):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+
+    def get(self, key):
+        """Return the cached response for key, or None"""
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or now - row[1] > self.max_age:
+            self.misses += 1
+            return None
+
+        with self.conn:
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, model, response):
+        """Store a response and evict old or excess entries"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode('utf-8')), now, now)
+            )
+        self.stores += 1
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used until under max_bytes"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age,))
+            self.evictions += cursor.rowcount
+
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            for key, size in self.conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM responses")
+
+    def summary(self):
+        count, size = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {'entries': count, 'bytes': size}
+
+    def print_stats(self):
+        """Print hit/miss counters for this run"""
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        summary = self.summary()
+        print(f"\nLLM cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+              f"{self.stores} stored, {self.evictions} evicted")
+        print(f"  {summary['entries']} entries, {summary['bytes'] / 1024:.1f} KB in {self.path}")
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    """Main function"""
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    cache = LLMCache()
+
+    if command == 'clear':
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    elif command == 'stats':
+        summary = cache.summary()
+        print(f"{cache.path}: {summary['entries']} entries, {summary['bytes'] / 1024:.1f} KB")
+    else:
+        print("Usage: python scripts/llm_cache.py [stats|clear]")
+        sys.exit(1)
+
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
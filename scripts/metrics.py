@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run Metrics
+Timing spans, counters and latency histograms shared by the report
+generator, the Neo4j saver and the scheduler
+
+  spans       with METRICS.span('extract'): ... times a stage, records it in
+              the stage_seconds histogram and appends it to the run log
+  counters    METRICS.inc('topics_total', 12)
+  histograms  METRICS.observe('claude_request_seconds', 3.2)
+
+While a run is active (METRICS.run('generate_report')), spans, log lines
+and a closing summary with the run's own counters and latency quantiles
+are appended to logs/metrics/YYYYMMDD.jsonl. Cumulative values are served
+in the Prometheus text format when METRICS_PORT is set.
+
+Usage:
+  python scripts/metrics.py              Summarize today's run log
+  python scripts/metrics.py 20260114     Summarize the run log for a day
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+DEFAULT_LOG_DIR = Path(__file__).parent.parent / 'logs' / 'metrics'
+LOG_DIR = Path(os.getenv('METRICS_LOG_DIR') or DEFAULT_LOG_DIR)
+RUN_LOGS_ENABLED = os.getenv('METRICS_RUN_LOG', '1') != '0'
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Upper bounds in seconds, from a fast DB batch to a long Claude call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                   30.0, 60.0, 120.0, 300.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus layout) with estimated quantiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Linear interpolation inside the bucket holding the q-th observation,
+        clamped to the observed range"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        estimate = self.max
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                break
+            seen += count
+        return min(self.max, max(self.min, estimate))
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'p50': round(self.quantile(0.50), 4),
+            'p95': round(self.quantile(0.95), 4),
+            'p99': round(self.quantile(0.99), 4)
+        }
+
+
+class Registry:
+    """Counters and histograms keyed by (name, sorted label pairs)"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, key, value):
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, key, value):
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].observe(value)
+
+    def summary(self):
+        return {
+            'counters': {series_name(key): value for key, value in sorted(self.counters.items())},
+            'histograms': {series_name(key): histogram.summary()
+                           for key, histogram in sorted(self.histograms.items())}
+        }
+
+
+def series_name(key):
+    """('claude_tokens_total', (('direction', 'input'),)) -> claude_tokens_total{direction="input"}"""
+    name, labels = key
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{label}="{value}"' for label, value in labels) + '}'
+
+
+class Metrics:
+    """Process-wide metrics: cumulative totals plus the values of the active run"""
+
+    def __init__(self, log_dir=LOG_DIR, run_logs=RUN_LOGS_ENABLED):
+        self.log_dir = Path(log_dir)
+        self.run_logs = run_logs
+        self.total = Registry()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._run = None
+        self._server = None
+        # Set by profiling.profile_stages to profile every span
+        self.profiler = None
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.total.inc(key, value)
+            if self._run:
+                self._run['registry'].inc(key, value)
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.total.observe(key, value)
+            if self._run:
+                self._run['registry'].observe(key, value)
+
+    @contextmanager
+    def span(self, name, **fields):
+        """Time a stage; fields (and keys the caller adds to the yielded dict) are logged"""
+        stack = self._local.__dict__.setdefault('spans', [])
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        record = dict(fields)
+        profiled = self.profiler.stage(name) if self.profiler else nullcontext()
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            with profiled:
+                yield record
+        except BaseException as e:
+            status = f"error: {type(e).__name__}"
+            raise
+        finally:
+            stack.pop()
+            self.record_span(name, time.perf_counter() - start, parent=parent, status=status,
+                             **record)
+
+    def record_span(self, name, seconds, parent=None, status='ok', **fields):
+        """Record a stage timed elsewhere (e.g. by a worker process or a concurrent task)"""
+        self.observe('stage_seconds', seconds, stage=name)
+        self.event('span', name=name, parent=parent, seconds=round(seconds, 4),
+                   status=status, **fields)
+
+    @contextmanager
+    def run(self, name, **fields):
+        """Collect a run's metrics and write its summary; nested runs join the outer one"""
+        with self._lock:
+            if self._run is not None:
+                nested = True
+            else:
+                nested = False
+                self._run = {
+                    'id': f"{datetime.now():%Y%m%d-%H%M%S}-{os.urandom(3).hex()}",
+                    'name': name,
+                    'pid': os.getpid(),
+                    'start': time.perf_counter(),
+                    'registry': Registry()
+                }
+        if nested:
+            yield
+            return
+
+        self.event('run_start', name=name, **fields)
+        status = 'ok'
+        try:
+            yield
+        except SystemExit as e:
+            status = 'ok' if not e.code else f"exit {e.code}"
+            raise
+        except BaseException as e:
+            status = f"error: {type(e).__name__}"
+            raise
+        finally:
+            with self._lock:
+                run, self._run = self._run, None
+            self._write(run, {
+                'type': 'run',
+                'name': name,
+                'status': status,
+                'seconds': round(time.perf_counter() - run['start'], 4),
+                **run['registry'].summary()
+            })
+
+    def event(self, event_type, **fields):
+        """Append an event to the active run's log (no-op outside a run)"""
+        run = self._run
+        if run is not None:
+            self._write(run, {'type': event_type, **fields})
+
+    def _write(self, run, record):
+        # Forked workers inherit the run but must not write to its log
+        if not self.run_logs or run['pid'] != os.getpid():
+            return
+        line = json.dumps({'ts': datetime.now().isoformat(timespec='milliseconds'),
+                           'run': run['id'], **record}, ensure_ascii=False, default=str)
+        try:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            # One append per line, so concurrent processes never interleave records
+            with open(self.log_dir / f"{datetime.now():%Y%m%d}.jsonl", 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            print(f"Warning: could not write run log: {e}")
+
+    def render_prometheus(self):
+        """Cumulative metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self.total.counters.items())
+            histograms = sorted((key, (list(h.counts), h.count, h.sum, h.buckets))
+                                for key, h in self.total.histograms.items())
+
+        typed = set()
+        for key, value in counters:
+            if key[0] not in typed:
+                lines.append(f"# TYPE {key[0]} counter")
+                typed.add(key[0])
+            lines.append(f"{series_name(key)} {value}")
+
+        for (name, labels), (counts, count, total, buckets) in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f"{series_name((name + '_bucket', labels + (('le', bound),)))} {cumulative}")
+            lines.append(f"{series_name((name + '_sum', labels))} {total}")
+            lines.append(f"{series_name((name + '_count', labels))} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=METRICS_PORT):
+        """Serve /metrics from a background thread; returns the bound port or None"""
+        if not port or self._server is not None:
+            return self._server.server_address[1] if self._server else None
+
+        # http.server pulls in email/html parsing; only load it when serving
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('', port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+METRICS = Metrics()
+
+
+def read_run_log(path):
+    """Yield the records of a JSON-lines run log"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    """Main function"""
+    day = sys.argv[1] if len(sys.argv) > 1 else f"{datetime.now():%Y%m%d}"
+    path = LOG_DIR / f"{day}.jsonl"
+    if not path.exists():
+        print(f"No run log at {path}")
+        return
+
+    for record in read_run_log(path):
+        if record['type'] != 'run':
+            continue
+        print(f"{record['ts'][:19]}  {record['name']:<16} {record['seconds']:8.2f}s  {record['status']}")
+        for name, value in record['counters'].items():
+            print(f"    {name} = {value}")
+        for name, histogram in record['histograms'].items():
+            print(f"    {name}: n={histogram['count']} p50={histogram['p50']:.3f}s "
+                  f"p95={histogram['p95']:.3f}s p99={histogram['p99']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Neo4j Connection Manager
+Owns one long-lived Neo4j driver so that a long-running process (the
+scheduler's in-process mode) pays for TLS, connection setup and routing
+discovery once instead of on every run
+
+Sessions are reused within a thread: nested connection.session() blocks
+share the outer session, so a whole ingest run uses a single session.
+
+Usage:
+  python scripts/neo4j_connection.py   Check connectivity and show pool settings
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Configuration
+NEO4J_URI = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
+NEO4J_USER = os.getenv('NEO4J_USER', 'neo4j')
+NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD', 'password')
+
+# Pool settings (the scheduler needs a handful of connections, not the driver default of 100)
+DEFAULT_POOL_SIZE = int(os.getenv('NEO4J_MAX_POOL_SIZE', '10'))
+# Seconds to wait for a free pooled connection before failing
+DEFAULT_ACQUISITION_TIMEOUT = float(os.getenv('NEO4J_ACQUISITION_TIMEOUT', '30'))
+# Connections idle longer than this are pinged before reuse
+DEFAULT_LIVENESS_CHECK = float(os.getenv('NEO4J_LIVENESS_CHECK', '60'))
+# Connections older than this are closed and replaced
+DEFAULT_MAX_LIFETIME = float(os.getenv('NEO4J_MAX_CONNECTION_LIFETIME', '3600'))
+
+
+def neo4j_available():
+    """True if the neo4j package is installed (without importing it)"""
+    return importlib.util.find_spec('neo4j') is not None
+
+
+class PoolMetrics:
+    """Session and pool usage counters for one connection manager"""
+
+    def __init__(self, pool_size):
+        self.pool_size = pool_size
+        self.sessions_opened = 0
+        self.sessions_reused = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.busy_seconds = 0.0
+        self.started = time.monotonic()
+
+    def summary(self):
+        uptime = time.monotonic() - self.started
+        return {
+            'pool_size': self.pool_size,
+            'sessions_opened': self.sessions_opened,
+            'sessions_reused': self.sessions_reused,
+            'in_use': self.in_use,
+            'peak_in_use': self.peak_in_use,
+            'peak_utilisation': self.peak_in_use / self.pool_size if self.pool_size else 0.0,
+            'busy_seconds': self.busy_seconds,
+            'uptime_seconds': uptime
+        }
+
+
+class Neo4jConnection:
+    """Long-lived Neo4j driver with a bounded connection pool"""
+
+    def __init__(self, uri=NEO4J_URI, user=NEO4J_USER, password=NEO4J_PASSWORD, driver=None,
+                 pool_size=DEFAULT_POOL_SIZE, acquisition_timeout=DEFAULT_ACQUISITION_TIMEOUT,
+                 liveness_check=DEFAULT_LIVENESS_CHECK, max_lifetime=DEFAULT_MAX_LIFETIME):
+        self.uri = uri
+        self.metrics = PoolMetrics(pool_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        if driver is not None:
+            # Injected driver (e.g. an in-process fake for benchmarks)
+            self.driver = driver
+            return
+
+        # Imported here so that --help and runs without Neo4j skip the driver package
+        try:
+            from neo4j import GraphDatabase
+        except ImportError:
+            raise ImportError("neo4j package is required")
+
+        self.driver = GraphDatabase.driver(
+            uri,
+            auth=(user, password),
+            max_connection_pool_size=pool_size,
+            connection_acquisition_timeout=acquisition_timeout,
+            liveness_check_timeout=liveness_check,
+            max_connection_lifetime=max_lifetime
+        )
+        print(f"Connected to Neo4j at {uri} (pool size {pool_size})")
+
+    @contextmanager
+    def session(self):
+        """Session for the calling thread; nested calls reuse the open session"""
+        current = getattr(self._local, 'session', None)
+        if current is not None:
+            with self._lock:
+                self.metrics.sessions_reused += 1
+            yield current
+            return
+
+        with self._lock:
+            self.metrics.sessions_opened += 1
+            self.metrics.in_use += 1
+            self.metrics.peak_in_use = max(self.metrics.peak_in_use, self.metrics.in_use)
+
+        start = time.perf_counter()
+        session = self.driver.session()
+        self._local.session = session
+        try:
+            yield session
+        finally:
+            self._local.session = None
+            session.close()
+            with self._lock:
+                self.metrics.in_use -= 1
+                self.metrics.busy_seconds += time.perf_counter() - start
+
+    def verify(self):
+        """Raise if the server cannot be reached"""
+        self.driver.verify_connectivity()
+
+    def pool_connections(self):
+        """(open, in use) connections held by the driver pool, or None if unavailable"""
+        # The driver does not expose pool state publicly; these are private
+        # internals that differ between driver versions, so read them best-effort
+        pool = getattr(self.driver, '_pool', None)
+        connections = getattr(pool, 'connections', None)
+        lock = getattr(pool, 'lock', None)
+        if not hasattr(connections, 'values') or lock is None:
+            return None
+        try:
+            with lock:
+                held = [connection for queue in connections.values() for connection in queue]
+            in_use = [getattr(connection, 'in_use', None) for connection in held]
+        except (AttributeError, TypeError, RuntimeError):
+            return None
+        if any(flag is None for flag in in_use):
+            return len(held), None
+        return len(held), sum(1 for flag in in_use if flag)
+
+    def stats(self):
+        summary = self.metrics.summary()
+        connections = self.pool_connections()
+        if connections:
+            summary['pool_open'], summary['pool_in_use'] = connections
+        else:
+            summary['pool_open'] = summary['pool_in_use'] = None
+        return summary
+
+    def print_stats(self):
+        summary = self.stats()
+        line = (f"Neo4j pool: {summary['sessions_opened']} sessions opened, "
+                f"{summary['sessions_reused']} reused, peak {summary['peak_in_use']}/"
+                f"{summary['pool_size']} in use ({summary['peak_utilisation']:.0%})")
+        if summary['pool_open'] is None:
+            line += ", connections open: unavailable"
+        else:
+            line += f", {summary['pool_open']} connections open"
+        print(line)
+
+    def close(self):
+        if self.driver:
+            self.driver.close()
+            self.driver = None
+
+
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def get_connection():
+    """Return the process-wide connection, creating it on first use"""
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = Neo4jConnection()
+        return _connection
+
+
+def close_connection():
+    """Close the process-wide connection if one was created"""
+    global _connection
+    with _connection_lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
+
+
+def main():
+    """Main function"""
+    print(f"URI: {NEO4J_URI}")
+    print(f"Pool size: {DEFAULT_POOL_SIZE}, acquisition timeout: {DEFAULT_ACQUISITION_TIMEOUT:.0f}s, "
+          f"liveness check: {DEFAULT_LIVENESS_CHECK:.0f}s, max lifetime: {DEFAULT_MAX_LIFETIME:.0f}s")
+
+    try:
+        connection = get_connection()
+        connection.verify()
+    except Exception as e:
+        print(f"Error connecting to Neo4j: {e}")
+        sys.exit(1)
+
+    print("Connectivity OK")
+    connection.print_stats()
+    close_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,21 @@
 """
 AI News Scheduler
 Automatically collects and processes AI news on a schedule
+
+Each task is recorded as a run in logs/metrics/YYYYMMDD.jsonl; set
+METRICS_PORT to serve Prometheus metrics while the scheduler runs.
+
+schedule, the file watcher and the tweet cache are imported by the modes
+that use them, so --help starts without them.
+
+With --queue, tasks add jobs to the persistent job queue (job_queue.py)
+instead of running them; worker processes run the jobs.
 """
 
+import importlib.util
 import os
 import sys
 import time
-import schedule
 import subprocess
 from datetime import datetime
 from pathlib import Path
@@ -22,31 +31,52 @@ if sys.platform.startswith('win'):
         sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 
+from ingest_ledger import IngestLedger
+from metrics import METRICS
+from profiling import new_profile_dir, profile_stages
+from tweet_stream import find_collection_files
+
+# Timeout for generate_report.py / save_to_neo4j.py runs outside queue mode
+COMMAND_TIMEOUT = float(os.getenv('SCHEDULER_COMMAND_TIMEOUT', '300'))
+
+
 class NewsScheduler:
     """Schedule and run AI news collection tasks"""
 
-    def __init__(self):
+    def __init__(self, in_process=False, fetch_urls=False, profile=False, use_queue=False):
         self.project_root = Path(__file__).parent.parent
         self.scripts_dir = self.project_root / 'scripts'
         self.data_dir = self.project_root / 'data' / 'tweets'
         self.reports_dir = self.project_root / 'reports'
+        self.in_process = in_process
+        self.fetch_urls = fetch_urls
+        # Child scripts write their stage profiles next to the scheduler's
+        self.profile_dir = new_profile_dir('news_scheduler') if profile else None
+        self.pipeline = None
+        self.use_queue = use_queue
+        # The ingest ledger only advances when files are written to Neo4j
+        self.neo4j_enabled = bool(os.getenv('NEO4J_URI'))
 
     def log(self, message):
         """Print timestamped log message"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] {message}")
+        METRICS.event('log', message=message)
 
     def run_command(self, command, description):
         """Run a shell command and return result"""
+        if self.profile_dir:
+            command += f' --profile --profile-dir "{self.profile_dir}"'
         self.log(f"Running: {description}")
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout
-            )
+            with METRICS.span(description):
+                result = subprocess.run(
+                    command,
+                    shell=True,
+                    capture_output=True,
+                    text=True,
+                    timeout=COMMAND_TIMEOUT
+                )
 
             if result.returncode == 0:
                 self.log(f"Success: {description}")
@@ -63,9 +93,19 @@ class NewsScheduler:
             self.log(f"Error running {description}: {e}")
             return False, str(e)
 
+    def pending_ingest_files(self):
+        """Return collection files with tweets not yet ingested into Neo4j
+
+        Empty without Neo4j, where nothing is ever recorded in the ledger.
+        Files are compared by size and mtime only, so no file is hashed.
+        """
+        if not self.neo4j_enabled or not self.data_dir.exists():
+            return []
+        return IngestLedger().scan(self.data_dir, quick=True)
+
     def check_for_new_data(self):
         """Check if new tweet data is available"""
-        json_files = sorted(self.data_dir.glob('*.json'), reverse=True)
+        json_files = find_collection_files(self.data_dir) if self.data_dir.exists() else []
 
         if not json_files:
             self.log("No tweet data found")
@@ -77,28 +117,46 @@ class NewsScheduler:
 
         self.log(f"Latest data: {latest_file.name} ({time_diff.total_seconds() / 3600:.1f} hours old)")
 
+        # Files that arrived since the last ingest count as fresh, whatever their age
+        pending = self.pending_ingest_files()
+        if pending:
+            self.log(f"Not yet ingested: {', '.join(p.path.name for p in pending)}")
+
         # Consider data fresh if less than 24 hours old
-        if time_diff.total_seconds() < 86400:
+        if time_diff.total_seconds() < 86400 or pending:
             return True, latest_file
         else:
             return False, latest_file
 
-    def generate_report(self):
-        """Generate AI news report"""
+    def generate_report(self, data_file=None):
+        """Generate AI news report (for data_file, or the newest data)"""
         self.log("Generating AI news report...")
 
-        # Check for data
-        has_fresh_data, data_file = self.check_for_new_data()
+        if data_file is None:
+            # Check for data
+            has_fresh_data, data_file = self.check_for_new_data()
 
-        if not data_file:
-            self.log("No data available for report generation")
-            return False
+            if not data_file:
+                self.log("No data available for report generation")
+                return False
 
-        if not has_fresh_data:
-            self.log("Warning: Using data older than 24 hours")
+            if not has_fresh_data:
+                self.log("Warning: Using data older than 24 hours")
+
+        if self.use_queue:
+            self.enqueue(data_file, ['report'])
+            return True
+
+        if self.in_process:
+            result = self.get_pipeline().run(data_file, ingest=False)
+            for line in result.summary_lines():
+                self.log(f"  {line}")
+            return result.report_path is not None
 
         # Run report generation
-        command = f'python "{self.scripts_dir / "generate_report.py"}"'
+        command = f'python "{self.scripts_dir / "generate_report.py"}" "{data_file}"'
+        if self.fetch_urls:
+            command += ' --fetch-urls'
         success, output = self.run_command(command, "Report generation")
 
         if success:
@@ -115,17 +173,137 @@ class NewsScheduler:
         self.log("Saving to Neo4j...")
 
         # Check if Neo4j is configured
-        neo4j_uri = os.getenv('NEO4J_URI')
-        if not neo4j_uri:
+        if not self.neo4j_enabled:
             self.log("Neo4j not configured (NEO4J_URI not set), skipping")
             return False
 
-        # Run Neo4j save
-        command = f'python "{self.scripts_dir / "save_to_neo4j.py"}"'
+        # Run Neo4j save (only files and tweets not yet in the ingest ledger)
+        command = f'python "{self.scripts_dir / "save_to_neo4j.py"}" --incremental'
         success, output = self.run_command(command, "Neo4j save")
 
         return success
 
+    def get_pipeline(self):
+        """Return the in-process pipeline runner"""
+        # Imported here so subprocess mode never loads anthropic or neo4j
+        from pipeline import PipelineRunner
+
+        if self.pipeline is None:
+            self.pipeline = PipelineRunner(fetch_urls=self.fetch_urls)
+        return self.pipeline
+
+    def close(self):
+        """Close the in-process pipeline's Neo4j driver"""
+        if self.pipeline is not None:
+            self.pipeline.close()
+
+    def run_pipeline(self, data_file):
+        """Generate the report and ingest in this process, sharing parsed data"""
+        self.log(f"Running in-process pipeline: {data_file.name}")
+        result = self.get_pipeline().run(data_file)
+        for line in result.summary_lines():
+            self.log(f"  {line}")
+
+        # Earlier files that were never ingested
+        if self.pipeline.neo4j_enabled:
+            for pending in self.pending_ingest_files():
+                if pending.path.name != data_file.name:
+                    self.log(f"Ingesting pending file: {pending.path.name}")
+                    self.pipeline.run(pending.path, report=False)
+            self.pipeline.print_pool_stats()
+
+        report_success = result.report_path is not None
+        neo4j_success = result.ingest_status in ('ok', 'up to date')
+        return report_success, neo4j_success
+
+    def update_tweet_cache(self, data_file):
+        """Rebuild data_file's columnar cache if it changed, so later stages skip the JSON parse"""
+        from tweet_cache import CACHE_ENABLED, update_cache
+        if not CACHE_ENABLED:
+            return
+        try:
+            with METRICS.span('tweet_cache'):
+                cache_path = update_cache(data_file)
+            if cache_path:
+                self.log(f"Tweet cache updated: {cache_path.name}")
+        except Exception as e:
+            self.log(f"Could not update tweet cache for {data_file.name}: {e}")
+
+    def update_rollups(self, data_file):
+        """Add data_file to the daily and weekly topic counts used for trends"""
+        from topic_rollups import ROLLUPS_ENABLED, TopicRollups
+        if not ROLLUPS_ENABLED:
+            return
+        try:
+            with METRICS.span('rollups'):
+                rollups = TopicRollups()
+                try:
+                    count = rollups.add_file(data_file)
+                finally:
+                    rollups.close()
+            if count is not None:
+                self.log(f"Rollups updated: {data_file.name} ({count:,} tweets)")
+        except Exception as e:
+            self.log(f"Could not update rollups for {data_file.name}: {e}")
+
+    def update_search_index(self, data_file):
+        """Add data_file to the local full-text search index"""
+        from search_index import INDEX_ENABLED, SearchIndex, StaleIndex
+        if not INDEX_ENABLED:
+            return
+        try:
+            with METRICS.span('search_index'):
+                index = SearchIndex()
+                try:
+                    count = index.index_file(data_file)
+                except StaleIndex as e:
+                    # The article store was cleared under the index: rebuild it
+                    self.log(f"Search index is out of date ({e}); rebuilding")
+                    index.clear()
+                    count = dict(index.update(data_file.parent)).get(data_file.name, 0)
+                finally:
+                    index.close()
+            self.log(f"Search index updated: {data_file.name} ({count:,} tweets)")
+        except Exception as e:
+            self.log(f"Could not update search index for {data_file.name}: {e}")
+
+    def enqueue(self, data_file, types=None):
+        """Add jobs for data_file to the job queue (default: report, and ingest if configured)"""
+        from job_queue import JobQueue, default_types
+
+        if types is None:
+            types = default_types(self.fetch_urls)
+        elif self.fetch_urls:
+            types = ['enrich'] + types
+        queue = JobQueue()
+        try:
+            ids = queue.enqueue_file(data_file, types)
+        finally:
+            queue.close()
+        self.log(f"Queued: {', '.join(f'{t} #{i}' for t, i in ids.items())}")
+        return ids
+
+    def outcome(self, success, failure='Failed'):
+        """Summary word for a task result"""
+        if not success:
+            return failure
+        return 'Queued' if self.use_queue else 'Success'
+
+    def process_file(self, data_file):
+        """Generate a report for data_file and ingest new data into Neo4j"""
+        self.update_tweet_cache(data_file)
+        self.update_search_index(data_file)
+        self.update_rollups(data_file)
+        if self.use_queue:
+            ids = self.enqueue(data_file)
+            return 'report' in ids, 'ingest' in ids
+        if self.in_process:
+            return self.run_pipeline(data_file)
+
+        report_success = self.generate_report(data_file)
+        neo4j_success = self.save_to_neo4j()
+        return report_success, neo4j_success
+
     def send_notification(self, message):
         """Send notification (placeholder for future implementation)"""
         self.log(f"Notification: {message}")
@@ -133,6 +311,10 @@ class NewsScheduler:
 
     def weekly_task(self):
         """Main weekly task"""
+        with METRICS.run('weekly_task'):
+            self._weekly_task()
+
+    def _weekly_task(self):
         self.log("=" * 60)
         self.log("Starting weekly AI news collection task")
         self.log("=" * 60)
@@ -148,42 +330,96 @@ class NewsScheduler:
             self.send_notification("AI News: Please collect new tweets")
             return
 
-        # Generate report
-        report_success = self.generate_report()
-
-        # Save to Neo4j (optional)
-        neo4j_success = self.save_to_neo4j()
+        # Generate report and save to Neo4j (optional)
+        report_success, neo4j_success = self.process_file(data_file)
 
         # Summary
         self.log("=" * 60)
         self.log("Weekly task complete!")
-        self.log(f"  Report generation: {'Success' if report_success else 'Failed'}")
-        self.log(f"  Neo4j save: {'Success' if neo4j_success else 'Skipped/Failed'}")
+        self.log(f"  Report generation: {self.outcome(report_success)}")
+        self.log(f"  Neo4j save: {self.outcome(neo4j_success, 'Skipped/Failed')}")
         self.log("=" * 60)
 
-        if report_success:
+        if report_success and not self.use_queue:
             self.send_notification("AI News: Weekly report generated successfully")
 
     def daily_check(self):
         """Daily check for new data"""
+        with METRICS.run('daily_check'):
+            self._daily_check()
+
+    def _daily_check(self):
         self.log("Running daily check...")
 
         has_fresh_data, data_file = self.check_for_new_data()
 
         if has_fresh_data:
             self.log("Fresh data available, generating report...")
-            self.generate_report()
+            self.generate_report(data_file)
         else:
             self.log("No fresh data, waiting for collection")
 
+    def process_new_file(self, data_file):
+        """Generate a report and ingest a collection file that just landed"""
+        with METRICS.run('new_file', file=data_file.name):
+            self.log(f"New data: {data_file.name}")
+            report_success, neo4j_success = self.process_file(data_file)
+            self.log(f"  Report generation: {self.outcome(report_success)}")
+            self.log(f"  Neo4j save: {self.outcome(neo4j_success, 'Skipped/Failed')}")
+
+    def start_metrics_server(self):
+        """Serve Prometheus metrics when METRICS_PORT is set"""
+        port = METRICS.serve()
+        if port:
+            self.log(f"Metrics: http://localhost:{port}/metrics")
+
+    def watch(self):
+        """Process files as soon as they land in data/tweets/"""
+        import schedule
+        from file_watcher import create_watcher
+
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        watcher = create_watcher(self.data_dir)
+
+        self.log("AI News Scheduler started (watch mode)")
+        self.log(f"Watching: {self.data_dir} ({type(watcher).__name__})")
+        self.log("Schedule:")
+        self.log("  - New collection files: processed as soon as they are written")
+        self.log("  - Weekly report: Every Monday at 09:00")
+        self.log("")
+        self.log("Press Ctrl+C to stop")
+        self.start_metrics_server()
+
+        schedule.every().monday.at("09:00").do(self.weekly_task)
+
+        # Catch up on files that arrived while the scheduler was not running
+        pending = self.pending_ingest_files()
+        if pending:
+            self.log(f"Catching up on {len(pending)} files not yet ingested")
+            self.process_new_file(pending[-1].path)
+
+        try:
+            while True:
+                for data_file in watcher.poll(timeout=1.0):
+                    self.process_new_file(data_file)
+                schedule.run_pending()
+        except KeyboardInterrupt:
+            self.log("\nScheduler stopped by user")
+        finally:
+            watcher.close()
+            self.close()
+
     def run(self):
         """Start the scheduler"""
+        import schedule
+
         self.log("AI News Scheduler started")
         self.log("Schedule:")
         self.log("  - Weekly report: Every Monday at 09:00")
         self.log("  - Daily check: Every day at 10:00")
         self.log("")
         self.log("Press Ctrl+C to stop")
+        self.start_metrics_server()
 
         # Schedule tasks
         schedule.every().monday.at("09:00").do(self.weekly_task)
@@ -192,7 +428,9 @@ class NewsScheduler:
         # For testing: run immediately
         if '--test' in sys.argv:
             self.log("Test mode: Running tasks immediately")
-            self.weekly_task()
+            with profile_stages(self.profile_dir is not None, self.profile_dir, 'news_scheduler'):
+                self.weekly_task()
+            self.close()
             return
 
         # Run scheduler loop
@@ -202,6 +440,8 @@ class NewsScheduler:
                 time.sleep(60)  # Check every minute
         except KeyboardInterrupt:
             self.log("\nScheduler stopped by user")
+        finally:
+            self.close()
 
 
 def main():
@@ -211,27 +451,43 @@ def main():
     print("=" * 60)
     print()
 
-    # Check if schedule package is installed
-    try:
-        import schedule
-    except ImportError:
-        print("Error: schedule package not installed")
-        print("Install with: pip install schedule")
-        sys.exit(1)
-
-    # Create and run scheduler
-    scheduler = NewsScheduler()
-
     if '--help' in sys.argv:
         print("Usage:")
         print("  python scripts/news_scheduler.py         Start scheduler")
         print("  python scripts/news_scheduler.py --test  Run tasks immediately")
+        print("  python scripts/news_scheduler.py --watch Process new files as they land")
         print("  python scripts/news_scheduler.py --help  Show this help")
         print()
+        print("Options:")
+        print("  --in-process  Run report generation and Neo4j ingest in this process")
+        print("                (parse each file once, overlap the Claude call and DB writes)")
+        print("  --fetch-urls  Fetch linked articles for tweets collected without them")
+        print("  --profile     With --test: profile each stage (cProfile) and print hot functions")
+        print("  --queue       Add report/ingest jobs to the job queue instead of running them")
+        print("                (run workers with: python scripts/job_queue.py worker)")
+        print()
         print("Environment variables:")
         print("  NEO4J_URI      - Neo4j connection URI (optional)")
         print("  NEO4J_USER     - Neo4j username (optional)")
         print("  NEO4J_PASSWORD - Neo4j password (optional)")
+        print("  METRICS_PORT   - Serve Prometheus metrics on this port (optional)")
+        print("  SCHEDULER_COMMAND_TIMEOUT - Seconds before a report/save run is killed (default: 300)")
+        return
+
+    # Check if schedule package is installed
+    if importlib.util.find_spec('schedule') is None:
+        print("Error: schedule package not installed")
+        print("Install with: pip install schedule")
+        sys.exit(1)
+
+    # Create and run scheduler
+    scheduler = NewsScheduler(in_process='--in-process' in sys.argv,
+                              fetch_urls='--fetch-urls' in sys.argv,
+                              profile='--profile' in sys.argv and '--test' in sys.argv,
+                              use_queue='--queue' in sys.argv)
+
+    if '--watch' in sys.argv:
+        scheduler.watch()
         return
 
     scheduler.run()
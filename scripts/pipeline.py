@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-Process Pipeline
+Runs report generation and Neo4j ingest for a collection file inside one
+interpreter: the file is parsed once, tweets are deduplicated and
+classified once, and the Claude call overlaps with the Neo4j writes
+
+Usage:
+  python scripts/pipeline.py [data/tweets/20260114_goromian.json] [--fetch-urls]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import generate_report
+import save_to_neo4j
+from dedup_index import DedupFilter, DedupIndex
+from ingest_ledger import IngestLedger
+from metrics import METRICS
+from neo4j_connection import close_connection, get_connection
+from topic_classifier import CLASSIFIER
+from topic_rollups import ROLLUPS_ENABLED, TopicRollups
+from tweet_cache import load_tweets
+from tweet_stream import find_collection_files
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class PipelineResult:
+    """Outcome and per-stage wall-clock timings of one pipeline run"""
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.timings = {}
+        self.report_path = None
+        self.report_status = 'skipped'
+        self.ingest_status = 'skipped'
+        self.ingest_counts = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            with METRICS.span(name):
+                yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def summary_lines(self):
+        lines = [f"{name:<10} {seconds:8.3f}s" for name, seconds in self.timings.items()]
+        lines.append(f"Report: {self.report_status}, Neo4j: {self.ingest_status}")
+        if self.ingest_counts:
+            added = self.ingest_counts['added']
+            lines.append("Neo4j added: " + ', '.join(f"{key} {value}" for key, value in added.items()))
+        return lines
+
+
+class PipelineRunner:
+    """Shared state for in-process pipeline runs"""
+
+    def __init__(self, reports_dir=None, neo4j_enabled=None, use_dedup=True,
+                 batch_size=save_to_neo4j.DEFAULT_BATCH_SIZE, fetch_urls=False):
+        project_root = Path(__file__).parent.parent
+        self.reports_dir = Path(reports_dir or project_root / 'reports')
+        self.reports_dir.mkdir(exist_ok=True)
+        if neo4j_enabled is None:
+            neo4j_enabled = bool(os.getenv('NEO4J_URI'))
+        self.neo4j_enabled = neo4j_enabled
+        self.use_dedup = use_dedup
+        self.batch_size = batch_size
+        self.fetch_urls = fetch_urls
+        self.ledger = IngestLedger()
+        self.connection = None
+
+    def run(self, data_file, report=True, ingest=True):
+        """Process one collection file; returns a PipelineResult"""
+        with METRICS.run('pipeline', file=Path(data_file).name):
+            return self._run(Path(data_file), report, ingest)
+
+    def _run(self, data_file, report, ingest):
+        result = PipelineResult(data_file)
+        date_part, date_str = generate_report.parse_date_from_filename(data_file)
+
+        with result.stage('load'):
+            tweets_data = load_tweets(data_file)
+
+        # Parse, deduplicate and classify in one streaming pass; both stages
+        # reuse the masks. Only unique tweets are kept (the report and ingest
+        # stages both read them), with their file positions for the ledger.
+        with result.stage('classify'):
+            # Tweets read from the columnar cache carry their stored masks
+            stored_mask = tweets_data.get('classify_mask')
+            index = DedupIndex() if self.use_dedup else None
+            unique, positions, masks = [], {}, {}
+            last_raw = {}
+
+            def raw_tweets():
+                # The ledger records the index of the file's last tweet, duplicate or not
+                for tweet in tweets_data['tweets']:
+                    last_raw['index'] = tweet.get('index')
+                    yield tweet
+
+            try:
+                tweets = DedupFilter(raw_tweets(), index, data_file.stem)
+                for tweet in tweets:
+                    unique.append(tweet)
+                    positions[id(tweet)] = tweets.consumed - 1
+                    masks[id(tweet)] = (stored_mask(tweet) if stored_mask
+                                        else CLASSIFIER.classify_mask(tweet.get('text', '')))
+            finally:
+                if index:
+                    index.close()
+            raw_count, last_index = tweets.consumed, last_raw.get('index')
+
+        def classify_mask(tweet):
+            return masks[id(tweet)]
+
+        # Trend counts for this file, read by the report prompt
+        if ROLLUPS_ENABLED:
+            with result.stage('rollup'):
+                rollups = TopicRollups()
+                try:
+                    rollups.add_file(data_file, unique, classify_mask)
+                finally:
+                    rollups.close()
+
+        # Linked articles feed both the report topics and the Article nodes
+        if self.fetch_urls:
+            from url_fetcher import enrich_tweets
+            with result.stage('enrich'):
+                enrich_tweets(unique)
+
+        with result.stage('topics'):
+            topics = generate_report.extract_ai_topics({'tweets': unique}, classify_mask)
+
+        async def run_stages():
+            tasks = []
+            if report:
+                tasks.append(self._report(result, topics, date_part, date_str))
+            if ingest and self.neo4j_enabled:
+                tasks.append(asyncio.to_thread(
+                    self._ingest, result, tweets_data, unique, positions, raw_count, last_index,
+                    classify_mask))
+            await asyncio.gather(*tasks)
+
+        # The Claude call and the Neo4j writes overlap
+        with result.stage('parallel'):
+            generate_report.run_async(run_stages())
+
+        return result
+
+    def print_pool_stats(self):
+        if self.connection is not None:
+            self.connection.print_stats()
+
+    def close(self):
+        """Release the long-lived Neo4j driver"""
+        if self.connection is not None:
+            close_connection()
+            self.connection = None
+
+    async def _report(self, result, topics, date_part, date_str):
+        with result.stage('report'):
+            if not topics:
+                result.report_status = 'no topics'
+                return
+            try:
+                report = await generate_report.generate_report_for_topics(topics, date_str)
+                result.report_status = 'claude'
+                if not report:
+                    report = generate_report.generate_fallback_report(topics, date_str)
+                    result.report_status = 'fallback'
+                result.report_path = generate_report.save_report(report, date_part, self.reports_dir)
+            except Exception as e:
+                result.report_status = f"error: {e}"
+
+    def _ingest(self, result, tweets_data, unique, positions, raw_count, last_index, classify_mask):
+        """Ingest unique tweets from the ledger watermark
+
+        positions maps each unique tweet to its position in the file;
+        raw_count and last_index describe the whole file, duplicates included.
+        """
+        with result.stage('ingest'):
+            pending_file = self.ledger.check(result.data_file)
+            if pending_file is None:
+                result.ingest_status = 'up to date'
+                return
+
+            tweets = [tweet for tweet in unique if positions[id(tweet)] >= pending_file.start]
+            collection_info = save_to_neo4j.build_collection_info(result.data_file, tweets_data)
+
+            def checkpoint(tweets_done, last_tweet):
+                self.ledger.record(pending_file, positions[id(last_tweet)] + 1, last_tweet.get('index'))
+
+            try:
+                # The driver and its pool live as long as the runner
+                first_run = self.connection is None
+                if first_run:
+                    self.connection = get_connection()
+                saver = save_to_neo4j.Neo4jSaver(None, None, None, connection=self.connection)
+                if first_run:
+                    saver.create_constraints()
+                result.ingest_counts = saver.ingest(
+                    tweets, collection_info, self.batch_size,
+                    on_batch=checkpoint, classify_mask=classify_mask)
+                self.ledger.record(pending_file, raw_count, last_index, complete=True)
+                result.ingest_status = 'ok'
+            except Exception as e:
+                result.ingest_status = f"error: {e}"
+
+
+def main():
+    """Main function"""
+    project_root = Path(__file__).parent.parent
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if args:
+        data_file = Path(args[0])
+    else:
+        json_files = find_collection_files(project_root / 'data' / 'tweets')
+        if not json_files:
+            print("No tweet data files found in data/tweets/")
+            sys.exit(1)
+        data_file = json_files[0]
+
+    runner = PipelineRunner(fetch_urls='--fetch-urls' in sys.argv)
+    try:
+        result = runner.run(data_file)
+
+        print("\n" + "=" * 60)
+        print(f"Pipeline complete: {data_file.name}")
+        print("=" * 60)
+        for line in result.summary_lines():
+            print(f"  {line}")
+        runner.print_pool_stats()
+    finally:
+        runner.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stage Profiler
+cProfile for the stages timed by metrics spans (topics, report, ingest, ...)
+
+With --profile, each outermost span is profiled on its own and saved as
+logs/profiles/<run>/<script>.<stage>.pstats; repeated stages are merged
+into one file. Only one profiler can run at a time (on Python 3.12+ per
+interpreter), so spans that start in other threads while one is being
+profiled are skipped with a note. The hottest functions by cumulative time are printed
+when the run ends.
+
+Usage:
+  python scripts/profiling.py logs/profiles/20260114-090000-generate_report [TOP]
+  python -m pstats logs/profiles/.../generate_report.topics.pstats
+"""
+
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from metrics import METRICS
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PROFILE_ROOT = Path(__file__).parent.parent / 'logs' / 'profiles'
+DEFAULT_TOP = 20
+
+
+class StageProfiler:
+    """One cProfile.Profile per stage invocation, merged per stage on save"""
+
+    def __init__(self, output_dir, prefix):
+        self.output_dir = Path(output_dir)
+        self.prefix = prefix
+        self.profiles = {}
+        self.skipped = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._active = None
+
+    def _skip(self, name, reason):
+        with self._lock:
+            if name in self.skipped:
+                return
+            self.skipped.add(name)
+        print(f"Profile: not profiling stage '{name}' ({reason})")
+
+    @contextmanager
+    def stage(self, name):
+        # Nested spans are part of the outer one
+        if getattr(self._local, 'active', False):
+            yield
+            return
+
+        # cProfile cannot run two profilers at once: on Python 3.12+ a second
+        # enable() in another thread raises instead of profiling that thread
+        with self._lock:
+            running, self._active = self._active, self._active or name
+        if running:
+            self._skip(name, f"it runs in another thread while '{running}' is profiled")
+            yield
+            return
+
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiling tool (a debugger, coverage) is active
+            with self._lock:
+                self._active = None
+            self._skip(name, e)
+            yield
+            return
+
+        self._local.active = True
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._local.active = False
+            with self._lock:
+                self._active = None
+                self.profiles.setdefault(name, []).append(profile)
+
+    def save(self):
+        """Write one .pstats file per stage; returns the paths"""
+        import pstats
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        with self._lock:
+            for name, profiles in self.profiles.items():
+                stats = pstats.Stats(profiles[0])
+                for profile in profiles[1:]:
+                    stats.add(profile)
+                stage = re.sub(r'[^\w-]+', '_', name).strip('_').lower()
+                path = self.output_dir / f"{self.prefix}.{stage}.pstats"
+                stats.dump_stats(path)
+                paths.append(path)
+        return paths
+
+
+def new_profile_dir(prefix):
+    """Fresh directory under logs/profiles for one profiled run"""
+    return PROFILE_ROOT / f"{datetime.now():%Y%m%d-%H%M%S}-{prefix}"
+
+
+def print_profile_report(output_dir, top=DEFAULT_TOP):
+    """Print the top functions by cumulative time for every stage file in output_dir"""
+    import pstats  # ~40ms; only needed once a profile exists
+    paths = sorted(Path(output_dir).glob('*.pstats'), key=lambda path: path.stat().st_mtime)
+    for path in paths:
+        stats = pstats.Stats(str(path))
+        print("\n" + "=" * 60)
+        print(f"Profile: {path.stem} ({stats.total_tt:.3f}s)")
+        print("=" * 60)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(top)
+    if paths:
+        print(f"Profiles saved to: {output_dir}")
+
+
+@contextmanager
+def profile_stages(enabled, output_dir=None, prefix='run', top=DEFAULT_TOP):
+    """Profile every metrics span inside the block and print the report afterwards"""
+    if not enabled:
+        yield None
+        return
+
+    profiler = StageProfiler(output_dir or new_profile_dir(prefix), prefix)
+    METRICS.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        METRICS.profiler = None
+        profiler.save()
+        print_profile_report(profiler.output_dir, top)
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/profiling.py PROFILE_DIR [TOP]")
+        sys.exit(1)
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_TOP
+    print_profile_report(sys.argv[1], top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prompt Builder
+Token estimation, ranking and budget packing for report prompts
+"""
+
+import os
+
+# Tokens available for topic text in a single report prompt
+DEFAULT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '50000'))
+
+
+def estimate_tokens(text):
+    """Cheap token estimate: ~4 ASCII chars per token, ~1 token per CJK char
+
+    Non-ASCII characters are counted from the UTF-8 length (Japanese text is
+    3 bytes per char), which avoids a per-character Python loop.
+    """
+    chars = len(text)
+    extra_bytes = len(text.encode('utf-8')) - chars
+    non_ascii = extra_bytes // 2
+    return (chars - non_ascii) // 4 + non_ascii + 1
+
+
+def score_topic(topic):
+    """Rank topics: classified topics and linked articles carry the signal"""
+    score = 2.0 * len(topic.get('topics', []))
+    for content in topic.get('linked_content', []):
+        score += 3.0 if content.get('title') else 1.0
+        if content.get('description'):
+            score += 1.0
+    score += min(len(topic.get('text', '')), 280) / 140
+    return score
+
+
+def format_topic(topic, number, articles=None):
+    """Render one topic as a prompt block
+
+    articles maps article hashes to the topic number that already shows the
+    article; repeats are rendered as a reference instead of a second excerpt.
+    """
+    lines = [
+        f"\n## トピック {number}",
+        f"**投稿者**: @{topic['author']}",
+        f"**ツイート**: {topic['text']}",
+        f"**日時**: {topic['timestamp']}"
+    ]
+
+    if topic['linked_content']:
+        lines.append("\n**リンク先記事**:")
+        for content in topic['linked_content']:
+            lines.append(f"- **URL**: {content['url']}")
+            shown_in = articles.get(content.get('hash')) if articles is not None else None
+            if shown_in is not None:
+                lines.append(f"  （トピック {shown_in} と同じ記事）")
+                continue
+            lines.append(f"  **タイトル**: {content['title']}")
+            if content['description']:
+                lines.append(f"  **説明**: {content['description']}")
+            if content['content']:
+                lines.append(f"  **内容抜粋**: {content['content'][:300]}...")
+
+    lines.append("\n---\n")
+    return '\n'.join(lines)
+
+
+def remember_articles(topic, number, articles):
+    """Record the articles shown in topic so later topics can reference them"""
+    for content in topic['linked_content']:
+        if content.get('hash'):
+            articles.setdefault(content['hash'], number)
+
+
+class PackResult:
+    """Topic blocks selected for a prompt and their token accounting"""
+
+    def __init__(self, blocks, used_tokens, total_tokens, budget, dropped):
+        self.blocks = blocks
+        self.used_tokens = used_tokens
+        self.total_tokens = total_tokens
+        self.budget = budget
+        self.dropped = dropped
+
+    @property
+    def text(self):
+        return ''.join(self.blocks)
+
+    @property
+    def overflow(self):
+        return self.dropped > 0
+
+    def log(self, label="Prompt"):
+        pct = self.used_tokens / self.budget * 100 if self.budget else 0.0
+        print(f"{label} budget: ~{self.used_tokens:,} / {self.budget:,} tokens ({pct:.0f}%), "
+              f"{len(self.blocks)} topics included, {self.dropped} dropped "
+              f"(all topics: ~{self.total_tokens:,} tokens)")
+
+
+def rank_topics(topics):
+    """Return topics sorted by descending score (stable)"""
+    return sorted(topics, key=score_topic, reverse=True)
+
+
+def pack_topics(topics, budget):
+    """Greedily fill budget with the highest-ranked topic blocks"""
+    blocks = []
+    articles = {}
+    used = 0
+    total = 0
+    dropped = 0
+
+    for topic in rank_topics(topics):
+        number = len(blocks) + 1
+        block = format_topic(topic, number, articles)
+        cost = estimate_tokens(block)
+        total += cost
+        if used + cost > budget:
+            dropped += 1
+            continue
+        blocks.append(block)
+        remember_articles(topic, number, articles)
+        used += cost
+
+    return PackResult(blocks, used, total, budget, dropped)
+
+
+def chunk_topics(topics, budget):
+    """Split ranked topics into consecutive chunks that each fit budget"""
+    chunks = []
+    current = []
+    articles = {}
+    used = 0
+
+    for topic in rank_topics(topics):
+        cost = estimate_tokens(format_topic(topic, len(current) + 1, articles))
+        if current and used + cost > budget:
+            chunks.append(current)
+            current = []
+            articles = {}
+            used = 0
+            cost = estimate_tokens(format_topic(topic, 1, articles))
+        current.append(topic)
+        remember_articles(topic, len(current), articles)
+        used += cost
+
+    if current:
+        chunks.append(current)
+    return chunks
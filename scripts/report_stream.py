@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streamed Report File
+Writes a report to a hidden partial file while Claude streams it, and
+renames it over reports/ai_news_YYYYMMDD.md only once the stream finishes
+
+If the stream fails, the partial file is kept together with the key of the
+request that produced it. The next --stream run with the same prompt
+continues from the partial text instead of starting over.
+
+Usage:
+  python scripts/report_stream.py           List partial reports
+  python scripts/report_stream.py --clear   Delete partial reports
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+REPORTS_DIR = Path(__file__).parent.parent / 'reports'
+PARTIAL_SUFFIX = '.partial'
+
+
+class PartialReport:
+    """Report file written chunk by chunk and moved into place atomically"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(f".{self.path.name}{PARTIAL_SUFFIX}")
+        self.meta_path = self.path.with_name(f".{self.path.name}{PARTIAL_SUFFIX}.json")
+        self.complete = False
+        self._file = None
+
+    def load(self, key):
+        """Text kept from an earlier run of the same request, or ''"""
+        if not self.partial_path.exists():
+            return ''
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get('key') != key:
+            print(f"Discarding partial report from a different prompt: {self.partial_path.name}")
+            self.discard()
+            return ''
+        return self.partial_path.read_text(encoding='utf-8').rstrip()
+
+    def begin(self, key):
+        """Open the partial file for a request; returns the text it resumes from"""
+        resumed = self.load(key)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'started_at': datetime.now().isoformat(timespec='seconds')}, f)
+        self._file = open(self.partial_path, 'w', encoding='utf-8')
+        self.write(resumed)
+        return resumed
+
+    def write(self, chunk):
+        # Flushed per chunk so a crash loses at most the chunk in flight
+        self._file.write(chunk)
+        self._file.flush()
+
+    def commit(self):
+        """Rename the finished partial file over the report"""
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        os.replace(self.partial_path, self.path)
+        self.meta_path.unlink(missing_ok=True)
+        self.complete = True
+
+    def keep(self):
+        """Close the partial file after a failure, leaving it for the next run"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        size = self.partial_path.stat().st_size if self.partial_path.exists() else 0
+        if not size:
+            self.discard()
+            return
+        print(f"Partial report kept ({size:,} bytes): {self.partial_path}")
+        print("  Run again with --stream to continue from it")
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.partial_path.unlink(missing_ok=True)
+        self.meta_path.unlink(missing_ok=True)
+
+
+def find_partials(reports_dir=REPORTS_DIR):
+    """Partial report files in reports_dir"""
+    return sorted(Path(reports_dir).glob(f".*.md{PARTIAL_SUFFIX}"))
+
+
+def main():
+    """Main function"""
+    partials = find_partials()
+    if not partials:
+        print("No partial reports")
+        return
+
+    for partial in partials:
+        report = REPORTS_DIR / partial.name[1:-len(PARTIAL_SUFFIX)]
+        if '--clear' in sys.argv:
+            PartialReport(report).discard()
+            print(f"Deleted: {partial.name}")
+        else:
+            print(f"{report.name}: {partial.stat().st_size:,} bytes")
+
+
+if __name__ == '__main__':
+    main()
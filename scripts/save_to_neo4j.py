@@ -5,9 +5,11 @@ Save AI News to Neo4j
 Stores tweets, articles, and topics in Neo4j graph database
 """
 
-import json
+import argparse
+import itertools
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -19,36 +21,205 @@ if sys.platform.startswith('win'):
     if sys.stderr.encoding != 'utf-8':
         sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
-try:
-    from neo4j import GraphDatabase
-except ImportError:
-    print("Warning: neo4j package not installed.")
-    print("Install with: pip install neo4j")
-    GraphDatabase = None
+from article_store import get_article_store
+from dedup_index import DedupFilter, DedupIndex
+from ingest_ledger import IngestLedger
+from metrics import METRICS
+from profiling import DEFAULT_TOP, profile_stages
+from neo4j_connection import (NEO4J_PASSWORD, NEO4J_URI, NEO4J_USER, Neo4jConnection,
+                              neo4j_available)
+from topic_classifier import CLASSIFIER, classify_topics
+from tweet_cache import load_tweets
+from tweet_stream import find_collection_files
+
+# Number of tweets written per UNWIND transaction in batch mode
+DEFAULT_BATCH_SIZE = int(os.getenv('NEO4J_BATCH_SIZE', '500'))
+
+# One UNWIND query per entity type; each runs once per chunk
+UNWIND_USERS_QUERY = """
+UNWIND $rows AS row
+MERGE (:User {username: row.username})
+"""
+
+UNWIND_TWEETS_QUERY = """
+UNWIND $rows AS row
+MERGE (t:Tweet {id: row.id})
+SET t.text = row.text,
+    t.timestamp = datetime(row.timestamp),
+    t.collected_at = datetime(row.collected_at),
+    t.source = row.source,
+    t.index = row.index
+WITH t, row
+MATCH (u:User {username: row.author})
+MERGE (u)-[:POSTED]->(t)
+"""
+
+# Article properties are only rewritten when the content hash changed
+UNWIND_ARTICLES_QUERY = """
+UNWIND $rows AS row
+MERGE (a:Article {url: row.url})
+FOREACH (_ IN CASE WHEN a.content_hash IS NULL OR a.content_hash <> row.content_hash
+                   THEN [1] ELSE [] END |
+    SET a.title = row.title,
+        a.description = row.description,
+        a.content = row.content,
+        a.content_hash = row.content_hash,
+        a.updated_at = datetime()
+)
+"""
+
+# Per-row article upsert; returns only the element id and whether it changed
+SAVE_ARTICLE_QUERY = """
+MATCH (t:Tweet {id: $tweet_id})
+MERGE (a:Article {url: $url})
+WITH t, a, a.content_hash IS NULL OR a.content_hash <> $content_hash AS changed
+FOREACH (_ IN CASE WHEN changed THEN [1] ELSE [] END |
+    SET a.title = $title,
+        a.description = $description,
+        a.content = $content,
+        a.content_hash = $content_hash,
+        a.updated_at = datetime()
+)
+MERGE (t)-[:LINKS_TO]->(a)
+RETURN elementId(a) AS id, changed
+"""
+
+UNWIND_LINKS_QUERY = """
+UNWIND $rows AS row
+MATCH (t:Tweet {id: row.tweet_id})
+MATCH (a:Article {url: row.url})
+MERGE (t)-[:LINKS_TO]->(a)
+"""
+
+UNWIND_MENTIONS_QUERY = """
+UNWIND $rows AS row
+MATCH (t:Tweet {id: row.tweet_id})
+MERGE (topic:Topic {name: row.topic})
+MERGE (t)-[:MENTIONS]->(topic)
+"""
+
+
+def build_batch_rows(tweets, collection_info, classify_mask=None):
+    """Flatten a chunk of tweets into UNWIND parameter rows per entity type
+
+    classify_mask(tweet) may supply precomputed topic bitmasks.
+    """
+    rows = {'users': [], 'tweets': [], 'articles': [], 'links': [], 'mentions': []}
+    seen_users = set()
+    seen_articles = set()
+    store = get_article_store()
+
+    for tweet in tweets:
+        tweet_id = f"{collection_info['date']}_{tweet['index']}"
+        author = tweet.get('author', 'unknown')
+
+        if author not in seen_users:
+            seen_users.add(author)
+            rows['users'].append({'username': author})
+
+        rows['tweets'].append({
+            'id': tweet_id,
+            'text': tweet.get('text', ''),
+            'timestamp': tweet.get('timestamp'),
+            'collected_at': collection_info['collected_at'],
+            'source': collection_info['source'],
+            'index': tweet['index'],
+            'author': author
+        })
+
+        # One node row per canonical URL, however many tweets share it
+        for linked in tweet.get('linkedContent', []):
+            article = store.article(linked)
+            if article is None:
+                continue
+            if article['url'] not in seen_articles:
+                seen_articles.add(article['url'])
+                rows['articles'].append({
+                    'url': article['url'],
+                    'title': article['title'],
+                    'description': article['description'],
+                    'content': article['content'],
+                    'content_hash': article['hash']
+                })
+            rows['links'].append({'tweet_id': tweet_id, 'url': article['url']})
+
+        if classify_mask:
+            topic_names = CLASSIFIER.topics_for_mask(classify_mask(tweet))
+        else:
+            topic_names = classify_topics(tweet.get('text', ''))
+        for topic_name in topic_names:
+            rows['mentions'].append({'tweet_id': tweet_id, 'topic': topic_name})
+
+    store.commit()
+    return rows
+
+
+# Node label created by each UNWIND query, for per-run deltas; the links
+# query creates no nodes, only LINKS_TO relationships, counted as 'links'
+CREATED_LABELS = {
+    'users': 'users',
+    'tweets': 'tweets',
+    'articles': 'articles',
+    'links': None,
+    'mentions': 'topics'
+}
+
+# Each subquery is a single label (or untyped relationship) count, which
+# Neo4j answers from its count store without touching the graph
+STATISTICS_QUERY = """
+CALL { MATCH (t:Tweet) RETURN count(t) AS tweets }
+CALL { MATCH (a:Article) RETURN count(a) AS articles }
+CALL { MATCH (u:User) RETURN count(u) AS users }
+CALL { MATCH (topic:Topic) RETURN count(topic) AS topics }
+CALL { MATCH ()-[r]->() RETURN count(r) AS relationships }
+RETURN tweets, articles, users, topics, relationships
+"""
+
 
-# Configuration
-NEO4J_URI = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
-NEO4J_USER = os.getenv('NEO4J_USER', 'neo4j')
-NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD', 'password')
+def empty_deltas():
+    """Nodes and relationships created during a run, by kind"""
+    return {'tweets': 0, 'users': 0, 'articles': 0, 'topics': 0, 'links': 0,
+            'relationships': 0}
+
+
+def _write_article(tx, **params):
+    """Transaction function: upsert one article; returns a summary, not the node"""
+    result = tx.run(SAVE_ARTICLE_QUERY, **params)
+    record = result.single()
+    counters = result.consume().counters
+    if record is None:
+        return None
+
+    if counters.nodes_created:
+        status = 'created'
+    elif record['changed']:
+        status = 'updated'
+    else:
+        status = 'unchanged'
+    return {'id': record['id'], 'url': params['url'], 'status': status}
+
+
+def _run_unwind(tx, query, rows):
+    """Transaction function: run one UNWIND query, return its update counters"""
+    return tx.run(query, rows=rows).consume().counters
 
 
 class Neo4jSaver:
     """Save AI news data to Neo4j"""
 
-    def __init__(self, uri, user, password):
-        if not GraphDatabase:
-            raise ImportError("neo4j package is required")
-
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        print(f"Connected to Neo4j at {uri}")
+    def __init__(self, uri, user, password, driver=None, connection=None):
+        # A shared connection outlives the saver; otherwise the saver owns one
+        self.owns_connection = connection is None
+        self.connection = connection or Neo4jConnection(uri, user, password, driver=driver)
+        self.driver = self.connection.driver
 
     def close(self):
-        if self.driver:
-            self.driver.close()
+        if self.owns_connection:
+            self.connection.close()
 
     def create_constraints(self):
         """Create constraints and indexes"""
-        with self.driver.session() as session:
+        with self.connection.session() as session:
             # Create constraints
             constraints = [
                 "CREATE CONSTRAINT IF NOT EXISTS FOR (t:Tweet) REQUIRE t.id IS UNIQUE",
@@ -67,7 +238,7 @@ class Neo4jSaver:
 
     def save_tweet(self, tweet_data, collection_info):
         """Save a tweet to Neo4j"""
-        with self.driver.session() as session:
+        with self.connection.session() as session:
             # Create tweet ID from timestamp and index
             tweet_id = f"{collection_info['date']}_{tweet_data['index']}"
 
@@ -99,55 +270,35 @@ class Neo4jSaver:
             return result.single()[0]
 
     def save_article(self, article_data, tweet_id):
-        """Save an article and link to tweet"""
-        with self.driver.session() as session:
-            query = """
-            MATCH (t:Tweet {id: $tweet_id})
-
-            MERGE (a:Article {url: $url})
-            SET a.title = $title,
-                a.description = $description,
-                a.content = $content,
-                a.updated_at = datetime()
-
-            MERGE (t)-[:LINKS_TO]->(a)
-
-            RETURN a
-            """
-
-            result = session.run(
-                query,
+        """Save an article and link it to a tweet
+
+        Returns {'id', 'url', 'status'} with status 'created', 'updated' or
+        'unchanged', or None if the tweet does not exist or the article body
+        is missing from the article store.
+        """
+        article = get_article_store().article(article_data)
+        if article is None:
+            return None
+        with self.connection.session() as session:
+            start = time.perf_counter()
+            summary = session.execute_write(
+                _write_article,
                 tweet_id=tweet_id,
-                url=article_data['url'],
-                title=article_data.get('title', ''),
-                description=article_data.get('description', ''),
-                content=article_data.get('content', '')
+                url=article['url'],
+                title=article['title'],
+                description=article['description'],
+                content=article['content'],
+                content_hash=article['hash']
             )
-
-            return result.single()[0] if result.single() else None
+            METRICS.observe('neo4j_query_seconds', time.perf_counter() - start, query='article')
+            return summary
 
     def extract_and_save_topics(self, tweet_text, tweet_id):
         """Extract topics from tweet and create relationships"""
-        # Simple keyword-based topic extraction
-        topic_keywords = {
-            'AI': ['ai', 'artificial intelligence', 'machine learning', 'deep learning'],
-            'VR/AR': ['vr', 'ar', 'xr', 'virtual reality', 'augmented reality', 'vrchat', 'quest'],
-            'Unity': ['unity', 'unity3d', 'game engine'],
-            'WebGL': ['webgl', 'web graphics', 'three.js'],
-            'Metaverse': ['metaverse', 'メタバース'],
-            'GPT': ['gpt', 'chatgpt', 'llm', 'claude', 'gemini'],
-            'Development': ['開発', 'development', 'coding', 'programming']
-        }
-
-        text_lower = tweet_text.lower()
-        found_topics = []
-
-        for topic_name, keywords in topic_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                found_topics.append(topic_name)
+        found_topics = classify_topics(tweet_text)
 
         # Save topics to Neo4j
-        with self.driver.session() as session:
+        with self.connection.session() as session:
             for topic_name in found_topics:
                 query = """
                 MATCH (t:Tweet {id: $tweet_id})
@@ -160,20 +311,79 @@ class Neo4jSaver:
 
         return found_topics
 
-    def get_statistics(self):
-        """Get database statistics"""
-        with self.driver.session() as session:
-            stats_query = """
-            MATCH (t:Tweet) WITH count(t) as tweets
-            MATCH (a:Article) WITH tweets, count(a) as articles
-            MATCH (u:User) WITH tweets, articles, count(u) as users
-            MATCH (topic:Topic) WITH tweets, articles, users, count(topic) as topics
-            MATCH ()-[r]->() WITH tweets, articles, users, topics, count(r) as relationships
-            RETURN tweets, articles, users, topics, relationships
-            """
+    def save_batch(self, rows):
+        """Write one chunk with a single UNWIND transaction per entity type
+
+        Returns the nodes and relationships the chunk created, taken from the
+        transaction summaries.
+        """
+        deltas = empty_deltas()
+        with self.connection.session() as session:
+            # Order matters: tweets MATCH their users, edges MATCH their tweets
+            for key, query in (('users', UNWIND_USERS_QUERY),
+                               ('tweets', UNWIND_TWEETS_QUERY),
+                               ('articles', UNWIND_ARTICLES_QUERY),
+                               ('links', UNWIND_LINKS_QUERY),
+                               ('mentions', UNWIND_MENTIONS_QUERY)):
+                if rows[key]:
+                    start = time.perf_counter()
+                    counters = session.execute_write(_run_unwind, query, rows[key])
+                    METRICS.observe('neo4j_query_seconds', time.perf_counter() - start, query=key)
+                    if CREATED_LABELS[key]:
+                        deltas[CREATED_LABELS[key]] += counters.nodes_created
+                    else:
+                        deltas[key] += counters.relationships_created
+                    deltas['relationships'] += counters.relationships_created
+        return deltas
+
+    def ingest(self, tweets, collection_info, batch_size=DEFAULT_BATCH_SIZE, on_batch=None,
+               classify_mask=None):
+        """Ingest tweets in chunks of batch_size and return row counts
+
+        counts['added'] holds the nodes and relationships actually created.
+        on_batch(tweets_done, last_tweet) is called after each chunk commits.
+        """
+        counts = {'tweets': 0, 'users': 0, 'articles': 0, 'links': 0, 'mentions': 0}
+        added = empty_deltas()
+        start = time.perf_counter()
+        chunk = []
+
+        def flush():
+            rows = build_batch_rows(chunk, collection_info, classify_mask)
+            for key, value in self.save_batch(rows).items():
+                added[key] += value
+            for key in counts:
+                counts[key] += len(rows[key])
+            if on_batch:
+                on_batch(counts['tweets'], chunk[-1])
+            chunk.clear()
+
+        # Every batch reuses one session
+        with self.connection.session():
+            for tweet in tweets:
+                chunk.append(tweet)
+                if len(chunk) >= batch_size:
+                    flush()
+                    print(f"  Processed {counts['tweets']} tweets...")
+
+            if chunk:
+                flush()
+
+        elapsed = time.perf_counter() - start
+        total_rows = sum(counts.values())
+        rate = total_rows / elapsed if elapsed > 0 else 0.0
+        print(f"  Wrote {total_rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+
+        for key, value in counts.items():
+            METRICS.inc('neo4j_rows_total', value, kind=key)
+        counts['elapsed'] = elapsed
+        counts['added'] = added
+        return counts
 
-            result = session.run(stats_query)
-            record = result.single()
+    def get_statistics(self):
+        """Get database totals from the count store (constant time)"""
+        with self.connection.session() as session:
+            record = session.run(STATISTICS_QUERY).single()
 
             return {
                 'tweets': record['tweets'],
@@ -185,24 +395,102 @@ class Neo4jSaver:
 
 
 def load_tweet_data(filepath):
-    """Load tweet data from JSON file"""
+    """Open tweet data for streaming; 'tweets' is a generator"""
     print(f"Loading data from: {filepath}")
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_tweets(filepath)
 
-    print(f"Loaded {data.get('tweetCount', 0)} tweets")
+    source = 'columnar cache' if 'classify_mask' in data else 'JSON'
+    print(f"Streaming {data.get('tweetCount', 'unknown number of')} tweets ({source})")
     return data
 
 
+def build_collection_info(input_file, tweets_data):
+    """Collection metadata used for tweet IDs and properties"""
+    return {
+        'date': Path(input_file).stem.split('_')[0],
+        'collected_at': tweets_data.get('collectedAt', datetime.now().isoformat()),
+        'source': tweets_data.get('source', 'unknown'),
+        'username': tweets_data.get('username', 'unknown')
+    }
+
+
+def ingest_file(saver, pending_file, ledger, batch_size, dedup=None):
+    """Ingest one file from its watermark, checkpointing after every batch
+
+    Tweets already stored from another collection file are skipped when a
+    dedup index is given; the watermark still counts every raw tweet.
+    """
+    print(f"\nInput file: {pending_file.path}")
+
+    tweets_data = load_tweet_data(pending_file.path)
+    collection_info = build_collection_info(pending_file.path, tweets_data)
+
+    tweets = tweets_data['tweets']
+    if pending_file.start:
+        print(f"  Resuming after {pending_file.start} already ingested tweets")
+        tweets = itertools.islice(tweets, pending_file.start, None)
+    tweets = DedupFilter(tweets, dedup, pending_file.path.stem)
+
+    last_index = [None]
+
+    def checkpoint(tweets_done, last_tweet):
+        last_index[0] = last_tweet.get('index')
+        if dedup:
+            dedup.commit()
+        ledger.record(pending_file, pending_file.start + tweets.consumed, last_index[0])
+
+    print(f"Processing tweets (batch size {batch_size})...")
+    with METRICS.span('ingest', file=pending_file.path.name) as span:
+        counts = saver.ingest(tweets, collection_info, batch_size, on_batch=checkpoint,
+                              classify_mask=tweets_data.get('classify_mask'))
+        span['tweets'] = counts['tweets']
+    ledger.record(pending_file, pending_file.start + tweets.consumed, last_index[0], complete=True)
+
+    print(f"  Tweets: {counts['tweets']}, Articles: {counts['articles']}, "
+          f"Topic mentions: {counts['mentions']}")
+    if tweets.skipped:
+        print(f"  Skipped {tweets.skipped} duplicates of tweets from other collection files")
+    return counts
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Save AI news to Neo4j")
+    parser.add_argument('input_file', nargs='?',
+                        help="Tweet JSON file (default: newest in data/tweets/)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Tweets per UNWIND transaction (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ingest only new files and new tweets across data/tweets/ "
+                             "(or only the new tweets of input_file)")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Keep tweets already stored from other collection files")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile each stage with cProfile and print the hottest functions")
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP,
+                        help=f"Profile: functions shown per stage (default: {DEFAULT_TOP})")
+    parser.add_argument('--profile-dir',
+                        help="Profile: directory for .pstats files (default: logs/profiles/<run>)")
+    return parser.parse_args(argv)
+
+
 def main():
     """Main function"""
+    args = parse_args()
+
+    with profile_stages(args.profile, args.profile_dir, 'save_to_neo4j', args.profile_top):
+        run_save(args)
+
+
+def run_save(args):
+    """Ingest the selected collection files and print database statistics"""
     print("=" * 60)
     print("Save AI News to Neo4j")
     print("=" * 60)
 
     # Check if Neo4j is available
-    if not GraphDatabase:
+    if not neo4j_available():
         print("\nError: neo4j package not installed")
         print("Install with: pip install neo4j")
         sys.exit(1)
@@ -210,36 +498,36 @@ def main():
     # Setup paths
     project_root = Path(__file__).parent.parent
     data_dir = project_root / 'data' / 'tweets'
-
-    # Find the most recent tweet file
-    if len(sys.argv) > 1:
-        input_file = Path(sys.argv[1])
+    ledger = IngestLedger()
+
+    if args.incremental:
+        # Only files (or tail of files) not yet recorded in the ledger
+        if args.input_file:
+            pending_file = ledger.check(args.input_file)
+            pending_files = [pending_file] if pending_file else []
+        else:
+            pending_files = ledger.scan(data_dir)
+        if not pending_files:
+            print("\nNothing new to ingest (all files are up to date)")
+            return
+        print(f"\n{len(pending_files)} files with new tweets")
     else:
-        json_files = sorted(data_dir.glob('*.json'), reverse=True)
-        if not json_files:
-            print("\nNo tweet data files found in data/tweets/")
-            sys.exit(1)
-        input_file = json_files[0]
-
-    print(f"\nInput file: {input_file}")
-
-    # Load data
-    tweets_data = load_tweet_data(input_file)
-
-    # Extract collection info
-    filename = input_file.stem
-    date_part = filename.split('_')[0]
-
-    collection_info = {
-        'date': date_part,
-        'collected_at': tweets_data.get('collectedAt', datetime.now().isoformat()),
-        'source': tweets_data.get('source', 'unknown'),
-        'username': tweets_data.get('username', 'unknown')
-    }
+        # Find the most recent tweet file
+        if args.input_file:
+            input_file = Path(args.input_file)
+        else:
+            json_files = find_collection_files(data_dir)
+            if not json_files:
+                print("\nNo tweet data files found in data/tweets/")
+                sys.exit(1)
+            input_file = json_files[0]
+        pending_files = [ledger.fingerprint(input_file)]
 
     # Connect to Neo4j
     try:
         saver = Neo4jSaver(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+        # The driver connects lazily; check now so a down server fails fast with this message
+        saver.connection.verify()
     except Exception as e:
         print(f"\nError connecting to Neo4j: {e}")
         print("\nMake sure Neo4j is running and credentials are correct:")
@@ -251,41 +539,31 @@ def main():
         print("  export NEO4J_PASSWORD='your-password'")
         sys.exit(1)
 
+    dedup = None if args.no_dedup else DedupIndex()
+
     try:
         # Create constraints
         saver.create_constraints()
 
-        # Process tweets
-        print(f"\nProcessing {len(tweets_data['tweets'])} tweets...")
-
-        tweet_count = 0
-        article_count = 0
-        topic_count = 0
-
-        for tweet in tweets_data['tweets']:
-            # Save tweet
-            tweet_id = f"{date_part}_{tweet['index']}"
-            saver.save_tweet(tweet, collection_info)
-            tweet_count += 1
-
-            # Save linked articles
-            for article in tweet.get('linkedContent', []):
-                saver.save_article(article, tweet_id)
-                article_count += 1
-
-            # Extract and save topics
-            topics = saver.extract_and_save_topics(tweet['text'], tweet_id)
-            topic_count += len(topics)
-
-            if (tweet_count % 5) == 0:
-                print(f"  Processed {tweet_count} tweets...")
+        # Process tweets in UNWIND batches
+        added = empty_deltas()
+        with METRICS.run('save_to_neo4j', files=len(pending_files)):
+            for pending_file in pending_files:
+                counts = ingest_file(saver, pending_file, ledger, args.batch_size, dedup)
+                for key, value in counts['added'].items():
+                    added[key] += value
 
         # Get statistics
-        stats = saver.get_statistics()
+        with METRICS.span('statistics'):
+            stats = saver.get_statistics()
 
         print("\n" + "=" * 60)
         print("Save complete!")
         print("=" * 60)
+        print("\nThis run added:")
+        print(f"  Tweets: {added['tweets']}, Articles: {added['articles']}, "
+              f"Users: {added['users']}, Topics: {added['topics']}, "
+              f"Article links: {added['links']}, Relationships: {added['relationships']}")
         print(f"\nDatabase Statistics:")
         print(f"  Total Tweets: {stats['tweets']}")
         print(f"  Total Articles: {stats['articles']}")
@@ -293,8 +571,11 @@ def main():
         print(f"  Total Topics: {stats['topics']}")
         print(f"  Total Relationships: {stats['relationships']}")
         print()
+        saver.connection.print_stats()
 
     finally:
+        if dedup:
+            dedup.close()
         saver.close()
 
 
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Full-Text Search Index
+Local BM25 search over collected tweets and their linked articles, without
+Neo4j or any other running database
+
+Tweet text and linkedContent title, description and content are indexed in
+a SQLite FTS5 table (data/search_index.sqlite3). Text is tokenised here, not
+by SQLite: English and other Latin-script text by words, Japanese (kana and
+kanji runs) by character bigrams. A Japanese query term matches as a phrase
+of its bigrams, i.e. as a substring.
+
+The index is updated incrementally: only collection files whose size or
+mtime changed are re-indexed.
+
+Usage:
+  python scripts/search_index.py "生成AI"                 Top 10 hits (updates the index first)
+  python scripts/search_index.py "claude code review" -k 20
+  python scripts/search_index.py "vr*"                   Prefix match
+  python scripts/search_index.py --update                Index new and changed files
+  python scripts/search_index.py --rebuild               Rebuild from scratch
+  python scripts/search_index.py --stats
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+from article_store import get_article_store
+from tweet_cache import load_tweets
+from tweet_stream import find_collection_files
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_DATA_DIR = PROJECT_ROOT / 'data' / 'tweets'
+DEFAULT_INDEX_PATH = PROJECT_ROOT / 'data' / 'search_index.sqlite3'
+
+# The scheduler keeps the index up to date unless SEARCH_INDEX=0
+INDEX_ENABLED = os.getenv('SEARCH_INDEX', '1') != '0'
+DEFAULT_TOP_K = 10
+# BM25 column weights: text, article title, description, content
+COLUMN_WEIGHTS = (1.0, 1.5, 1.0, 0.5)
+INSERT_CHUNK = 2000
+
+# Words (after NFKC and lower-casing) and runs of CJK characters
+_TOKEN = re.compile(
+    r'[0-9a-z_\u00c0-\u024f]+'
+    r'|[\u3005\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+'
+)
+# Anything from here up is in the CJK group above
+_CJK_START = '\u3005'
+
+# The FTS5 'ascii' tokenizer splits on ASCII spaces and punctuation only, so the
+# space-separated tokens produced by tokenize() are indexed as they are
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    tweets INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    tweet_index INTEGER,
+    author TEXT,
+    timestamp TEXT,
+    text TEXT NOT NULL,
+    articles TEXT
+);
+CREATE INDEX IF NOT EXISTS docs_file ON docs (file);
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    text, title, description, content, content='', tokenize='ascii'
+);
+"""
+
+
+class StaleIndex(Exception):
+    """Indexed article text is no longer available, so rows cannot be removed exactly"""
+
+
+def tokenize(text):
+    """Search tokens: words, and character bigrams for CJK runs"""
+    tokens = []
+    for match in _TOKEN.finditer(unicodedata.normalize('NFKC', text or '').lower()):
+        token = match.group()
+        if token[0] < _CJK_START or len(token) == 1:
+            tokens.append(token)
+        else:
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+def match_expression(query):
+    """FTS5 MATCH expression requiring every query word (None if nothing to search)
+
+    The tokens of one word must be adjacent, so "生成AI" or "gpt-4o" match as
+    written rather than as separate terms. A trailing * matches a prefix (vr*).
+    """
+    clauses = []
+    for word in unicodedata.normalize('NFKC', query).lower().split():
+        runs = _TOKEN.findall(word)
+        if not runs:
+            continue
+        clause = '"' + ' '.join(tokenize(word)) + '"'
+        if word.endswith('*') or (runs[-1][0] >= _CJK_START and len(runs[-1]) == 1):
+            # Prefix match; a single trailing CJK character is indexed as the
+            # first half of a bigram
+            clause += ' *'
+        clauses.append(clause)
+    return ' AND '.join(clauses) or None
+
+
+def _column_text(values):
+    return ' '.join(' '.join(tokenize(value)) for value in values if value)
+
+
+class SearchIndex:
+    """SQLite FTS5 index of tweets and linked articles"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        self.store = get_article_store()
+
+    def _columns(self, text, articles, contents):
+        """The four FTS column values for a tweet"""
+        return (_column_text([text]),
+                _column_text(article['title'] for article in articles),
+                _column_text(article['description'] for article in articles),
+                _column_text(contents))
+
+    def _remove_file(self, name):
+        """Delete a file's rows; contentless FTS5 needs the indexed values to remove them"""
+        rows = self.conn.execute(
+            "SELECT id, text, articles FROM docs WHERE file = ?", (name,)).fetchall()
+        deletes = []
+        for doc_id, text, articles_json in rows:
+            articles = json.loads(articles_json) if articles_json else []
+            contents = []
+            for article in articles:
+                stored = self.store.get(article['hash'])
+                if stored is None:
+                    raise StaleIndex(f"article {article['hash'][:12]} is not in the article store")
+                contents.append(stored['content'])
+            deletes.append((doc_id, *self._columns(text, articles, contents)))
+
+        self.conn.executemany(
+            "INSERT INTO search (search, rowid, text, title, description, content) "
+            "VALUES ('delete', ?, ?, ?, ?, ?)", deletes)
+        self.conn.execute("DELETE FROM docs WHERE file = ?", (name,))
+        self.conn.execute("DELETE FROM files WHERE name = ?", (name,))
+
+    def index_file(self, source):
+        """(Re-)index one collection file; returns the number of tweets indexed"""
+        source = Path(source)
+        stat = source.stat()
+        next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM docs").fetchone()[0]
+        count = 0
+
+        with self.conn:
+            self._remove_file(source.name)
+            docs, rows = [], []
+            for tweet in load_tweets(source)['tweets']:
+                text = tweet.get('text') or ''
+                resolved = [self.store.article(linked) for linked in tweet.get('linkedContent') or []]
+                resolved = [article for article in resolved if article is not None]
+                articles = [{'url': article['url'], 'title': article['title'],
+                             'description': article['description'], 'hash': article['hash']}
+                            for article in resolved]
+                doc_id = next_id + count
+                docs.append((doc_id, source.name, tweet.get('index', count), tweet.get('author'),
+                             tweet.get('timestamp'), text,
+                             json.dumps(articles, ensure_ascii=False) if articles else None))
+                rows.append((doc_id, *self._columns(
+                    text, articles, [article['content'] for article in resolved])))
+                count += 1
+                if len(docs) >= INSERT_CHUNK:
+                    self._insert(docs, rows)
+                    docs, rows = [], []
+            self._insert(docs, rows)
+            self.conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?)",
+                              (source.name, stat.st_size, stat.st_mtime_ns, count, time.time()))
+        # Deleting these rows later reads article bodies back from the store
+        self.store.commit()
+        return count
+
+    def _insert(self, docs, rows):
+        self.conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?, ?, ?, ?)", docs)
+        self.conn.executemany(
+            "INSERT INTO search (rowid, text, title, description, content) VALUES (?, ?, ?, ?, ?)",
+            rows)
+
+    def update(self, data_dir=DEFAULT_DATA_DIR):
+        """Index new and changed collection files and drop deleted ones
+
+        Returns a list of (file name, tweets indexed).
+        """
+        sources = find_collection_files(data_dir) if Path(data_dir).exists() else []
+        indexed = {name: (size, mtime_ns) for name, size, mtime_ns in
+                   self.conn.execute("SELECT name, size, mtime_ns FROM files")}
+        try:
+            with self.conn:
+                for name in set(indexed) - {source.name for source in sources}:
+                    self._remove_file(name)
+
+            updated = []
+            for source in reversed(sources):
+                stat = source.stat()
+                if indexed.get(source.name) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                updated.append((source.name, self.index_file(source)))
+            return updated
+        except StaleIndex as e:
+            print(f"Search index is out of date ({e}); rebuilding")
+            self.clear()
+            return self.update(data_dir)
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute("INSERT INTO search (search) VALUES ('delete-all')")
+
+    def search(self, query, k=DEFAULT_TOP_K):
+        """Top k tweets for query by BM25, best first"""
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+        ranked = self.conn.execute(
+            f"SELECT rowid, bm25(search, {weights}) AS score FROM search WHERE search MATCH ? "
+            "ORDER BY score LIMIT ?", (expression, k)).fetchall()
+
+        hits = []
+        for doc_id, score in ranked:
+            file, tweet_index, author, timestamp, text, articles = self.conn.execute(
+                "SELECT file, tweet_index, author, timestamp, text, articles FROM docs WHERE id = ?",
+                (doc_id,)).fetchone()
+            hits.append({
+                # bm25() is negative, lower is better; report the usual positive score
+                'score': -score,
+                'file': file,
+                'index': tweet_index,
+                'author': author,
+                'timestamp': timestamp,
+                'text': text,
+                'articles': json.loads(articles) if articles else []
+            })
+        return hits
+
+    def stats(self):
+        files, tweets = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tweets), 0) FROM files").fetchone()
+        size = self.path.stat().st_size if self.path.exists() else 0
+        return {'files': files, 'tweets': tweets, 'bytes': size}
+
+    def close(self):
+        self.conn.close()
+
+
+def print_hits(hits):
+    for rank, hit in enumerate(hits, 1):
+        text = ' '.join(hit['text'].split())
+        print(f"{rank:>3}. [{hit['score']:.2f}] @{hit['author']} {hit['timestamp'] or ''} "
+              f"({hit['file']} #{hit['index']})")
+        print(f"     {text[:120]}{'…' if len(text) > 120 else ''}")
+        for article in hit['articles']:
+            print(f"     → {article['title'][:100]} {article['url']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Search collected tweets and linked articles")
+    parser.add_argument('query', nargs='*', help="Search terms (all must match)")
+    parser.add_argument('-k', type=int, default=DEFAULT_TOP_K,
+                        help=f"Number of hits (default: {DEFAULT_TOP_K})")
+    parser.add_argument('--update', action='store_true', help="Index new and changed files")
+    parser.add_argument('--rebuild', action='store_true', help="Re-index every file")
+    parser.add_argument('--no-update', action='store_true',
+                        help="Search without checking data/tweets/ for changes")
+    parser.add_argument('--stats', action='store_true', help="Show index size")
+    parser.add_argument('--data-dir', default=str(DEFAULT_DATA_DIR), help="Collection directory")
+    parser.add_argument('--index', default=str(DEFAULT_INDEX_PATH), help="Index database")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main function"""
+    args = parse_args(argv)
+    index = SearchIndex(args.index)
+    try:
+        if args.rebuild:
+            index.clear()
+        if args.rebuild or args.update or (args.query and not args.no_update):
+            start = time.perf_counter()
+            updated = index.update(args.data_dir)
+            for name, count in updated:
+                print(f"Indexed {name}: {count:,} tweets")
+            if updated or args.update or args.rebuild:
+                print(f"Index updated in {time.perf_counter() - start:.1f}s")
+
+        if args.stats or not (args.query or args.update or args.rebuild):
+            stats = index.stats()
+            print(f"Search index: {index.path}")
+            print(f"  {stats['files']} files, {stats['tweets']:,} tweets, "
+                  f"{stats['bytes'] / 1024 / 1024:.1f} MB")
+
+        if args.query:
+            query = ' '.join(args.query)
+            start = time.perf_counter()
+            hits = index.search(query, args.k)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{len(hits)} hits for \"{query}\" in {elapsed:.1f} ms")
+            print_hits(hits)
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Topic Classifier
+Shared keyword taxonomy compiled once into a single regex, so every topic
+in a tweet is found in one scan
+
+Latin keywords only match on word boundaries ('ar' does not match 'start',
+'ai' does not match 'said'); a trailing version number or plural 's' is
+allowed ('gpt4', 'llms'). Japanese keywords match as plain substrings.
+"""
+
+import re
+
+# Topic name -> keywords (lowercase)
+TOPIC_TAXONOMY = {
+    'AI': ['ai', 'artificial intelligence', 'machine learning', 'deep learning',
+           'neural', 'transformer', '機械学習', '深層学習', 'ディープラーニング'],
+    'GPT': ['gpt', 'chatgpt', 'llm', 'claude', 'gemini', 'anthropic', 'openai'],
+    'VR/AR': ['vr', 'ar', 'xr', 'virtual reality', 'augmented reality', 'vrchat', 'quest'],
+    'Unity': ['unity', 'unity3d', 'game engine'],
+    'WebGL': ['webgl', 'web graphics', 'three.js'],
+    'Metaverse': ['metaverse', 'メタバース'],
+    'Development': ['開発', 'development', 'coding', 'programming']
+}
+
+# Topics that make a tweet AI-related for the report
+REPORT_TOPICS = ('AI', 'GPT', 'VR/AR', 'Unity', 'WebGL', 'Metaverse')
+
+
+def _trie_pattern(keywords):
+    """Build a prefix-factored alternation ('unity(?:3d)?') from keywords
+
+    Python's regex engine tries alternatives one by one, so sharing
+    prefixes keeps the work per text position close to a single trie walk.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        terminal = '' in node
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if terminal else '')
+
+    return build(trie)
+
+
+class TopicClassifier:
+    """Single-pass multi-keyword matcher over a topic taxonomy
+
+    Each topic gets one bit; classify_mask() returns the OR of the bits of
+    every keyword found in the text.
+    """
+
+    def __init__(self, taxonomy=TOPIC_TAXONOMY):
+        self.topics = list(taxonomy)
+        self.bits = {topic: 1 << i for i, topic in enumerate(self.topics)}
+        self._keyword_masks = {}
+
+        for topic, keywords in taxonomy.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                self._keyword_masks[keyword] = self._keyword_masks.get(keyword, 0) | self.bits[topic]
+
+        latin = [k for k in self._keyword_masks if k.isascii()]
+        other = [k for k in self._keyword_masks if not k.isascii()]
+
+        parts = []
+        if latin:
+            parts.append(r'(?<![a-z0-9])(' + _trie_pattern(latin) + r')s?(?![a-z])')
+        if other:
+            parts.append('(' + _trie_pattern(other) + ')')
+        self._regex = re.compile('|'.join(parts))
+        self._mask_topics = {}
+
+    def mask_for(self, topics):
+        """Return the bitmask for a collection of topic names"""
+        mask = 0
+        for topic in topics:
+            mask |= self.bits[topic]
+        return mask
+
+    def classify_mask(self, text):
+        """Return the topic bitmask for text"""
+        mask = 0
+        keyword_masks = self._keyword_masks
+        for match in self._regex.finditer(text.lower()):
+            mask |= keyword_masks[match.group(match.lastindex)]
+        return mask
+
+    def topics_for_mask(self, mask):
+        """Return topic names for a bitmask, in taxonomy order"""
+        topics = self._mask_topics.get(mask)
+        if topics is None:
+            topics = [topic for topic in self.topics if mask & self.bits[topic]]
+            self._mask_topics[mask] = topics
+        return topics
+
+    def classify(self, text):
+        """Return every topic mentioned in text, in taxonomy order"""
+        return self.topics_for_mask(self.classify_mask(text))
+
+
+# Shared instance; compiled once at import
+CLASSIFIER = TopicClassifier()
+REPORT_MASK = CLASSIFIER.mask_for(REPORT_TOPICS)
+
+
+def classify_topics(text):
+    """Return every topic mentioned in text"""
+    return CLASSIFIER.classify(text)
+
+
+def is_ai_related(text):
+    """Return True if text mentions any report topic"""
+    return bool(CLASSIFIER.classify_mask(text) & REPORT_MASK)
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Topic Rollups
+Per-topic and per-author tweet counts in daily and weekly buckets, kept up
+to date as collection files are processed (data/rollups.sqlite3)
+
+Each file's counts are stored next to the totals, so a changed file is
+re-counted without double counting, and tweets already seen in another
+collection file are skipped via the dedup index. Trend queries read a
+handful of buckets instead of scanning every Tweet-[:MENTIONS]->Topic edge.
+Days are UTC dates of the tweet timestamps; weeks start on Monday. Counts
+are kept when collection files are deleted.
+
+Usage:
+  python scripts/topic_rollups.py                         Movers over the last 7 days (updates first)
+  python scripts/topic_rollups.py movers --kind author -n 10
+  python scripts/topic_rollups.py movers --date 2026-01-14 --days 7
+  python scripts/topic_rollups.py series GPT              Weekly counts for a topic
+  python scripts/topic_rollups.py series @goromian --daily
+  python scripts/topic_rollups.py update                  Count new and changed files
+  python scripts/topic_rollups.py rebuild
+  python scripts/topic_rollups.py stats
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+from dedup_index import DedupFilter, DedupIndex
+from topic_classifier import CLASSIFIER
+from tweet_cache import load_tweets
+from tweet_stream import find_collection_files
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_DATA_DIR = PROJECT_ROOT / 'data' / 'tweets'
+DEFAULT_ROLLUP_PATH = PROJECT_ROOT / 'data' / 'rollups.sqlite3'
+
+# The scheduler and the report prompt use the rollups unless ROLLUPS=0
+ROLLUPS_ENABLED = os.getenv('ROLLUPS', '1') != '0'
+
+# 'total' has a single key '' holding the number of tweets
+KINDS = ('topic', 'author', 'total')
+PERIODS = ('day', 'week')
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_MOVERS = 5
+
+_DAY = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    tweets INTEGER NOT NULL,
+    rolled_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_counts (
+    file_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (file_id, day, kind, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counts (
+    period TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (period, kind, bucket, key)
+) WITHOUT ROWID;
+"""
+
+
+def week_start(day):
+    """Monday of the week containing day ('2026-01-14' -> '2026-01-12')"""
+    d = date.fromisoformat(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+def file_day(source):
+    """Collection date from a file name like 20260114_goromian.json, or None"""
+    date_part = Path(source).stem.split('_')[0]
+    if len(date_part) != 8 or not date_part.isdigit():
+        return None
+    return f"{date_part[:4]}-{date_part[4:6]}-{date_part[6:8]}"
+
+
+def format_change(count, previous):
+    """'+40, +50%' style change from previous to count"""
+    if not previous:
+        return '新規' if count else '±0'
+    delta = count - previous
+    return f"{delta:+d}, {delta / previous:+.0%}"
+
+
+class TopicRollups:
+    """SQLite store of daily and weekly topic/author counts"""
+
+    def __init__(self, path=DEFAULT_ROLLUP_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def is_current(self, source):
+        """True if source was counted and has not changed since"""
+        stat = Path(source).stat()
+        row = self.conn.execute(
+            "SELECT size, mtime_ns FROM files WHERE name = ?", (Path(source).name,)).fetchone()
+        return row == (stat.st_size, stat.st_mtime_ns)
+
+    def add_file(self, source, tweets=None, classify_mask=None, use_dedup=True):
+        """Count a collection file; returns the number of tweets counted, or None if up to date
+
+        tweets (already deduplicated) and classify_mask(tweet) may be passed
+        by callers that have parsed the file; otherwise it is loaded here.
+        """
+        source = Path(source)
+        if self.is_current(source):
+            return None
+        stat = source.stat()
+
+        index = None
+        if tweets is None:
+            data = load_tweets(source)
+            classify_mask = data.get('classify_mask')
+            index = DedupIndex() if use_dedup else None
+            tweets = DedupFilter(data['tweets'], index, source.stem)
+        classify_mask = classify_mask or (lambda tweet: CLASSIFIER.classify_mask(tweet.get('text', '')))
+
+        default_day = file_day(source)
+        counter = Counter()
+        count = 0
+        try:
+            for tweet in tweets:
+                timestamp = tweet.get('timestamp') or ''
+                day = timestamp[:10] if _DAY.match(timestamp) else default_day
+                if day is None:
+                    continue
+                count += 1
+                counter[day, 'total', ''] += 1
+                counter[day, 'author', tweet.get('author') or 'unknown'] += 1
+                for topic in CLASSIFIER.topics_for_mask(classify_mask(tweet)):
+                    counter[day, 'topic', topic] += 1
+        finally:
+            if index:
+                index.close()
+
+        rows = [(day, kind, key, n) for (day, kind, key), n in counter.items()]
+        with self.conn:
+            self._remove_file(source.name)
+            file_id = self.conn.execute(
+                "INSERT INTO files (name, size, mtime_ns, tweets, rolled_at) VALUES (?, ?, ?, ?, ?)",
+                (source.name, stat.st_size, stat.st_mtime_ns, count, time.time())).lastrowid
+            self.conn.executemany(
+                "INSERT INTO file_counts VALUES (?, ?, ?, ?, ?)",
+                [(file_id, *row) for row in rows])
+            self._apply(rows, 1)
+        return count
+
+    def _apply(self, rows, sign):
+        """Add (sign=1) or subtract (sign=-1) daily rows from the day and week totals"""
+        totals = Counter()
+        weeks = {}
+        for day, kind, key, n in rows:
+            week = weeks.get(day) or weeks.setdefault(day, week_start(day))
+            totals['day', kind, day, key] += sign * n
+            totals['week', kind, week, key] += sign * n
+        self.conn.executemany(
+            "INSERT INTO counts VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (period, kind, bucket, key) DO UPDATE SET count = count + excluded.count",
+            [(*bucket, n) for bucket, n in totals.items()])
+        if sign < 0:
+            self.conn.execute("DELETE FROM counts WHERE count <= 0")
+
+    def _remove_file(self, name):
+        row = self.conn.execute("SELECT id FROM files WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return
+        rows = self.conn.execute(
+            "SELECT day, kind, key, count FROM file_counts WHERE file_id = ?", row).fetchall()
+        self._apply(rows, -1)
+        self.conn.execute("DELETE FROM file_counts WHERE file_id = ?", row)
+        self.conn.execute("DELETE FROM files WHERE id = ?", row)
+
+    def update(self, data_dir=DEFAULT_DATA_DIR, use_dedup=True):
+        """Count new and changed collection files, oldest first
+
+        Returns a list of (file name, tweets counted).
+        """
+        sources = find_collection_files(data_dir) if Path(data_dir).exists() else []
+        updated = []
+        # Oldest first, so a tweet is counted under the file that first had it
+        for source in reversed(sources):
+            count = self.add_file(source, use_dedup=use_dedup)
+            if count is not None:
+                updated.append((source.name, count))
+        return updated
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM counts")
+            self.conn.execute("DELETE FROM file_counts")
+            self.conn.execute("DELETE FROM files")
+
+    def latest_day(self):
+        """Most recent day with counted tweets, or None"""
+        return self.conn.execute(
+            "SELECT MAX(bucket) FROM counts WHERE period = 'day' AND kind = 'total'").fetchone()[0]
+
+    def window(self, kind, end, days=DEFAULT_WINDOW_DAYS):
+        """{key: count} summed over the days days ending at end"""
+        start = (date.fromisoformat(end) - timedelta(days=days - 1)).isoformat()
+        return dict(self.conn.execute(
+            "SELECT key, SUM(count) FROM counts WHERE period = 'day' AND kind = ? "
+            "AND bucket BETWEEN ? AND ? GROUP BY key", (kind, start, end)))
+
+    def movers(self, kind='topic', end=None, days=DEFAULT_WINDOW_DAYS, limit=DEFAULT_MOVERS):
+        """Counts for the days days ending at end against the days before
+
+        Returns a dict with the window bounds and 'rows' of
+        {key, count, previous, delta}, largest change first (limit=None: all).
+        """
+        end = end or self.latest_day()
+        if end is None:
+            return None
+        previous_end = (date.fromisoformat(end) - timedelta(days=days)).isoformat()
+        current = self.window(kind, end, days)
+        previous = self.window(kind, previous_end, days)
+
+        rows = [{'key': key,
+                 'count': current.get(key, 0),
+                 'previous': previous.get(key, 0),
+                 'delta': current.get(key, 0) - previous.get(key, 0)}
+                for key in set(current) | set(previous)]
+        rows.sort(key=lambda row: (-abs(row['delta']), -row['count'], row['key']))
+        return {
+            'kind': kind,
+            'start': (date.fromisoformat(end) - timedelta(days=days - 1)).isoformat(),
+            'end': end,
+            'days': days,
+            'rows': rows if limit is None else rows[:limit]
+        }
+
+    def series(self, kind, key, period='week', count=8, end=None):
+        """[(bucket, count)] for the last count buckets up to end, zeros included"""
+        end = end or self.latest_day()
+        if end is None:
+            return []
+        step = 7 if period == 'week' else 1
+        last = date.fromisoformat(week_start(end) if period == 'week' else end)
+        buckets = [(last - timedelta(days=step * i)).isoformat() for i in range(count - 1, -1, -1)]
+        counts = dict(self.conn.execute(
+            "SELECT bucket, count FROM counts WHERE period = ? AND kind = ? "
+            "AND bucket BETWEEN ? AND ? AND key = ?", (period, kind, buckets[0], buckets[-1], key)))
+        return [(bucket, counts.get(bucket, 0)) for bucket in buckets]
+
+    def stats(self):
+        files, tweets = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tweets), 0) FROM files").fetchone()
+        first, last = self.conn.execute(
+            "SELECT MIN(bucket), MAX(bucket) FROM counts WHERE period = 'day' AND kind = 'total'"
+        ).fetchone()
+        size = self.path.stat().st_size if self.path.exists() else 0
+        return {'files': files, 'tweets': tweets, 'first_day': first, 'last_day': last, 'bytes': size}
+
+    def close(self):
+        self.conn.close()
+
+
+def trend_text(date_str, path=None, days=DEFAULT_WINDOW_DAYS, limit=DEFAULT_MOVERS):
+    """Trend section for the report prompt
+
+    Returns '' when there are no rollups for date_str, or when date_str is
+    not an ISO date (YYYY-MM-DD).
+    """
+    path = Path(path or DEFAULT_ROLLUP_PATH)
+    if not ROLLUPS_ENABLED or not path.exists():
+        return ''
+    try:
+        date.fromisoformat(date_str)
+    except (TypeError, ValueError):
+        return ''
+    rollups = TopicRollups(path)
+    try:
+        total = rollups.movers('total', date_str, days)
+        if total is None or not total['rows'] or not total['rows'][0]['count']:
+            return ''
+        topics = rollups.movers('topic', date_str, days, limit=None)
+        authors = rollups.movers('author', date_str, days, limit)
+    finally:
+        rollups.close()
+
+    tweets = total['rows'][0]
+    lines = [f"【トレンド（{total['start']}〜{total['end']}の{days}日間、前の{days}日間との比較）】",
+             f"ツイート数: {tweets['count']}件（前の{days}日間 {tweets['previous']}件、"
+             f"{format_change(tweets['count'], tweets['previous'])}）",
+             "トピック別の言及数:"]
+    for row in sorted(topics['rows'], key=lambda row: -row['count']):
+        lines.append(f"- {row['key']}: {row['count']}件（{format_change(row['count'], row['previous'])}）")
+    lines.append("投稿数の変化が大きい投稿者:")
+    for row in authors['rows']:
+        lines.append(f"- @{row['key']}: {row['count']}件（{format_change(row['count'], row['previous'])}）")
+    lines.append("（レポートでは、前の期間から伸びている話題にも触れてください）")
+    return '\n'.join(lines)
+
+
+def print_movers(movers):
+    if movers is None:
+        print("No rollups yet; run: python scripts/topic_rollups.py update")
+        return
+    print(f"{movers['kind']} counts {movers['start']} .. {movers['end']} vs the previous {movers['days']} days")
+    for row in movers['rows']:
+        print(f"  {row['key'] or 'tweets':<24} {row['count']:>8,} {row['previous']:>8,}  "
+              f"{format_change(row['count'], row['previous'])}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Daily and weekly topic and author counts")
+    parser.add_argument('command', nargs='?', default='movers',
+                        choices=('movers', 'series', 'update', 'rebuild', 'stats'))
+    parser.add_argument('key', nargs='?', help="series: topic name, or @author")
+    parser.add_argument('--kind', choices=KINDS, default='topic', help="movers: what to count")
+    parser.add_argument('--date', help="movers/series: last day (default: latest counted day)")
+    parser.add_argument('--days', type=int, default=DEFAULT_WINDOW_DAYS,
+                        help=f"movers: window length (default: {DEFAULT_WINDOW_DAYS})")
+    parser.add_argument('-n', type=int, help="movers: rows to show; series: buckets (default: 8)")
+    parser.add_argument('--daily', action='store_true', help="series: daily instead of weekly buckets")
+    parser.add_argument('--no-update', action='store_true',
+                        help="Read without counting new files in data/tweets/ first")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Count tweets already seen in other collection files")
+    parser.add_argument('--data-dir', default=str(DEFAULT_DATA_DIR), help="Collection directory")
+    parser.add_argument('--rollups', default=str(DEFAULT_ROLLUP_PATH), help="Rollup database")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main function"""
+    args = parse_args(argv)
+    if args.command == 'series' and not args.key:
+        print("Usage: python scripts/topic_rollups.py series TOPIC|@AUTHOR")
+        sys.exit(1)
+
+    rollups = TopicRollups(args.rollups)
+    try:
+        if args.command == 'rebuild':
+            rollups.clear()
+        if args.command in ('update', 'rebuild') or not (args.no_update or args.command == 'stats'):
+            start = time.perf_counter()
+            updated = rollups.update(args.data_dir, use_dedup=not args.no_dedup)
+            for name, count in updated:
+                print(f"Counted {name}: {count:,} tweets")
+            if updated or args.command in ('update', 'rebuild'):
+                print(f"Rollups updated in {time.perf_counter() - start:.1f}s")
+
+        if args.command == 'stats':
+            stats = rollups.stats()
+            print(f"Rollups: {rollups.path}")
+            print(f"  {stats['files']} files, {stats['tweets']:,} tweets, "
+                  f"{stats['first_day'] or '-'} .. {stats['last_day'] or '-'}, "
+                  f"{stats['bytes'] / 1024:.0f} KB")
+        elif args.command == 'series':
+            kind, key = ('author', args.key[1:]) if args.key.startswith('@') else ('topic', args.key)
+            period = 'day' if args.daily else 'week'
+            series = rollups.series(kind, key, period, args.n or 8, args.date)
+            peak = max([count for _, count in series] + [1])
+            print(f"{args.key} per {period}")
+            for bucket, count in series:
+                print(f"  {bucket} {count:>8,} {'#' * round(40 * count / peak)}")
+        elif args.command == 'movers':
+            print_movers(rollups.movers(args.kind, args.date, args.days, args.n or DEFAULT_MOVERS))
+    finally:
+        rollups.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar Tweet Cache
+Compact binary copy of each collection file in data/tweet_cache/, so
+repeated analysis over weeks of history skips the JSON parse
+
+One <file name>.twc file per collection (X.json -> X.json.twc):
+
+  header     metadata, interned author table, section offsets, and the
+             source size/mtime and taxonomy it was built from
+  columns    author id (uint32), timestamp in ms (int64), topic bitmask
+             (uint32), flags (uint8), index (int64), text and extra offsets
+  text       UTF-8 tweet texts, read through mmap
+  extras     remaining fields (urls, linkedContent, ...) as JSON per tweet;
+             article bodies are moved to the article store and referenced
+             by content_hash
+
+A cache is used only while its source file and the topic taxonomy are
+unchanged; stale caches are rebuilt by the build command (and by the
+scheduler after it processes a file).
+
+Usage:
+  python scripts/tweet_cache.py                 Build caches for new or changed files
+  python scripts/tweet_cache.py --rebuild       Rebuild every cache
+  python scripts/tweet_cache.py stats           Show cache files and sizes
+  python scripts/tweet_cache.py FILE            Build the cache for one collection file
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+from article_store import get_article_store
+from topic_classifier import CLASSIFIER, TOPIC_TAXONOMY
+from tweet_stream import find_collection_files, load_collection
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_DATA_DIR = PROJECT_ROOT / 'data' / 'tweets'
+DEFAULT_CACHE_DIR = PROJECT_ROOT / 'data' / 'tweet_cache'
+CACHE_ENABLED = os.getenv('TWEET_CACHE', '1') != '0'
+
+MAGIC = b'TWC1'
+VERSION = 2
+
+# (name, array typecode); order of the sections in the file
+COLUMNS = (('timestamps', 'q'), ('indexes', 'q'), ('text_offsets', 'Q'),
+           ('extra_offsets', 'Q'), ('author_ids', 'I'), ('masks', 'I'), ('flags', 'B'))
+
+# flags bits
+HAS_LINKS = 1
+NO_AUTHOR = 2
+NO_TEXT = 4
+NO_TIMESTAMP = 8
+NO_INDEX = 16
+EMPTY_URLS = 32
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+TAXONOMY_HASH = hashlib.sha1(
+    json.dumps(TOPIC_TAXONOMY, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def parse_timestamp(value):
+    """'2026-01-14T09:00:00.000Z' -> epoch ms, or None if it would not round-trip"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        return None
+    ms = (parsed - EPOCH) // timedelta(milliseconds=1)
+    return ms if format_timestamp(ms) == value else None
+
+
+def format_timestamp(ms):
+    """Epoch ms -> the server.js ISO format ('2026-01-14T09:00:00.000Z')"""
+    seconds, millis = divmod(ms, 1000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))}.{millis:03d}Z"
+
+
+def cache_path_for(source, cache_dir=DEFAULT_CACHE_DIR):
+    # The full name: X.json and X.jsonl must not share a cache
+    return Path(cache_dir) / f"{Path(source).name}.twc"
+
+
+def _source_info(source):
+    stat = Path(source).stat()
+    return {'path': Path(source).name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class CachedTweet(dict):
+    """Tweet dict read from the cache; .mask holds the stored topic bitmask"""
+
+    __slots__ = ('mask',)
+
+
+def cached_mask(tweet):
+    """classify_mask() for tweets read from the cache"""
+    return tweet.mask
+
+
+def build_cache(source, cache_dir=DEFAULT_CACHE_DIR, store=None):
+    """Parse source once and write its columnar cache (atomically); returns the cache path"""
+    source = Path(source)
+    cache_path = cache_path_for(source, cache_dir)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    store = store or get_article_store()
+    info = _source_info(source)
+
+    columns = {name: array(code) for name, code in COLUMNS}
+    columns['text_offsets'].append(0)
+    columns['extra_offsets'].append(0)
+    author_ids = {}
+    text_size = extra_size = 0
+
+    data = load_collection(source)
+    with tempfile.TemporaryFile() as text_blob, tempfile.TemporaryFile() as extra_blob:
+        for tweet in data['tweets']:
+            flags = 0
+            extras = {key: value for key, value in tweet.items()
+                      if key not in ('author', 'text', 'timestamp', 'index')}
+
+            author = tweet.get('author')
+            if isinstance(author, str):
+                columns['author_ids'].append(author_ids.setdefault(author, len(author_ids)))
+            else:
+                flags |= NO_AUTHOR
+                columns['author_ids'].append(0)
+                if 'author' in tweet:
+                    extras['author'] = author
+
+            text = tweet.get('text')
+            if isinstance(text, str):
+                raw = text.encode('utf-8')
+                text_blob.write(raw)
+                text_size += len(raw)
+            else:
+                flags |= NO_TEXT
+                text = ''
+                if 'text' in tweet:
+                    extras['text'] = tweet['text']
+            columns['text_offsets'].append(text_size)
+            columns['masks'].append(CLASSIFIER.classify_mask(text))
+
+            ms = parse_timestamp(tweet['timestamp']) if 'timestamp' in tweet else None
+            if ms is None:
+                flags |= NO_TIMESTAMP
+                if 'timestamp' in tweet:
+                    extras['timestamp'] = tweet['timestamp']
+            columns['timestamps'].append(ms or 0)
+
+            index = tweet.get('index')
+            if isinstance(index, int) and not isinstance(index, bool):
+                columns['indexes'].append(index)
+            else:
+                flags |= NO_INDEX
+                columns['indexes'].append(0)
+                if 'index' in tweet:
+                    extras['index'] = index
+
+            # Bodies live in the article store; the cache keeps the reference
+            if extras.get('linkedContent'):
+                flags |= HAS_LINKS
+                extras['linkedContent'] = [_article_ref(store, linked)
+                                           for linked in extras['linkedContent']]
+            if extras.get('urls') == []:
+                # The common case costs a flag bit rather than a JSON blob
+                flags |= EMPTY_URLS
+                del extras['urls']
+            if extras:
+                raw = json.dumps(extras, ensure_ascii=False).encode('utf-8')
+                extra_blob.write(raw)
+                extra_size += len(raw)
+            columns['extra_offsets'].append(extra_size)
+            columns['flags'].append(flags)
+
+        store.commit()
+        metadata = {key: value for key, value in data.items() if key != 'tweets'}
+        _write_cache_file(cache_path, {
+            'version': VERSION,
+            'byteorder': sys.byteorder,
+            'source': info,
+            'taxonomy': TAXONOMY_HASH,
+            'metadata': metadata,
+            'count': len(columns['flags']),
+            'authors': list(author_ids)
+        }, columns, text_blob, extra_blob)
+    return cache_path
+
+
+def _article_ref(store, linked):
+    if 'content' not in linked:
+        return linked
+    ref = {key: value for key, value in linked.items() if key != 'content'}
+    ref['content_hash'] = store.put(linked.get('url', ''), linked.get('title', ''),
+                                    linked.get('description', ''), linked['content'])
+    return ref
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _write_cache_file(cache_path, header, columns, text_blob, extra_blob):
+    """Lay out header, columns and blobs; sections start on 8-byte boundaries"""
+    sections = {}
+    offset = 0
+    for name, _ in COLUMNS:
+        size = len(columns[name]) * columns[name].itemsize
+        sections[name] = [offset, size]
+        offset = _align(offset + size)
+    for name, blob in (('text', text_blob), ('extras', extra_blob)):
+        size = blob.seek(0, os.SEEK_END)
+        sections[name] = [offset, size]
+        offset += size
+    header['sections'] = sections
+
+    encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    body_start = _align(len(MAGIC) + 4 + len(encoded))
+
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'wb') as out:
+        out.write(MAGIC + struct.pack('<I', len(encoded)) + encoded)
+        for name, _ in COLUMNS:
+            out.write(b'\0' * (body_start + sections[name][0] - out.tell()))
+            columns[name].tofile(out)
+        for name, blob in (('text', text_blob), ('extras', extra_blob)):
+            out.write(b'\0' * (body_start + sections[name][0] - out.tell()))
+            blob.seek(0)
+            shutil.copyfileobj(blob, out)
+    os.replace(tmp_path, cache_path)
+
+
+class CachedCollection:
+    """Memory-mapped reader for one .twc cache file"""
+
+    def __init__(self, cache_path):
+        self.path = Path(cache_path)
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:4] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a tweet cache file: {cache_path}")
+
+        header_size = struct.unpack('<I', self._map[4:8])[0]
+        self.header = json.loads(self._map[8:8 + header_size].decode('utf-8'))
+        body_start = _align(8 + header_size)
+        self.metadata = self.header['metadata']
+        self.authors = self.header['authors']
+        self.count = self.header['count']
+
+        view = memoryview(self._map)
+        self._views = [view]
+        for name, code in COLUMNS:
+            start, size = self.header['sections'][name]
+            start += body_start
+            if self.header['byteorder'] == sys.byteorder:
+                column = view[start:start + size].cast(code)
+                self._views.append(column)
+            else:
+                column = array(code)
+                column.frombytes(view[start:start + size])
+                column.byteswap()
+            setattr(self, name, column)
+        self._text_start = body_start + self.header['sections']['text'][0]
+        self._extras_start = body_start + self.header['sections']['extras'][0]
+
+    def __len__(self):
+        return self.count
+
+    def is_fresh(self, source):
+        """True if built from source as it is now, with the current taxonomy"""
+        try:
+            info = _source_info(source)
+        except OSError:
+            return False
+        return (self.header.get('version') == VERSION
+                and self.header.get('taxonomy') == TAXONOMY_HASH
+                and self.header.get('source') == info)
+
+    def text(self, i):
+        start, end = self.text_offsets[i], self.text_offsets[i + 1]
+        return self._map[self._text_start + start:self._text_start + end].decode('utf-8')
+
+    def tweet(self, i):
+        """Rebuild tweet i as a CachedTweet in the original field layout"""
+        flags = self.flags[i]
+        tweet = CachedTweet()
+        tweet.mask = self.masks[i]
+        if not flags & NO_AUTHOR:
+            tweet['author'] = self.authors[self.author_ids[i]]
+        if not flags & NO_TEXT:
+            tweet['text'] = self.text(i)
+        if not flags & NO_TIMESTAMP:
+            tweet['timestamp'] = format_timestamp(self.timestamps[i])
+        if flags & EMPTY_URLS:
+            tweet['urls'] = []
+        if not flags & NO_INDEX:
+            tweet['index'] = self.indexes[i]
+
+        start, end = self.extra_offsets[i], self.extra_offsets[i + 1]
+        if end > start:
+            tweet.update(json.loads(
+                self._map[self._extras_start + start:self._extras_start + end].decode('utf-8')))
+        return tweet
+
+    def iter_tweets(self, start=0):
+        """Yield tweets from position start without materializing the rest"""
+        for i in range(start, self.count):
+            yield self.tweet(i)
+
+    def __iter__(self):
+        return self.iter_tweets()
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+
+def open_cache(source, cache_dir=DEFAULT_CACHE_DIR):
+    """Return the CachedCollection for source if a fresh cache exists, else None"""
+    cache_path = cache_path_for(source, cache_dir)
+    if not cache_path.exists():
+        return None
+    try:
+        collection = CachedCollection(cache_path)
+    except (OSError, ValueError, KeyError):
+        return None
+    if not collection.is_fresh(source):
+        collection.close()
+        return None
+    return collection
+
+
+def load_tweets(source, cache_dir=DEFAULT_CACHE_DIR):
+    """load_collection() that reads the columnar cache when it is fresh
+
+    Cached data also carries 'classify_mask', which returns each tweet's
+    stored topic bitmask, so callers can skip the keyword scan.
+    """
+    collection = open_cache(source, cache_dir) if CACHE_ENABLED else None
+    if collection is None:
+        return load_collection(source)
+
+    data = dict(collection.metadata)
+    data['tweets'] = _iter_and_close(collection)
+    data['classify_mask'] = cached_mask
+    return data
+
+
+def _iter_and_close(collection):
+    try:
+        yield from collection
+    finally:
+        collection.close()
+
+
+def update_caches(data_dir=DEFAULT_DATA_DIR, cache_dir=DEFAULT_CACHE_DIR, rebuild=False):
+    """Build caches for new or changed collection files and drop orphaned ones
+
+    Returns the list of rebuilt cache paths.
+    """
+    sources = find_collection_files(data_dir) if Path(data_dir).exists() else []
+    built = []
+    for source in sources:
+        if not rebuild:
+            collection = open_cache(source, cache_dir)
+            if collection is not None:
+                collection.close()
+                continue
+        built.append(build_cache(source, cache_dir))
+
+    names = {cache_path_for(source, cache_dir).name for source in sources}
+    for cache_path in Path(cache_dir).glob('*.twc'):
+        if cache_path.name not in names:
+            cache_path.unlink()
+    return built
+
+
+def update_cache(source, cache_dir=DEFAULT_CACHE_DIR):
+    """Rebuild the cache for one source file if it is missing or stale"""
+    collection = open_cache(source, cache_dir)
+    if collection is not None:
+        collection.close()
+        return None
+    return build_cache(source, cache_dir)
+
+
+def main():
+    """Main function"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    if args and args[0] == 'stats':
+        for cache_path in sorted(DEFAULT_CACHE_DIR.glob('*.twc')):
+            collection = CachedCollection(cache_path)
+            source = DEFAULT_DATA_DIR / collection.header['source']['path']
+            state = 'fresh' if collection.is_fresh(source) else 'stale'
+            print(f"{cache_path.name:<40} {len(collection):>9,} tweets "
+                  f"{len(collection.authors):>7,} authors "
+                  f"{cache_path.stat().st_size / 1e6:8.1f} MB  {state}")
+            collection.close()
+        return
+
+    if args:
+        path = build_cache(Path(args[0]))
+        print(f"Wrote {path}")
+        return
+
+    built = update_caches(rebuild='--rebuild' in sys.argv)
+    for path in built:
+        print(f"Wrote {path}")
+    print(f"{len(built)} caches rebuilt in {DEFAULT_CACHE_DIR}")
+
+
+if __name__ == '__main__':
+    main()
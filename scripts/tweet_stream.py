@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming Tweet Reader
+Yields tweets one at a time from collection files without loading the
+whole file, so memory stays bounded by the size of a single tweet
+
+Supported formats:
+  *.json   server.js format: {"username": ..., "collectedAt": ..., "tweets": [...]}
+  *.jsonl  JSON Lines: an optional metadata line (no "text" key), then one tweet per line
+
+Usage:
+  python scripts/tweet_stream.py to-jsonl data/tweets/20260114_goromian.json [out.jsonl]
+"""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+
+class _IncrementalReader:
+    """Incremental JSON tokenizer over a text file
+
+    Only the structural characters of the outer object/array are scanned by
+    hand; each value is decoded with raw_decode once it is fully buffered.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        """Append more data to the buffer, dropping what was consumed"""
+        if self.eof:
+            return False
+        data = self.f.read(size or self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at EOF)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be char"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'EOF'!r} in JSON stream")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Value not fully buffered yet; grow geometrically so large
+                # values are not re-parsed once per chunk
+                if not self._fill(max(self.chunk_size, len(self.buf))):
+                    raise
+                continue
+
+            # A number or literal ending exactly at the buffer edge may be truncated
+            if end == len(self.buf) and self._fill():
+                continue
+
+            self.pos = end
+            return obj
+
+
+class CollectionReader:
+    """Read a tweet collection file as metadata plus a lazy tweet iterator
+
+    Metadata keys that appear before the "tweets" array are available right
+    after construction; keys that follow it are added once iteration ends.
+    The file is only held open while it is being iterated, so a reader that
+    is never consumed leaks nothing.
+    """
+
+    def __init__(self, filepath, chunk_size=CHUNK_SIZE):
+        self.filepath = Path(filepath)
+        self.chunk_size = chunk_size
+        self.metadata = {}
+        self._jsonl = self.filepath.suffix == '.jsonl'
+        self._file = None
+        self._open()
+        self.close()
+
+    def _open(self):
+        """Open the file and read up to the first tweet"""
+        self._file = open(self.filepath, 'r', encoding='utf-8')
+        self._first_line = None
+        if self._jsonl:
+            self._read_jsonl_header()
+        else:
+            self._reader = _IncrementalReader(self._file, self.chunk_size)
+            self._has_tweets = self._read_header()
+
+    def _read_jsonl_header(self):
+        for line in self._file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'text' in record:
+                self._first_line = record
+            else:
+                self.metadata.update(record)
+            return
+
+    def _read_header(self):
+        """Consume keys up to the start of the tweets array"""
+        reader = self._reader
+        first = reader.peek()
+
+        # A bare array of tweets is accepted too
+        if first == '[':
+            reader.pos += 1
+            self._bare_array = True
+            return True
+
+        self._bare_array = False
+        reader.expect('{')
+        while True:
+            char = reader.peek()
+            if char == '}':
+                reader.pos += 1
+                return False
+            if char == ',':
+                reader.pos += 1
+                continue
+
+            key = reader.value()
+            reader.expect(':')
+            if key == 'tweets':
+                reader.expect('[')
+                return True
+            self.metadata[key] = reader.value()
+
+    def _read_trailer(self):
+        """Consume keys after the tweets array"""
+        if self._bare_array:
+            return
+
+        reader = self._reader
+        while True:
+            char = reader.peek()
+            if char in ('}', ''):
+                return
+            if char == ',':
+                reader.pos += 1
+                continue
+
+            key = reader.value()
+            reader.expect(':')
+            self.metadata[key] = reader.value()
+
+    def _iter_json(self):
+        reader = self._reader
+        if not self._has_tweets:
+            return
+
+        while True:
+            char = reader.peek()
+            if char == ']':
+                reader.pos += 1
+                break
+            if char == ',':
+                reader.pos += 1
+                continue
+            if char == '':
+                raise ValueError(f"Unexpected end of file in {self.filepath}")
+            yield reader.value()
+
+        self._read_trailer()
+
+    def _iter_jsonl(self):
+        if self._first_line is not None:
+            yield self._first_line
+        for line in self._file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+    def __iter__(self):
+        self._open()
+        try:
+            if self._jsonl:
+                yield from self._iter_jsonl()
+            else:
+                yield from self._iter_json()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_collection(filepath):
+    """Return collection metadata with 'tweets' as a lazy generator"""
+    reader = CollectionReader(filepath)
+    data = reader.metadata
+    data['tweets'] = iter(reader)
+    return data
+
+
+def iter_tweets(filepath):
+    """Yield tweets one at a time from a collection file"""
+    yield from CollectionReader(filepath)
+
+
+def find_collection_files(data_dir):
+    """Return collection files in data_dir, newest (by filename) first"""
+    files = list(Path(data_dir).glob('*.json')) + list(Path(data_dir).glob('*.jsonl'))
+    return sorted(files, key=lambda path: path.name, reverse=True)
+
+
+def convert_to_jsonl(input_path, output_path):
+    """Rewrite a JSON collection file as JSON Lines"""
+    reader = CollectionReader(input_path)
+    count = 0
+
+    with open(output_path, 'w', encoding='utf-8') as out:
+        out.write(json.dumps(reader.metadata, ensure_ascii=False) + '\n')
+        for tweet in reader:
+            out.write(json.dumps(tweet, ensure_ascii=False) + '\n')
+            count += 1
+
+    return count
+
+
+def _indented(value, level):
+    """value as JSON.stringify(value, null, 2) would write it at nesting level"""
+    return json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + '  ' * level)
+
+
+def _write_json_collection(out, metadata, tweets):
+    """Write the server.js layout (JSON.stringify(data, null, 2)) one tweet at a time
+
+    Keys added to metadata while tweets are consumed (a reader's trailing
+    keys) are written after the array.
+    """
+    written = [key for key in metadata if key != 'tweets']
+    out.write('{')
+    for key in written:
+        out.write(f"\n  {_indented(key, 1)}: {_indented(metadata[key], 1)},")
+
+    out.write('\n  "tweets": [')
+    count = 0
+    for tweet in tweets:
+        out.write(f"{',' if count else ''}\n    {_indented(tweet, 2)}")
+        count += 1
+    out.write('\n  ]' if count else ']')
+
+    for key in metadata:
+        if key not in written and key != 'tweets':
+            out.write(f",\n  {_indented(key, 1)}: {_indented(metadata[key], 1)}")
+    out.write('\n}')
+
+
+def write_collection(output_path, metadata, tweets):
+    """Write metadata and tweets in the format implied by the suffix (atomic)"""
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        if output_path.suffix == '.jsonl':
+            if metadata:
+                out.write(json.dumps(metadata, ensure_ascii=False) + '\n')
+            for tweet in tweets:
+                out.write(json.dumps(tweet, ensure_ascii=False) + '\n')
+        else:
+            _write_json_collection(out, metadata, tweets)
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(tmp_path, output_path)
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 3 or sys.argv[1] != 'to-jsonl':
+        print("Usage:")
+        print("  python scripts/tweet_stream.py to-jsonl INPUT.json [OUTPUT.jsonl]")
+        sys.exit(1)
+
+    input_path = Path(sys.argv[2])
+    output_path = Path(sys.argv[3]) if len(sys.argv) > 3 else input_path.with_suffix('.jsonl')
+
+    count = convert_to_jsonl(input_path, output_path)
+    print(f"Wrote {count} tweets to {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linked Article Fetcher
+Fills in missing linkedContent for tweets collected without the Chrome
+extension's URL fetch, so extract_ai_topics() sees article text
+
+Requests run concurrently on a bounded thread pool with a per-host limit.
+Pages are cached on disk by canonical URL: entries younger than the TTL
+are served without a request, older ones are revalidated with
+If-None-Match / If-Modified-Since, and entries past the maximum age are
+evicted. Extracted bodies go to the shared article store and tweets only
+keep a content_hash reference. Only the standard library is used.
+
+Usage:
+  python scripts/url_fetcher.py data/tweets/20260114_goromian.json   Enrich the file in place (keeps FILE.bak)
+  python scripts/url_fetcher.py FILE --output enriched.json
+  python scripts/url_fetcher.py --url https://example.com/article     Fetch one page
+  python scripts/url_fetcher.py --clear-cache
+"""
+
+import argparse
+import asyncio
+import html
+import http.client
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import time
+import urllib.error
+import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Fix encoding for Windows
+if sys.platform.startswith('win'):
+    import codecs
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+from article_store import canonical_url, get_article_store
+from metrics import METRICS
+from tweet_stream import CollectionReader, find_collection_files, write_collection
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / 'data' / 'cache' / 'url_cache.sqlite3'
+# Cached pages younger than this are used without contacting the server
+DEFAULT_TTL = float(os.getenv('URL_CACHE_TTL_HOURS', '24')) * 3600
+# Cached pages older than this are deleted
+DEFAULT_MAX_AGE = float(os.getenv('URL_CACHE_MAX_AGE_DAYS', '30')) * 86400
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('URL_FETCH_CONCURRENCY', '16'))
+DEFAULT_PER_HOST = int(os.getenv('URL_FETCH_PER_HOST', '2'))
+DEFAULT_TIMEOUT = float(os.getenv('URL_FETCH_TIMEOUT', '10'))
+
+# Article text beyond the first MB is never used
+MAX_BODY_BYTES = 1024 * 1024
+# Same limit as /api/fetch-url in backend/server.js
+CONTENT_CHARS = 2000
+# Copy of a collection file kept before it is first enriched in place
+BACKUP_SUFFIX = '.bak'
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+_TITLE = re.compile(r'<title[^>]*>(.*?)</title\s*>', re.I | re.S)
+_META = re.compile(r'<meta\s[^>]*>', re.I)
+_ATTR = re.compile(r'([a-zA-Z:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+_CHARSET = re.compile(rb'charset=["\']?([a-zA-Z0-9_-]+)', re.I)
+_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_NON_TEXT = re.compile(r'<(script|style|noscript|svg|template|nav|header|footer)\b.*?</\1\s*>',
+                       re.I | re.S)
+_CONTAINERS = [re.compile(rf'<{tag}\b[^>]*>(.*?)</{tag}\s*>', re.I | re.S)
+               for tag in ('article', 'main', 'body')]
+_TAG = re.compile(r'<[^>]+>')
+_WHITESPACE = re.compile(r'\s+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages (fetched_at);
+"""
+
+
+def _clean(text):
+    return _WHITESPACE.sub(' ', html.unescape(text)).strip()
+
+
+def extract_article(page):
+    """Return (title, description, body text) from an HTML document
+
+    Regex-based rather than a full parser: only the <head> metadata and the
+    first article/main/body container are looked at.
+    """
+    head_end = page.find('</head')
+    head = page[:head_end] if head_end >= 0 else page[:64 * 1024]
+
+    meta = {}
+    for tag in _META.findall(head):
+        attrs = {}
+        for name, double, single, bare in _ATTR.findall(tag):
+            attrs[name.lower()] = double or single or bare
+        key = (attrs.get('property') or attrs.get('name') or '').lower()
+        if key and 'content' in attrs:
+            meta.setdefault(key, attrs['content'])
+
+    title_match = _TITLE.search(head)
+    title = meta.get('og:title') or (title_match.group(1) if title_match else '')
+    description = (meta.get('description') or meta.get('og:description')
+                   or meta.get('twitter:description') or '')
+
+    body = _NON_TEXT.sub(' ', _COMMENT.sub(' ', page[max(head_end, 0):]))
+    for container in _CONTAINERS:
+        match = container.search(body)
+        if match:
+            body = match.group(1)
+            break
+    text = _clean(_TAG.sub(' ', body))
+
+    return _clean(title), _clean(description), text[:CONTENT_CHARS]
+
+
+def _decode(body, content_type):
+    """Decode a response body using the header or <meta> charset"""
+    match = _CHARSET.search(content_type.encode('latin-1', 'replace')) or _CHARSET.search(body[:2048])
+    encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return body.decode(encoding, errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def _http_get(url, headers, timeout):
+    """Blocking GET; returns (status, headers, body, final URL). Runs on the thread pool."""
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read(MAX_BODY_BYTES)
+            if response.headers.get('Content-Encoding', '').lower() == 'gzip':
+                # decompressobj tolerates a body truncated at MAX_BODY_BYTES
+                body = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, MAX_BODY_BYTES)
+            return response.status, response.headers, body, response.geturl()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, b'', url
+
+
+class UrlCache:
+    """SQLite cache of extracted pages with validators for revalidation"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age=DEFAULT_MAX_AGE):
+        self.path = Path(path)
+        self.max_age = max_age
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Batch report workers share the cache file
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def get(self, key):
+        row = self.conn.execute("SELECT * FROM pages WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def put(self, key, status, etag=None, last_modified=None, content_hash=None):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (key, status, etag, last_modified, content_hash, time.time()))
+
+    def touch(self, key):
+        """Mark an entry fresh after a 304 Not Modified"""
+        with self.conn:
+            self.conn.execute("UPDATE pages SET fetched_at = ? WHERE key = ?", (time.time(), key))
+
+    def evict(self):
+        """Delete entries not fetched or revalidated within max_age"""
+        with self.conn:
+            return self.conn.execute(
+                "DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.max_age,)).rowcount
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM pages")
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class FetchStats:
+    """Outcome counters for one fetcher"""
+
+    def __init__(self):
+        self.fresh = 0
+        self.revalidated = 0
+        self.fetched = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    def summary(self):
+        return (f"URL fetch: {self.fetched} fetched, {self.fresh} cached, "
+                f"{self.revalidated} not modified, {self.failed} failed "
+                f"in {self.elapsed:.2f}s")
+
+
+class UrlFetcher:
+    """Concurrent page fetcher with per-host limits and an HTTP cache"""
+
+    def __init__(self, cache=None, store=None, ttl=DEFAULT_TTL,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT):
+        self.cache = cache if cache is not None else UrlCache()
+        self.store = store if store is not None else get_article_store()
+        self.ttl = ttl
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.stats = FetchStats()
+
+    async def fetch_all(self, urls):
+        """Fetch every URL once; returns {url: linkedContent dict or None}
+
+        The returned entries reference the article body by content_hash.
+        """
+        start = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._hosts = {}
+        try:
+            # URLs with the same canonical form share one request and cache entry,
+            # but the request goes to a URL as the tweet linked it: sites may need
+            # the query parameters that canonicalisation drops
+            keys = {url: self.store.resolve(url) for url in urls}
+            tasks = {}
+            for url, key in keys.items():
+                if key not in tasks:
+                    tasks[key] = asyncio.ensure_future(self._fetch(key, url))
+            hashes = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+        finally:
+            self._executor.shutdown(wait=False)
+            self.cache.evict()
+            self.stats.elapsed += time.perf_counter() - start
+
+        results = {}
+        for url, key in keys.items():
+            article = self.store.get(hashes[key]) if hashes[key] else None
+            results[url] = None if article is None else {
+                'url': url,
+                'title': article['title'],
+                'description': article['description'],
+                'content_hash': hashes[key]
+            }
+        return results
+
+    async def _fetch(self, key, url):
+        """Return the content hash of a cached or freshly extracted page, or None
+
+        key is the canonical URL the cache is keyed by; url is requested.
+        """
+        entry = self.cache.get(key)
+        if entry and time.time() - entry['fetched_at'] < self.ttl:
+            self.stats.fresh += 1
+            METRICS.inc('url_fetch_total', outcome='cached')
+            return entry['content_hash'] if entry['status'] < 400 else None
+
+        headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip'}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        # Wait for the host slot first so a slow host cannot hold global slots
+        host = urlsplit(url).netloc
+        host_slots = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        loop = asyncio.get_running_loop()
+        try:
+            async with host_slots, self._slots:
+                start = time.perf_counter()
+                status, response_headers, body, final_url = await loop.run_in_executor(
+                    self._executor, _http_get, url, headers, self.timeout)
+                METRICS.observe('url_fetch_seconds', time.perf_counter() - start)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            # Network errors are not cached; serve a stale copy if there is one
+            print(f"  Could not fetch {url}: {e}")
+            self.stats.failed += 1
+            METRICS.inc('url_fetch_total', outcome='error')
+            return entry['content_hash'] if entry and entry['status'] < 400 else None
+
+        if status == 304 and entry:
+            self.cache.touch(key)
+            self.stats.revalidated += 1
+            METRICS.inc('url_fetch_total', outcome='not_modified')
+            return entry['content_hash']
+
+        if status >= 400:
+            # Remember the failure until the TTL expires
+            self.cache.put(key, status)
+            self.stats.failed += 1
+            METRICS.inc('url_fetch_total', outcome='error')
+            return None
+
+        # Short links (t.co, bit.ly) resolve to the page they redirected to
+        self.store.add_alias(key, final_url)
+        page = _decode(body, response_headers.get('Content-Type', ''))
+        title, description, content = extract_article(page)
+        digest = self.store.put(final_url, title, description, content)
+        for cache_key in {key, canonical_url(final_url)}:
+            self.cache.put(cache_key, status, response_headers.get('ETag'),
+                           response_headers.get('Last-Modified'), digest)
+        self.stats.fetched += 1
+        METRICS.inc('url_fetch_total', outcome='fetched')
+        return digest
+
+    def close(self):
+        self.cache.close()
+
+
+def needs_fetch(tweet):
+    return bool(tweet.get('urls')) and not tweet.get('linkedContent')
+
+
+def fetch_linked(urls, tweet_count, fetcher=None):
+    """Fetch urls concurrently; returns {url: linkedContent dict or None}"""
+    own_fetcher = fetcher is None
+    fetcher = fetcher or UrlFetcher()
+    try:
+        print(f"Fetching {len(set(urls))} linked URLs for {tweet_count} tweets...")
+        results = asyncio.run(fetcher.fetch_all(urls))
+        print(fetcher.stats.summary())
+    finally:
+        if own_fetcher:
+            fetcher.close()
+    return results
+
+
+def link_tweet(tweet, results):
+    """Set linkedContent from fetch results; returns True if the tweet gained any"""
+    content = [results[url] for url in tweet['urls'] if results[url]]
+    if content:
+        tweet['linkedContent'] = content
+    return bool(content)
+
+
+def enrich_tweets(tweets, fetcher=None):
+    """Fill in linkedContent for tweets that have URLs but no fetched content
+
+    Returns the number of tweets that gained linked content.
+    """
+    missing = [tweet for tweet in tweets if needs_fetch(tweet)]
+    if not missing:
+        return 0
+
+    results = fetch_linked([url for tweet in missing for url in tweet['urls']], len(missing),
+                           fetcher)
+    return sum(1 for tweet in missing if link_tweet(tweet, results))
+
+
+def enrich_file(input_file, output_file=None, fetcher=None):
+    """Enrich a collection file and write it (in place by default)
+
+    The file is replaced atomically. In place, the original is first kept
+    as FILE.bak (once; later runs only add to it). The file is read twice,
+    once for the URLs to fetch and once to write it, so memory stays bounded
+    by a single tweet.
+    """
+    missing = [tweet['urls'] for tweet in CollectionReader(input_file) if needs_fetch(tweet)]
+    results = fetch_linked([url for urls in missing for url in urls], len(missing),
+                           fetcher) if missing else {}
+    enriched = sum(1 for urls in missing if any(results[url] for url in urls))
+
+    if enriched or output_file:
+        if not output_file:
+            backup = Path(input_file).with_name(Path(input_file).name + BACKUP_SUFFIX)
+            if not backup.exists():
+                shutil.copy2(input_file, backup)
+                print(f"Original kept as {backup.name}")
+
+        reader = CollectionReader(input_file)
+
+        def tweets():
+            for tweet in reader:
+                if needs_fetch(tweet):
+                    link_tweet(tweet, results)
+                yield tweet
+
+        write_collection(output_file or input_file, reader.metadata, tweets())
+    return enriched
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Fetch linked articles for collected tweets")
+    parser.add_argument('input_file', nargs='?',
+                        help="Tweet JSON file (default: newest in data/tweets/)")
+    parser.add_argument('--output', help="Write the enriched collection here instead of in place")
+    parser.add_argument('--url', help="Fetch a single URL and print the extracted content")
+    parser.add_argument('--clear-cache', action='store_true', help="Delete all cached pages")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f"Maximum requests in flight (default: {DEFAULT_MAX_CONCURRENCY})")
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                        help=f"Maximum requests in flight per host (default: {DEFAULT_PER_HOST})")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    if args.clear_cache:
+        cache = UrlCache()
+        cache.clear()
+        print(f"Cleared {cache.path}")
+        cache.close()
+        return
+
+    fetcher = UrlFetcher(max_concurrency=args.concurrency, per_host=args.per_host)
+    try:
+        if args.url:
+            result = asyncio.run(fetcher.fetch_all([args.url]))[args.url]
+            if result is None:
+                print(f"Could not fetch {args.url}")
+                sys.exit(1)
+            print(f"Title: {result['title']}")
+            print(f"Description: {result['description']}")
+            article = fetcher.store.get(result['content_hash'])
+            print(f"Content: {article['content'][:500]}")
+            return
+
+        if args.input_file:
+            input_file = Path(args.input_file)
+        else:
+            json_files = find_collection_files(Path(__file__).parent.parent / 'data' / 'tweets')
+            if not json_files:
+                print("No tweet data files found in data/tweets/")
+                sys.exit(1)
+            input_file = json_files[0]
+
+        print(f"Input file: {input_file}")
+        enriched = enrich_file(input_file, args.output, fetcher)
+        print(f"Added linked content to {enriched} tweets")
+    finally:
+        fetcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+URL canonicalisation and article resolution in article_store
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from article_store import ArticleStore, canonical_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://Example.com:443/a/?utm_source=x&b=2&a=1#top', 'https://example.com/a?a=1&b=2'),
+    ('http://example.com:8080/', 'http://example.com:8080/'),
+    ('http://x:abc/', 'http://x:abc/'),
+    ('http://[::1', 'http://[::1'),
+    ('', ''),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def test_missing_content_hash_is_not_replaced_by_an_empty_body(tmp_path):
+    store = ArticleStore(tmp_path / 'articles.sqlite3')
+    try:
+        assert store.article({'url': 'https://example.com/a', 'content_hash': '0' * 64}) is None
+        assert store.summary()['articles'] == 0
+
+        digest = store.put('https://example.com/a', 'A', '', 'body')
+        article = store.article({'url': 'https://example.com/a/', 'content_hash': digest})
+        assert article['content'] == 'body'
+        assert article['url'] == 'https://example.com/a'
+    finally:
+        store.close()
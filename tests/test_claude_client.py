@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Resuming a broken stream in claude_client against a scripted fake client
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import anthropic
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from claude_client import ClaudeClient
+
+
+class Usage:
+    input_tokens = 10
+    output_tokens = 4
+
+
+class Message:
+    usage = Usage()
+    stop_reason = 'end_turn'
+
+
+class Stream:
+    """messages.stream() stand-in: yields chunks, then raises if told to"""
+
+    def __init__(self, chunks, error):
+        self.chunks = chunks
+        self.error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error:
+            raise anthropic.APIConnectionError(request=None)
+
+    async def get_final_message(self):
+        return Message()
+
+
+class ScriptedClient:
+    """One (chunks, fails) entry per attempt; records the messages sent"""
+
+    def __init__(self, attempts):
+        self.attempts = list(attempts)
+        self.sent = []
+        self.messages = self
+
+    def stream(self, messages, **kwargs):
+        self.sent.append(messages)
+        chunks, fails = self.attempts.pop(0)
+        return Stream(chunks, fails)
+
+    async def close(self):
+        pass
+
+
+def run_stream(attempts):
+    client = ClaudeClient(api_key='test', base_delay=0.0)
+    fake = ScriptedClient(attempts)
+
+    async def bind():
+        client._client, client._semaphore = fake, asyncio.Semaphore(1)
+        return fake
+
+    client._bind = bind
+    received = []
+    stats = asyncio.run(client.stream('prompt', 'system', 'model', 100, 0.0, received.append))
+    return ''.join(received), stats, fake.sent
+
+
+@pytest.mark.parametrize('continuation, expected', [
+    # Whitespace held back before the break is kept when the retry does not resend it
+    (['world'], 'Hello world'),
+    # ...and dropped when it does
+    ([' world'], 'Hello world'),
+])
+def test_held_whitespace_survives_a_retry(continuation, expected):
+    text, stats, sent = run_stream([(['Hello '], True), (continuation, False)])
+
+    assert text == expected
+    assert stats.resumes == 1
+    # The prefill never ends with whitespace
+    assert sent[1][-1] == {'role': 'assistant', 'content': 'Hello'}
+
+
+def test_rate_covers_the_final_attempt():
+    text, stats, _ = run_stream([(['Hello'], True), ([' world'], False)])
+
+    assert text == 'Hello world'
+    assert stats.output_tokens == Usage.output_tokens
+    assert stats.generation_seconds <= stats.seconds
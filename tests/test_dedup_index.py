@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Cross-file duplicate attribution in dedup_index and report regeneration
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+import article_store
+import generate_report
+import tweet_cache
+from dedup_index import DedupIndex
+
+SHARED = {'author': 'alice', 'text': 'Claude ships a new model for coding agents today',
+          'timestamp': '2026-01-13T09:00:00Z'}
+# A retweet of SHARED: a near copy, not an exact one
+RETWEET = dict(SHARED, author='bob', text='RT @alice: Claude ships a new model for coding agents today!')
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupIndex(tmp_path / 'dedup.sqlite3')
+    yield index
+    index.close()
+
+
+def test_copy_is_credited_to_the_earlier_file(index):
+    # The newer file is seen first, as when an older report is regenerated
+    assert index.check(SHARED, '20260114_x:0') is None
+    assert index.check(SHARED, '20260113_x:4') is None
+    assert index.check(SHARED, '20260114_x:0') == '20260113_x:4'
+    # Processing the older file again changes nothing
+    assert index.check(SHARED, '20260113_x:4') is None
+
+
+def test_near_copy_in_a_later_file_does_not_count(index):
+    assert index.check(RETWEET, '20260114_x:0') is None
+    assert index.check(SHARED, '20260113_x:0') is None
+    assert index.check(RETWEET, '20260114_x:0') == '20260113_x:0'
+    assert index.check(SHARED, '20260113_x:0') is None
+
+
+@pytest.fixture
+def collections(tmp_path, monkeypatch):
+    """Two collection files sharing a tweet, with an index and stores under tmp_path"""
+    monkeypatch.setattr(tweet_cache, 'CACHE_ENABLED', False)
+    monkeypatch.setattr(generate_report, 'DedupIndex',
+                        lambda: DedupIndex(tmp_path / 'dedup.sqlite3'))
+    store = article_store.ArticleStore(tmp_path / 'articles.sqlite3')
+    monkeypatch.setattr(article_store, '_store', store)
+
+    files = {}
+    for date, own in (('20260113', 'GPT-5 benchmark results are out'),
+                      ('20260114', 'Gemini adds a longer context window')):
+        path = tmp_path / f"{date}_tester.json"
+        tweets = [dict(SHARED, index=0), {'index': 1, 'author': 'carol', 'text': own,
+                                          'timestamp': f"{date[:4]}-{date[4:6]}-{date[6:]}T10:00:00Z"}]
+        path.write_text(json.dumps({'date': date, 'tweets': tweets}), encoding='utf-8')
+        files[date] = path
+    yield files
+    store.close()
+
+
+def texts(topics):
+    return sorted(topic['text'] for topic in topics)
+
+
+def test_regenerating_a_report_yields_identical_topics(collections):
+    newer = generate_report.load_unique_topics(collections['20260114'])
+    older = generate_report.load_unique_topics(collections['20260113'])
+
+    # Regenerating the older report after the newer one keeps the shared tweet
+    assert SHARED['text'] in texts(older)
+    assert texts(generate_report.load_unique_topics(collections['20260113'])) == texts(older)
+    again = generate_report.load_unique_topics(collections['20260114'])
+    assert texts(generate_report.load_unique_topics(collections['20260114'])) == texts(again)
+    assert SHARED['text'] in texts(newer)
+    assert SHARED['text'] not in texts(again)
+
+
+@pytest.mark.parametrize('order', [('20260113', '20260114'), ('20260114', '20260113')])
+def test_batch_dedup_does_not_depend_on_worker_order(collections, order):
+    generate_report.index_collections(list(collections.values()))
+
+    topics = {date: texts(generate_report.load_unique_topics(collections[date])) for date in order}
+
+    assert SHARED['text'] in topics['20260113']
+    assert SHARED['text'] not in topics['20260114']
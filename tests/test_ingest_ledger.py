@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Ingest watermarks: resuming, appended JSON Lines files and concurrent writers
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+import tweet_cache
+from ingest_ledger import IngestLedger
+from save_to_neo4j import ingest_file
+
+
+def tweet(i):
+    return {'index': i, 'author': 'alice', 'text': f"tweet {i}",
+            'timestamp': f"2026-01-14T09:00:{i:02d}.000Z"}
+
+
+def write_jsonl(path, indexes, mode='w'):
+    with open(path, mode, encoding='utf-8') as f:
+        for i in indexes:
+            f.write(json.dumps(tweet(i)) + '\n')
+
+
+class InterruptedSaver:
+    """Neo4jSaver.ingest stand-in that commits batches until it is told to fail"""
+
+    def __init__(self, fail_after_batches=None):
+        self.fail_after_batches = fail_after_batches
+        self.ingested = []
+
+    def ingest(self, tweets, collection_info, batch_size, on_batch=None, classify_mask=None):
+        chunk, batches = [], 0
+        for item in tweets:
+            chunk.append(item)
+            if len(chunk) == batch_size:
+                if batches == self.fail_after_batches:
+                    raise ConnectionError("Neo4j went away")
+                self.ingested.extend(chunk)
+                batches += 1
+                on_batch(len(self.ingested), chunk[-1])
+                chunk = []
+        self.ingested.extend(chunk)
+        if chunk:
+            on_batch(len(self.ingested), chunk[-1])
+        return {'tweets': len(self.ingested), 'articles': 0, 'mentions': 0, 'added': {}}
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(tweet_cache, 'CACHE_ENABLED', False)
+    path = tmp_path / '20260114_tester.jsonl'
+    write_jsonl(path, range(5))
+    return path
+
+
+def indexes(tweets):
+    return [item['index'] for item in tweets]
+
+
+def test_resume_after_partial_ingest(tmp_path, source):
+    ledger = IngestLedger(tmp_path / 'ledger.json')
+    saver = InterruptedSaver(fail_after_batches=1)
+    with pytest.raises(ConnectionError):
+        ingest_file(saver, ledger.check(source), ledger, batch_size=2)
+    assert indexes(saver.ingested) == [0, 1]
+
+    # A new run (a new process) picks up after the committed batch
+    ledger = IngestLedger(tmp_path / 'ledger.json')
+    pending = ledger.check(source)
+    assert pending.start == 2
+    saver = InterruptedSaver()
+    ingest_file(saver, pending, ledger, batch_size=2)
+    assert indexes(saver.ingested) == [2, 3, 4]
+
+    assert IngestLedger(tmp_path / 'ledger.json').check(source) is None
+
+
+def test_resume_after_append_to_jsonl(tmp_path, source):
+    ledger = IngestLedger(tmp_path / 'ledger.json')
+    ingest_file(InterruptedSaver(), ledger.check(source), ledger, batch_size=2)
+
+    write_jsonl(source, [5, 6], mode='a')
+    pending = IngestLedger(tmp_path / 'ledger.json').check(source)
+    assert pending.start == 5
+    saver = InterruptedSaver()
+    ingest_file(saver, pending, ledger, batch_size=2)
+    assert indexes(saver.ingested) == [5, 6]
+
+
+def test_rewritten_file_restarts_from_zero(tmp_path, source):
+    ledger = IngestLedger(tmp_path / 'ledger.json')
+    ingest_file(InterruptedSaver(), ledger.check(source), ledger, batch_size=2)
+
+    write_jsonl(source, [9, 8, 7, 6, 5, 4])
+    assert ledger.check(source).start == 0
+
+
+def test_concurrent_writers_keep_each_others_watermarks(tmp_path, source):
+    other = tmp_path / '20260115_tester.jsonl'
+    write_jsonl(other, range(3))
+    # Both processes read the ledger before either writes
+    cli = IngestLedger(tmp_path / 'ledger.json')
+    scheduler = IngestLedger(tmp_path / 'ledger.json')
+
+    cli.record(cli.check(source), 5, 4, complete=True)
+    scheduler.record(scheduler.check(other), 2, 1)
+
+    entries = IngestLedger(tmp_path / 'ledger.json').entries
+    assert entries[source.name]['complete']
+    assert entries[other.name]['position'] == 2
+    assert not os.path.exists(tmp_path / 'ledger.tmp')
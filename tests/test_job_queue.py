@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Leases, reclaims and the attempts cap in job_queue
+"""
+
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from job_queue import JobQueue, Worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.sqlite3', max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def expire_leases(queue):
+    queue.conn.execute("UPDATE jobs SET lease_expires = 0 WHERE status = 'running'")
+
+
+def test_expired_lease_is_reclaimed(queue, tmp_path):
+    job_id = queue.enqueue('report', tmp_path / 'a.json')
+    first = queue.claim('worker-1', ['report'])
+    assert first.id == job_id and first.attempts == 1
+
+    # The lease is still live: nobody else can take the job
+    assert queue.claim('worker-2', ['report']) is None
+
+    expire_leases(queue)
+    second = queue.claim('worker-2', ['report'])
+    assert second.id == job_id
+    assert second.lease_owner == 'worker-2'
+    assert second.attempts == 2
+    # The first worker can no longer renew or finish it
+    assert not queue.heartbeat(first, 'worker-1')
+    assert not queue.complete(first, 'worker-1')
+
+
+def test_expired_lease_out_of_attempts_fails(queue, tmp_path):
+    job_id = queue.enqueue('report', tmp_path / 'a.json')
+    for owner in ('worker-1', 'worker-2'):
+        assert queue.claim(owner, ['report']).id == job_id
+        expire_leases(queue)
+
+    assert queue.claim('worker-3', ['report']) is None
+    job = queue._job(job_id)
+    assert job.status == 'failed'
+    assert job.last_error == 'lease expired'
+    assert job.lease_owner is None
+    assert job.attempts == 2
+
+
+class FakeProcess:
+    def __init__(self):
+        self.stopped = False
+
+    def terminate(self):
+        self.stopped = True
+
+    def wait(self, timeout=None):
+        return -15
+
+
+def test_keep_lease_stops_the_job_when_renewals_keep_failing(queue, tmp_path, monkeypatch):
+    worker = Worker(queue.path)
+    worker.queue.lease_seconds = 0.3
+    worker.log = lambda message: None
+    queue.enqueue('report', tmp_path / 'a.json')
+    job = worker.queue.claim(worker.owner, ['report'])
+
+    def locked(self, job, owner):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(JobQueue, 'heartbeat', locked)
+    proc, stop, lost = FakeProcess(), threading.Event(), threading.Event()
+    renewer = threading.Thread(target=worker.keep_lease, args=(job, proc, stop, lost))
+    renewer.start()
+    renewer.join(5)
+    stop.set()
+    worker.queue.close()
+
+    assert not renewer.is_alive()
+    assert lost.is_set()
+    assert proc.stopped
+
+
+def test_keep_lease_survives_a_transient_error(queue, tmp_path, monkeypatch):
+    worker = Worker(queue.path)
+    worker.queue.lease_seconds = 0.6
+    worker.log = lambda message: None
+    queue.enqueue('report', tmp_path / 'a.json')
+    job = worker.queue.claim(worker.owner, ['report'])
+
+    calls = []
+    heartbeat = JobQueue.heartbeat
+
+    def flaky(self, job, owner):
+        calls.append(owner)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError('database is locked')
+        return heartbeat(self, job, owner)
+
+    monkeypatch.setattr(JobQueue, 'heartbeat', flaky)
+    proc, stop, lost = FakeProcess(), threading.Event(), threading.Event()
+    renewer = threading.Thread(target=worker.keep_lease, args=(job, proc, stop, lost))
+    renewer.start()
+    stop.wait(1.0)
+    stop.set()
+    renewer.join(5)
+    worker.queue.close()
+
+    assert len(calls) >= 3
+    assert not lost.is_set()
+    assert not proc.stopped
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+One profiler at a time in profiling.StageProfiler
+"""
+
+import cProfile
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from profiling import StageProfiler
+
+
+def test_span_in_another_thread_is_skipped(tmp_path):
+    profiler = StageProfiler(tmp_path, 'test')
+    ran = []
+
+    def ingest():
+        with profiler.stage('ingest'):
+            ran.append('ingest')
+
+    # As in pipeline.py: 'ingest' runs in a worker thread inside 'parallel'
+    with profiler.stage('parallel'):
+        with profiler.stage('report'):
+            ran.append('report')
+        worker = threading.Thread(target=ingest)
+        worker.start()
+        worker.join()
+
+    assert ran == ['report', 'ingest']
+    assert list(profiler.profiles) == ['parallel']
+    assert profiler.skipped == {'ingest'}
+
+    # Once the outer span ends, the next one is profiled again
+    worker = threading.Thread(target=ingest)
+    worker.start()
+    worker.join()
+    assert 'ingest' in profiler.profiles
+
+
+def test_other_profiling_tool_active(tmp_path, monkeypatch):
+    class Busy(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(cProfile, 'Profile', Busy)
+    profiler = StageProfiler(tmp_path, 'test')
+
+    with profiler.stage('topics'):
+        pass
+
+    assert profiler.profiles == {}
+    assert profiler.skipped == {'topics'}
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Article write path of save_to_neo4j against a scripted fake driver
+
+Run with: python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+import article_store
+from save_to_neo4j import Neo4jSaver
+
+COLLECTION_INFO = {'date': '20260114', 'collected_at': '2026-01-14T09:00:00Z',
+                   'source': 'test', 'username': 'tester'}
+ARTICLE = {'url': 'https://example.com/a/?utm_source=x', 'title': 'A',
+           'description': 'about a', 'content': 'body'}
+
+
+class Counters:
+    def __init__(self, nodes_created=0, relationships_created=0):
+        self.nodes_created = nodes_created
+        self.relationships_created = relationships_created
+
+
+class Summary:
+    def __init__(self, counters):
+        self.counters = counters
+
+
+class Result:
+    """neo4j.Result stand-in: records can be read once, like the real stream"""
+
+    def __init__(self, records, counters):
+        self._records = list(records)
+        self._counters = counters
+
+    def single(self):
+        if not self._records:
+            return None
+        return self._records.pop(0)
+
+    def consume(self):
+        self._records = []
+        return Summary(self._counters)
+
+
+class Transaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        self.driver.queries.append((query, parameters or kwargs))
+        return self.driver.respond(query, parameters or kwargs)
+
+
+class Session:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def close(self):
+        pass
+
+    def execute_write(self, fn, *args, **kwargs):
+        self.driver.transactions += 1
+        return fn(Transaction(self.driver), *args, **kwargs)
+
+
+class ScriptedDriver:
+    """Driver whose article queries report scripted counters and 'changed' values
+
+    article_state is 'new' (the MERGE creates the node), 'changed' (it exists
+    with another content hash) or 'same' (it exists with this hash).
+    """
+
+    def __init__(self, article_state):
+        self.article_state = article_state
+        self.queries = []
+        self.transactions = 0
+
+    def respond(self, query, params):
+        created = 1 if self.article_state == 'new' else 0
+        if 'LINKS_TO' in query and 'UNWIND' in query:
+            return Result([], Counters(relationships_created=created * len(params['rows'])))
+        if 'MERGE (a:Article' not in query:
+            return Result([], Counters())
+        if 'UNWIND' in query:
+            return Result([], Counters(nodes_created=created * len(params['rows'])))
+        record = {'id': '4:a:1', 'changed': self.article_state != 'same'}
+        return Result([record], Counters(nodes_created=created, relationships_created=1))
+
+    def session(self, **kwargs):
+        return Session(self)
+
+
+@pytest.fixture(autouse=True)
+def article_store_tmp(tmp_path, monkeypatch):
+    """Keep test articles out of data/articles.sqlite3"""
+    store = article_store.ArticleStore(tmp_path / 'articles.sqlite3')
+    monkeypatch.setattr(article_store, '_store', store)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize('state, status', [
+    ('new', 'created'),
+    ('changed', 'updated'),
+    ('same', 'unchanged'),
+])
+def test_save_article_status(state, status):
+    driver = ScriptedDriver(state)
+    saver = Neo4jSaver(None, None, None, driver=driver)
+
+    summary = saver.save_article(dict(ARTICLE), '20260114_0')
+
+    assert summary == {'id': '4:a:1', 'url': 'https://example.com/a', 'status': status}
+    assert driver.transactions == 1
+    query, params = driver.queries[0]
+    # Only the id and the changed flag come back, never the Article node
+    assert 'RETURN elementId(a) AS id, changed' in query
+    assert params['content'] == 'body'
+
+
+def test_save_article_missing_tweet():
+    class NoTweetDriver(ScriptedDriver):
+        def respond(self, query, params):
+            return Result([], Counters())
+
+    saver = Neo4jSaver(None, None, None, driver=NoTweetDriver('new'))
+    assert saver.save_article(dict(ARTICLE), '20260114_404') is None
+
+
+@pytest.mark.parametrize('state, added, linked', [('new', 1, 2), ('changed', 0, 0), ('same', 0, 0)])
+def test_ingest_counts_articles(state, added, linked):
+    tweets = [
+        {'index': 0, 'author': 'alice', 'text': 'Claude', 'timestamp': '2026-01-14T09:00:00Z',
+         'linkedContent': [dict(ARTICLE)]},
+        # The same article from a second tweet is written once and linked twice
+        {'index': 1, 'author': 'bob', 'text': 'ChatGPT', 'timestamp': '2026-01-14T10:00:00Z',
+         'linkedContent': [dict(ARTICLE, url='https://example.com/a')]},
+    ]
+    saver = Neo4jSaver(None, None, None, driver=ScriptedDriver(state))
+
+    counts = saver.ingest(tweets, COLLECTION_INFO, batch_size=10)
+
+    assert counts['tweets'] == 2
+    assert counts['articles'] == 1
+    assert counts['links'] == 2
+    assert counts['added']['articles'] == added
+    # Links are relationships, never counted as articles
+    assert counts['added']['links'] == linked
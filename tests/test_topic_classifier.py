@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Word boundaries, plurals and Japanese keywords in topic_classifier
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from topic_classifier import classify_topics, is_ai_related
+
+
+@pytest.mark.parametrize('text, topics', [
+    # Version numbers and plurals after a keyword
+    ('GPT-4s are here', ['GPT']),
+    ('gpt4 and LLMs', ['GPT']),
+    ('AIs everywhere', ['AI']),
+    ('transformers library', ['AI']),
+    ("Claude's answer", ['GPT']),
+    ('AI-powered', ['AI']),
+    ('X.ai', ['AI']),
+    ('UNITY', ['Unity']),
+    ('unity3d tips', ['Unity']),
+    ('VRChat event', ['VR/AR']),
+    ('Quest 3 review', ['VR/AR']),
+    ('three.js demo', ['WebGL']),
+    # Keywords inside longer words do not count
+    ('our community meetup', []),
+    ('opportunity', []),
+    ('he said so', []),
+    ('start the art', []),
+    ('questions?', []),
+    ('neuralink', []),
+    ('arXiv paper', []),
+    # Japanese keywords match as substrings
+    ('機械学習モデル', ['AI']),
+    ('Unityで作った', ['Unity']),
+    ('メタバースで会おう', ['Metaverse']),
+    ('新しい開発者向け', ['Development']),
+    # Several topics, in taxonomy order
+    ('Claude helps with Unity development', ['GPT', 'Unity', 'Development']),
+])
+def test_classify_topics(text, topics):
+    assert classify_topics(text) == topics
+
+
+@pytest.mark.parametrize('text, related', [
+    ('Anthropic and OpenAI', True),
+    # Development alone is not a report topic
+    ('新しい開発者向け', False),
+    ('our community meetup', False),
+])
+def test_is_ai_related(text, related):
+    assert is_ai_related(text) is related
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Round trip through the columnar tweet cache
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+import article_store
+from tweet_cache import build_cache, cache_path_for, open_cache
+
+TWEETS = [
+    {'index': 0, 'author': 'alice', 'text': 'Claude', 'timestamp': '2026-01-14T09:00:00.000Z',
+     'urls': []},
+    # No urls key at all
+    {'index': 1, 'author': 'bob', 'text': 'ChatGPT', 'timestamp': '2026-01-14T10:00:00.000Z'},
+    {'index': 2, 'author': 'carol', 'text': 'Gemini', 'timestamp': 'yesterday',
+     'urls': ['https://example.com/g']},
+]
+
+
+@pytest.fixture(autouse=True)
+def article_store_tmp(tmp_path, monkeypatch):
+    store = article_store.ArticleStore(tmp_path / 'articles.sqlite3')
+    monkeypatch.setattr(article_store, '_store', store)
+    yield store
+    store.close()
+
+
+def read_back(source, cache_dir):
+    collection = open_cache(source, cache_dir)
+    assert collection is not None
+    try:
+        return [dict(tweet) for tweet in collection]
+    finally:
+        collection.close()
+
+
+def test_round_trip_is_exact(tmp_path):
+    source = tmp_path / '20260114_x.json'
+    source.write_text(json.dumps({'date': '20260114', 'tweets': TWEETS}), encoding='utf-8')
+
+    build_cache(source, tmp_path / 'cache')
+
+    assert read_back(source, tmp_path / 'cache') == TWEETS
+
+
+def test_json_and_jsonl_sources_keep_separate_caches(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    json_source = tmp_path / '20260114_x.json'
+    json_source.write_text(json.dumps({'tweets': TWEETS[:1]}), encoding='utf-8')
+    jsonl_source = tmp_path / '20260114_x.jsonl'
+    jsonl_source.write_text('\n'.join(json.dumps(tweet) for tweet in TWEETS[1:]) + '\n',
+                            encoding='utf-8')
+
+    assert cache_path_for(json_source, cache_dir) != cache_path_for(jsonl_source, cache_dir)
+    build_cache(json_source, cache_dir)
+    build_cache(jsonl_source, cache_dir)
+
+    # Both caches stay fresh after the other one is built
+    assert read_back(json_source, cache_dir) == TWEETS[:1]
+    assert read_back(jsonl_source, cache_dir) == TWEETS[1:]
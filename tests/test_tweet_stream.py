@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming reads and writes of collection files in tweet_stream
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from tweet_stream import CollectionReader, load_collection, write_collection
+
+TWEETS = [
+    {'index': 0, 'author': 'alice', 'text': 'Claude\n日本語', 'urls': [],
+     'linkedContent': [{'url': 'https://example.com/a', 'title': 'A'}]},
+    {'index': 1, 'author': 'bob', 'text': 'ChatGPT'},
+]
+
+
+@pytest.mark.parametrize('metadata, tweets', [
+    ({'username': 'tester', 'stats': {'pages': [1, 2], 'empty': {}}}, TWEETS),
+    ({'username': 'tester'}, []),
+    ({}, TWEETS[:1]),
+])
+def test_json_layout_matches_server_js(tmp_path, metadata, tweets):
+    path = tmp_path / 'out.json'
+
+    write_collection(path, dict(metadata), iter(tweets))
+
+    # JSON.stringify(data, null, 2) == json.dumps(data, indent=2)
+    expected = json.dumps({**metadata, 'tweets': tweets}, indent=2, ensure_ascii=False)
+    assert path.read_text(encoding='utf-8') == expected
+
+
+def test_rewrite_keeps_keys_after_the_tweets(tmp_path):
+    source = tmp_path / 'in.json'
+    source.write_text('{"username": "tester", "tweets": [{"index": 0}], "tweetCount": 1}',
+                      encoding='utf-8')
+    reader = CollectionReader(source)
+
+    write_collection(tmp_path / 'out.json', reader.metadata, iter(reader))
+
+    assert json.loads((tmp_path / 'out.json').read_text(encoding='utf-8')) == {
+        'username': 'tester', 'tweets': [{'index': 0}], 'tweetCount': 1}
+
+
+def test_file_is_open_only_while_iterating(tmp_path):
+    source = tmp_path / 'in.json'
+    source.write_text(json.dumps({'username': 'tester', 'tweets': TWEETS}), encoding='utf-8')
+
+    reader = CollectionReader(source)
+    assert reader.metadata == {'username': 'tester'}
+    assert reader._file is None
+
+    data = load_collection(source)
+    assert data['username'] == 'tester'
+    assert list(data['tweets']) == TWEETS